@@ -334,6 +334,11 @@ class VTOSDB_DataBlock(_TOSDB_DataBlock):
         self._call(_vCREATE, '__init__', size, date_time, timeout) 
       
 
+    def close(self):
+        """ Closes the connection (and with it the block) now """
+        self._my_sock.close()
+
+
     def __del__(self):
         try:
             if self._my_sock:    
@@ -433,6 +438,14 @@ class VTOSDB_DataBlock(_TOSDB_DataBlock):
                           data_str_max) 
     
 
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def multi_snapshot(self, pairs, depth, date_time=False, 
+                       data_str_max=STR_DATA_SZ, threaded=True):
+
+        return self._call(_vCALL, 'multi_snapshot', tuple(pairs), depth, 
+                          date_time, data_str_max, threaded) 
+    
+
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def item_frame(self, topic, date_time=False, labels=True, 
                    data_str_max=STR_DATA_SZ, label_str_max=MAX_STR_SZ):
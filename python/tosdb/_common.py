@@ -20,14 +20,21 @@ from .meta_enum import MetaEnum
 
 import sys as _sys
 import struct as _struct
-from collections import namedtuple as _namedtuple
+import copyreg as _copyreg
+import pickle as _pickle
+from collections import namedtuple as _namedtuple, OrderedDict as _OrderedDict
+from collections.abc import Sequence as _Sequence
 from abc import ABCMeta as _ABCMeta, abstractmethod as _abstractmethod
+from threading import Lock as _Lock
 
 from time import mktime as _mktime, struct_time as _struct_time, \
                  asctime as _asctime, localtime as _localtime, \
                  strftime as _strftime
 
 from ctypes import Structure as _Structure, \
+                   addressof as _addressof, \
+                   sizeof as _sizeof, \
+                   string_at as _string_at, \
                    c_long as _long_, \
                    c_int as _int_, \
                    c_double as _double_, \
@@ -182,7 +189,7 @@ class _TOSDB_DataBlock(metaclass=_ABCMeta):
         smart_size: limits amount of returned data by data-stream's occupancy
         data_str_max: the maximum length of string data returned
 
-        if date_time is True: returns-> list of 2tuple
+        if date_time is True: returns-> TOSDB_Snapshot (sequence of 2tuple)
         else: returns -> list        
         """
         pass
@@ -233,11 +240,31 @@ class _TOSDB_DataBlock(metaclass=_ABCMeta):
         data_str_max: the maximum length of string data returned
 
         if beg > internal marker value: returns -> None    
-        if date_time is True: returns-> list of 2tuple
+        if date_time is True: returns-> TOSDB_Snapshot (sequence of 2tuple)
         else: returns -> list        
         """
         pass
 
+    @_abstractmethod
+    def multi_snapshot(): 
+        """ Return the most recent data-points of many data-streams at once
+
+        Buffers are allocated once for all the streams and (if threaded is 
+        True) the underlying reads are spread across a pool of threads.
+
+        pairs: iterable of (item, topic) tuples
+        depth: maximum number of data-points returned for each pair
+        date_time: (True/False) attempt to retrieve TOSDB_DateTime objects
+        data_str_max: the maximum length of string data returned
+        threaded: (True/False) read the data-streams concurrently
+
+        returns -> MultiSnapshot namedtuple of:
+          pairs: tuple of the (item, topic) pairs, in the order passed
+          data: list of one list of data-points (most recent first) per pair
+          date_times: list of one TOSDB_DateTimeArray per pair (or None)
+        """
+        pass
+
     @_abstractmethod
     def item_frame(): 
         """ Return all the most recent item values for a particular topic.
@@ -273,6 +300,9 @@ class _TOSDB_DataBlock(metaclass=_ABCMeta):
         pass
 
 
+MultiSnapshot = _namedtuple("MultiSnapshot", ["pairs", "data", "date_times"])
+
+
 class TOSDB_Error(Exception):
     """ Base exception for tosdb """  
     def __init__(self,  *messages): 
@@ -382,147 +412,326 @@ class _DateTimeStamp(_Structure):
     _fields_ = [("ctime_struct", _CTime), ("micro_second", _long_)]
 
 
-class TOSDB_DateTime( _namedtuple("DateTime",["micro","sec","min",
-                                              "hour", "day","month","year"]) ):
-    """ The object used for handling DateTime values
+# native layout of _DateTimeStamp, for reading stamp buffers in bulk
+_STAMP_FMT = '@9il'
+_STAMP_SZ = _sizeof(_DateTimeStamp)
+if _struct.calcsize(_STAMP_FMT) != _STAMP_SZ:
+    raise TOSDB_Error("_STAMP_FMT does not match the layout of _DateTimeStamp")
+
+
+# (local) epoch seconds at 00:00:00 of (tm_year, tm_mon, tm_mday, tm_isdst), 
+# or None for days that aren't 86400 linear seconds (DST transitions)
+_day_bases = {}
+_DAY_BASES_MAX = 4096
+
+def _day_base(key):
+    year, mon, mday, isdst = key
+    day = (year + BASE_YR, mon + 1, mday)
+    base = int(_mktime(day + (0, 0, 0, 0, 0, isdst)))
+    if int(_mktime(day + (12, 0, 0, 0, 0, isdst))) != base + 43200 \
+        or int(_mktime(day + (23, 59, 59, 0, 0, isdst))) != base + 86399:
+        base = None
+    if len(_day_bases) >= _DAY_BASES_MAX:
+        _day_bases.clear()
+    _day_bases[key] = base
+    return base
+
+
+def _tm_to_epoch(sec, mn, hour, mday, mon, year, isdst):
+    """ time.mktime of C tm fields (tm_mon from 0, tm_year from BASE_YR) """
+    key = (year, mon, mday, isdst)
+    base = _day_bases.get(key, False)
+    if base is False:
+        base = _day_base(key)
+    if base is None:
+        return int(_mktime((year + BASE_YR, mon + 1, mday, hour, mn, sec, 
+                            0, 0, isdst)))
+    return base + hour * 3600 + mn * 60 + sec
+
+
+# LRU of the 9 tm fields of recently converted stamps -> epoch seconds; the 
+# ticks in a snapshot often share the same second (blocks convert stamps from
+# their own threads, so the LRU and its counts are only touched under the lock)
+_stamp_cache = _OrderedDict()
+_stamp_cache_stats = [0, 0] # hits, misses
+_stamp_cache_lock = _Lock()
+STAMP_CACHE_SIZE = 1024
+
+StampCacheInfo = _namedtuple("StampCacheInfo", ["hits","misses","size","max_size"])
+
+def stamp_cache_info():
+    """ Returns hits/misses/size/max_size of the _DateTimeStamp conversion cache """
+    with _stamp_cache_lock:
+        return StampCacheInfo(_stamp_cache_stats[0], _stamp_cache_stats[1], 
+                              len(_stamp_cache), STAMP_CACHE_SIZE)
+
+
+def stamp_cache_clear():
+    """ Clears the _DateTimeStamp conversion cache and its hit/miss counts """
+    with _stamp_cache_lock:
+        _stamp_cache.clear()
+        _stamp_cache_stats[:] = [0, 0]
+
+
+def _stamp_epoch(tm, run_hits=0):
+    # epoch seconds of the 9 tm fields of a stamp (0 if they can't be converted);
+    # run_hits are hits the caller found without the LRU (counted here, locked)
+    with _stamp_cache_lock:
+        _stamp_cache_stats[0] += run_hits
+        sec = _stamp_cache.get(tm)
+        if sec is not None:
+            _stamp_cache_stats[0] += 1
+            _stamp_cache.move_to_end(tm)
+            return sec
+        _stamp_cache_stats[1] += 1
+    try: # (convert outside the lock; a racing miss just converts it twice)
+        sec = _tm_to_epoch(tm[0], tm[1], tm[2], tm[3], tm[4], tm[5], tm[8])
+    except (OverflowError, ValueError):
+        return 0
+    with _stamp_cache_lock:
+        _stamp_cache[tm] = sec
+        if len(_stamp_cache) > STAMP_CACHE_SIZE:
+            _stamp_cache.popitem(last=False)
+    return sec
+
+
+def _stamps_to_epoch_micros(fields):
+    """ epoch micro-seconds of each _STAMP_FMT tuple in 'fields' (0 sec if bad) """
+    ems = []
+    prev_tm = prev_sec = None
+    run_hits = 0
+    for f in fields:
+        tm = f[:9]
+        if tm == prev_tm: # runs of stamps in the same second skip the LRU too
+            run_hits += 1
+        else:
+            prev_tm, prev_sec = tm, _stamp_epoch(tm, run_hits)
+            run_hits = 0
+        ems.append(prev_sec * 1000000 + f[9])
+    if run_hits:
+        with _stamp_cache_lock:
+            _stamp_cache_stats[0] += run_hits
+    return ems
 
-    TOSDB_DateTime is built on top of a simplified named tuple. It can be 
-    constructed from _DateTimeStamp, _struct_time from the time.py library, or 
-    itself (copy construction). It can be pickled (serialized); allows for basic 
-    addition and subtraction returning a new object or a DateTimeDiff tuple, 
-    respectively; overloads comparison operators; and provides static utility 
-    functions to convert betwen DateTimeDiff objects and microseconds.       
 
-    obj: either a _DateTimeStamp,  time._struct_time, or TOSDB_DateTime object           
+
+class TOSDB_DateTime(object):
+    """ The object used for handling DateTime values
+
+    TOSDB_DateTime stores a single int of micro-seconds since the epoch and 
+    computes its calendar fields (local time) lazily. It can be constructed 
+    from _DateTimeStamp, _struct_time from the time.py library, a (sec, min, 
+    hour, day, month, year) tuple, or itself (copy construction). It behaves 
+    like the named tuple (micro, sec, min, hour, day, month, year) it replaces; 
+    can be pickled (serialized); allows for basic addition and subtraction 
+    returning a new object or a DateTimeDiff tuple, respectively; overloads 
+    comparison operators; and provides static utility functions to convert 
+    betwen DateTimeDiff objects and microseconds.       
+
+    Unlike the named tuple it's no longer a tuple (isinstance(dt, tuple) is 
+    False); indexing, iteration, _fields, _asdict and _replace still work. 
+    Pickles of either version can be read by the other with protocol 2 or 
+    higher; protocol 0/1 pickles of this version can be read by the old one, 
+    but old protocol 0/1 pickles rebuild a tuple, which pickle.load can't do 
+    any more: read them with TOSDB_Unpickler.
+
+    obj: either a _DateTimeStamp,  time._struct_time, tuple or TOSDB_DateTime           
     micro_second: custom micro_second value
     """
     dtd_tuple = _namedtuple("DateTimeDiff",["micro","sec","min","hour","day","sign"])
-    
-    _mktime = None # cache total sec from epoch to make ops easier
+
+    _fields = ("micro","sec","min","hour","day","month","year")
+
+    __slots__ = ('_micros', '_tm') # _tm caches (sec,min,hour,day,month,year)
 
     def __getnewargs__(self):        
         return ((self.sec,self.min,self.hour,self.day,self.month,self.year),self.micro)
 
-    def __getstate__(self):
-        return self.__dict__
+    def __getstate__(self): # same state as the old named tuple version
+        return {'_mktime': self._micros // 1000000}
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 2:
+            return super(TOSDB_DateTime, self).__reduce_ex__(protocol)
+        # protocols 0 and 1 would rebuild the old (tuple) version through 
+        # copyreg._reconstructor; construct from a struct_time instead, which 
+        # the constructors of both versions take
+        return (TOSDB_DateTime, (_localtime(self._micros // 1000000), self.micro),
+                self.__getstate__())
+
+    def __setstate__(self, state):
+        if '_micros' in state:
+            self._micros = state['_micros']
+        elif '_mktime' in state:
+            self._micros = int(state['_mktime']) * 1000000 + self._micros % 1000000
       
     def __new__(cls, obj, micro_second = 0):
         if micro_second != 0:
             micro_second %= 1000000
-        _stime = None      
+        self = super(TOSDB_DateTime, cls).__new__(cls)
+        self._tm = None
         if isinstance(obj, _DateTimeStamp):
-            _stime = cls._to_struct_time(obj)
-            micro_second = obj.micro_second
+            return cls._from_stamp_fields(
+                _struct.unpack(_STAMP_FMT, _string_at(_addressof(obj), _STAMP_SZ)))
         elif isinstance(obj, _struct_time):
-            _stime = obj
+            self._micros = int(_mktime(obj)) * 1000000 + micro_second
         elif isinstance(obj, TOSDB_DateTime):
-            return super(TOSDB_DateTime, cls).__new__(cls, obj.micro, obj.sec, 
-                                                      obj.min, obj.hour, obj.day, 
-                                                      obj.month, obj.year)
+            self._micros = obj._micros
+            self._tm = obj._tm
         elif isinstance(obj, tuple):
-            return super(TOSDB_DateTime, cls).__new__(cls, micro_second, *obj)
+            sec, mn, hour, day, month, year = obj
+            try:
+                esec = int(_mktime((year, month, day, hour, mn, sec, 0, 0, -1)))
+            except:
+                esec = 0
+                self._tm = tuple(obj)
+            self._micros = esec * 1000000 + micro_second
         else:
             raise TOSDB_DateTimeError("invalid 'object' passed to __new__")
-        
-        return super(TOSDB_DateTime, cls).__new__(cls, micro_second, _stime.tm_sec, 
-                                                  _stime.tm_min, _stime.tm_hour, 
-                                                  _stime.tm_mday, _stime.tm_mon, 
-                                                  _stime.tm_year)
+        return self
 
 
-    def __init__(self, obj, micro_second=0):
-        if isinstance(obj, _DateTimeStamp):
-            try:
-                self._mktime = _mktime(TOSDB_DateTime._to_struct_time(obj))
-            except:
-                self._mktime = 0
-        elif isinstance(obj, _struct_time):
-            self._mktime = _mktime(obj)
-        elif isinstance(obj, TOSDB_DateTime):
-            self._mktime = obj._mktime
-        else:
-            raise TOSDB_DateTimeError("invalid 'object' passed to __init__")
+    @classmethod
+    def _from_stamp_fields(cls, f):
+        self = super(TOSDB_DateTime, cls).__new__(cls)
+        sec = _stamp_epoch(f[:9])
+        # keep the stamp's own fields if they can't be converted
+        self._tm = None if sec else (f[0], f[1], f[2], f[3], f[4] + 1, f[5] + BASE_YR)
+        self._micros = sec * 1000000 + f[9]
+        return self
+
+
+    @classmethod
+    def from_epoch_micros(cls, micros):
+        """ Returns a TOSDB_DateTime from micro-seconds since the epoch """
+        self = super(TOSDB_DateTime, cls).__new__(cls)
+        self._micros = int(micros)
+        self._tm = None
+        return self
+
+
+    def _calendar(self):
+        tm = self._tm
+        if tm is None:
+            lt = _localtime(self._micros // 1000000)
+            tm = self._tm = (lt.tm_sec, lt.tm_min, lt.tm_hour, lt.tm_mday, 
+                             lt.tm_mon, lt.tm_year)
+        return tm
+
+    micro = property(lambda self: self._micros % 1000000)
+    sec = property(lambda self: self._calendar()[0])
+    min = property(lambda self: self._calendar()[1])
+    hour = property(lambda self: self._calendar()[2])
+    day = property(lambda self: self._calendar()[3])
+    month = property(lambda self: self._calendar()[4])
+    year = property(lambda self: self._calendar()[5])
+
+
+    def __iter__(self):
+        yield self.micro
+        for f in self._calendar():
+            yield f
+
+    def __getitem__(self, indx):
+        return tuple(self)[indx]
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __hash__(self):
+        return hash(self._micros)
+
+    def __repr__(self):
+        return "TOSDB_DateTime(" + ", ".join(f + "=" + str(v) for f,v in 
+                                             zip(self._fields, self)) + ")"
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def _replace(self, **fields):
+        d = self._asdict()
+        for f in fields:
+            if f not in d:
+                raise ValueError("invalid field: " + str(f))
+        d.update(fields)
+        return TOSDB_DateTime(tuple(d[f] for f in self._fields[1:]), d['micro'])
 
 
     def __str__(self):
-        ftime = _strftime("%m/%d/%y %H:%M:%S", _localtime(self._mktime))
-        return ftime + " " + str(self.micro)
+        return _format_micros(self._micros, "default")
+
+
+    def format(self, style="default"):
+        """ Returns the date-time as a string
+
+        style: 'default' ('11/14/23 22:13:20 123' like str()), 
+               'iso' ('2023-11-14T22:13:20.000123') or 
+               'compact' ('20231114221320.000123')
+        """
+        return _format_micros(self._micros, style)
+
+
+    @staticmethod
+    def format_many(date_times, style="default"):
+        """ Returns a list of strings, one per date-time (see format())
+
+        date_times: a TOSDB_DateTimeArray or a sequence of TOSDB_DateTime 
+                    objects or epoch micro-seconds 
+        """
+        return [_format_micros(em, style) for em in _as_epoch_micros(date_times)]
 
 
     def __add__(self, micro_seconds):
         if not isinstance(micro_seconds, int):            
             raise TOSDB_DateTimeError("micro_seconds must be integer")
-        incr_sec = micro_seconds // 1000000
-        ms_new = self.micro + (micro_seconds % 1000000 )    
-        if ms_new >= 1000000:
-            incr_sec += 1
-            ms_new -= 1000000
-        # reduce to seconds, increment, return to _struct_time    
-        mk_time = self._mktime 
-        mk_time += incr_sec       
-        new_time = _localtime(mk_time) 
-        # return a new TOSDB_DateTime 
-        return TOSDB_DateTime(new_time, micro_second = ms_new)                
+        return TOSDB_DateTime.from_epoch_micros(self._micros + micro_seconds)
 
           
     def __sub__(self, other_or_micro_sec):
         other = other_or_micro_sec    
         if isinstance(other , int): # subtracting an integer
-            if other < 0:
-                return self.__add__(other * -1)
-            other_sec = other // 1000000
-            ms_diff = self.micro - (other % 1000000)
-            if ms_diff < 0: # take a second, if needed
-                other_sec += 1
-                ms_diff += 1000000
-            # reduce to seconds, decrement, return to stuct_time      
-            mk_time = self._mktime
-            mk_time -= other_sec
-            new_time = _localtime(mk_time)      
-            return TOSDB_DateTime(new_time, micro_second = ms_diff)            
+            return TOSDB_DateTime.from_epoch_micros(self._micros - other)
         elif isinstance(other, TOSDB_DateTime): # subtracting another TOSDB_DateTime
-            try: # try to get other's time in seconds                             
-                sec_diff = self._mktime - other._mktime     
-                ms_diff = self.micro - other.micro
-                # convert the diff in micro_seconds to the diff-tuple
-                return TOSDB_DateTime.micro_to_dtd(sec_diff * 1000000 + ms_diff)     
-            except Exception as e:
-                raise TOSDB_DateTimeError("invalid TOSDB_DateTime object", e)
+            # convert the diff in micro_seconds to the diff-tuple
+            return TOSDB_DateTime.micro_to_dtd(self._micros - other._micros)
         else:
             raise TOSDB_DateTimeError("other_or_micro_sec not TOSDB_DateTime or int")
 
 
     def __lt__(self, other):
-        return self._compare(other) < 0
+        return self._micros < self._other_micros(other)
       
     def __ge__(self, other):
-        return not self.__lt__(other)
+        return self._micros >= self._other_micros(other)
       
     def __gt__(self, other):
-        return self._compare(other) > 0
+        return self._micros > self._other_micros(other)
       
     def __le__(self, other):
-        return not self.__gt__(other)
+        return self._micros <= self._other_micros(other)
       
     def __eq__(self, other):
-        return not self._compare(other)
+        return self._micros == self._other_micros(other)
       
     def __ne__(self, other):
-        return self._compare(other)
+        return self._micros != self._other_micros(other)
       
       
-    def _compare(self, other):
-        if not isinstance(other, TOSDB_DateTime):
+    @staticmethod
+    def _other_micros(other):
+        try:
+            return other._micros
+        except AttributeError:
             raise TOSDB_DateTimeError("unable to compare; unorderable types") 
-        diff = self._mktime - other._mktime
-        if diff == 0:            
-            diff = self.micro - other.micro   
-        return (-1 if diff < 0 else 1) if diff else 0
 
 
     @property
     def mktime(self):
-        return self._mktime
+        return self._micros // 1000000
+
+    @property
+    def epoch_micros(self):
+        return self._micros
 
       
     @staticmethod
@@ -574,6 +783,178 @@ class TOSDB_DateTime( _namedtuple("DateTime",["micro","sec","min",
             raise TOSDB_DateTimeError("invalid 'sign' field in DateTimeDiff")
 
 
+def _reconstructor(cls, base, state):
+    # the old (named tuple) TOSDB_DateTime pickled with protocol 0/1 is 
+    # rebuilt as tuple.__new__(cls, fields); build it from its fields instead
+    if isinstance(cls, type) and issubclass(cls, TOSDB_DateTime) \
+        and base is tuple:
+        return cls(tuple(state[1:]), state[0])
+    return _copyreg._reconstructor(cls, base, state)
+
+
+class TOSDB_Unpickler(_pickle.Unpickler):
+    """ pickle.Unpickler that also reads protocol 0/1 pickles of the old 
+    (named tuple) TOSDB_DateTime
+
+    TOSDB_Unpickler(f).load() replaces pickle.load(f) for such files; 
+    everything else loads as it does with pickle.load.
+    """
+    def find_class(self, module, name):
+        if module in ("copyreg", "copy_reg") and name == "_reconstructor":
+            return _reconstructor
+        return super().find_class(module, name)
+
+
+class TOSDB_DateTimeArray(_Sequence):
+    """ A lazy sequence of TOSDB_DateTime objects over raw _DateTimeStamps
+
+    Holds (a range of) the _DateTimeStamp buffer filled by the library and only
+    builds a TOSDB_DateTime when an element is accessed. Use epoch_micros() to 
+    convert the whole range to epoch micro-seconds without building objects.
+    Slicing returns another TOSDB_DateTimeArray: a view of the same buffer 
+    for a step of 1, a copy of the stamps otherwise.
+
+    stamps: ctypes array of _DateTimeStamp
+    beg: index of the first stamp in the view
+    end: index one past the last stamp in the view (None for len(stamps))
+    """
+    __slots__ = ('_stamps', '_beg', '_end')
+
+    def __init__(self, stamps, beg=0, end=None):
+        self._stamps = stamps
+        self._beg = beg
+        self._end = len(stamps) if end is None else end
+
+    def __len__(self):
+        return self._end - self._beg
+
+    def __getitem__(self, indx):
+        if isinstance(indx, slice):
+            beg, end, step = indx.indices(len(self))
+            if step != 1: # (copy those stamps to a new buffer)
+                fields = list(self._fields())
+                return TOSDB_DateTimeArray._from_fields(
+                    [fields[i] for i in range(beg, end, step)])
+            return TOSDB_DateTimeArray(self._stamps, self._beg + beg, 
+                                       self._beg + max(beg, end))
+        if indx < 0:
+            indx += len(self)
+        if indx < 0 or indx >= len(self):
+            raise IndexError("TOSDB_DateTimeArray index out of range")
+        return TOSDB_DateTime(self._stamps[self._beg + indx])
+
+    def __iter__(self):
+        for f in self._fields():
+            yield TOSDB_DateTime._from_stamp_fields(f)
+
+    def __repr__(self):
+        return "TOSDB_DateTimeArray(" + repr(list(self)) + ")"
+
+    def __reduce__(self): # native layout differs across platforms, pickle ints
+        return (TOSDB_DateTimeArray._from_fields, (tuple(self._fields()),))
+
+    def epoch_micros(self):
+        """ Returns a list of micro-seconds since the epoch, one per stamp """
+        return _stamps_to_epoch_micros(self._fields())
+
+    def diff_micros(self, other=None):
+        """ Returns a list of differences in micro-seconds
+
+        other: None for the differences between consecutive stamps (i.e each 
+               stamp minus the one after it; non-negative for the most-recent-
+               first order of snapshots), or a sequence of the same length 
+               (of TOSDB_DateTime, epoch micro-seconds, or a TOSDB_DateTimeArray) 
+               to subtract element-wise 
+        """
+        ems = self.epoch_micros()
+        if other is None:
+            return [a - b for a,b in zip(ems, ems[1:])]
+        if len(other) != len(ems):
+            raise TOSDB_ValueError("other must be the same length")
+        return [a - b for a,b in zip(ems, _as_epoch_micros(other))]
+
+    def _fields(self):
+        # (tm_sec, ..., tm_isdst, micro_second) of each stamp, straight from 
+        # the buffer, without creating a ctypes object per stamp 
+        raw = _string_at(_addressof(self._stamps) + self._beg * _STAMP_SZ, 
+                         len(self) * _STAMP_SZ)
+        return _struct.iter_unpack(_STAMP_FMT, raw)
+
+    @classmethod
+    def _from_fields(cls, fields):
+        stamps = (_DateTimeStamp * len(fields))()
+        _pack = _struct.Struct(_STAMP_FMT).pack_into
+        for i,f in enumerate(fields):
+            _pack(stamps, i * _STAMP_SZ, *f)
+        return cls(stamps)
+
+
+
+class TOSDB_Snapshot(_Sequence):
+    """ The (date_time=True) result of the snapshot calls
+
+    A sequence of (data-point, TOSDB_DateTime) 2tuples, most recent first. 
+    Only the element(s) accessed are converted to TOSDB_DateTime; the data 
+    and date-time columns are available as the 'data' and 'date_times' 
+    (TOSDB_DateTimeArray) attributes, and epoch_micros() converts the 
+    date-time column in bulk.
+
+    data: list of data-points
+    date_times: TOSDB_DateTimeArray of the same length 
+    """
+    __slots__ = ('_data', '_date_times')
+
+    def __init__(self, data, date_times):
+        if len(data) != len(date_times):
+            raise TOSDB_ValueError("data and date_times must be the same length")
+        self._data = data
+        self._date_times = date_times
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, indx):
+        if isinstance(indx, slice):
+            return TOSDB_Snapshot(self._data[indx], self._date_times[indx])
+        return (self._data[indx], self._date_times[indx])
+
+    def __eq__(self, other):
+        if not isinstance(other, _Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return "TOSDB_Snapshot(" + repr(list(self)) + ")"
+
+    def __reduce__(self):
+        return (TOSDB_Snapshot, (self._data, self._date_times))
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def date_times(self):
+        return self._date_times
+
+    def epoch_micros(self):
+        """ Returns a list of micro-seconds since the epoch, one per data-point """
+        return self._date_times.epoch_micros()
+
+    def diff_micros(self, other=None):
+        """ Returns a list of differences in micro-seconds (see 
+            TOSDB_DateTimeArray.diff_micros) 
+        """
+        return self._date_times.diff_micros(other)
+
+
+
 def abort_init_after_warn():
     print("*WARNING* by not supplying --root, --path, or --noinit(-n) arguments "
           + "you are opting for a default search root of 'C:\\'. This will "
@@ -599,3 +980,39 @@ def _type_switch(type_bits):
         return ("Float", _float_)
     else: # default to string
         return("String", _str_)
+
+
+# style -> (strftime format of the minute prefix, format of the rest)
+_DT_FORMATS = {"default": ("%m/%d/%y %H:%M:", "{0}{1:02d} {2}"),
+               "iso": ("%Y-%m-%dT%H:%M:", "{0}{1:02d}.{2:06d}"),
+               "compact": ("%Y%m%d%H%M", "{0}{1:02d}.{2:06d}")}
+
+# (style, minutes since epoch) -> formatted minute prefix 
+_dt_prefixes = {}
+_DT_PREFIXES_MAX = 4096
+
+def _format_micros(micros, style):
+    try:
+        pfmt, rfmt = _DT_FORMATS[style]
+    except KeyError:
+        raise TOSDB_ValueError("invalid style: " + str(style))
+    sec, micro = divmod(micros, 1000000)
+    minute, sec_in_min = divmod(sec, 60)
+    prefix = _dt_prefixes.get((style, minute))
+    if prefix is None:
+        lt = _localtime(minute * 60)
+        if lt.tm_sec != 0: # utc offset isn't whole minutes, don't cache
+            lt = _localtime(sec)
+            return rfmt.format(_strftime(pfmt, lt), lt.tm_sec, micro)
+        prefix = _strftime(pfmt, lt)
+        if len(_dt_prefixes) >= _DT_PREFIXES_MAX:
+            _dt_prefixes.clear()
+        _dt_prefixes[(style, minute)] = prefix
+    return rfmt.format(prefix, sec_in_min, micro)
+
+
+def _as_epoch_micros(date_times):
+    # epoch micro-seconds of a TOSDB_DateTimeArray or sequence of TOSDB_DateTime/int
+    if isinstance(date_times, TOSDB_DateTimeArray):
+        return date_times.epoch_micros()
+    return [dt if isinstance(dt, int) else dt.epoch_micros for dt in date_times]
@@ -33,6 +33,7 @@ from collections import namedtuple as _namedtuple
 from time import asctime as _asctime, localtime as _localtime
 from platform import system as _system
 from contextlib import contextmanager as _contextmanager
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
 
 from os import walk as _walk, stat as _stat, curdir as _curdir, \
                listdir as _listdir, sep as _sep, path as _path
@@ -47,6 +48,8 @@ if _system() not in ["Windows","windows","WINDOWS"]:
 from ctypes import CDLL as _CDLL, \
                    cast as _cast, \
                    pointer as _pointer, \
+                   addressof as _addressof, \
+                   sizeof as _sizeof, \
                    create_string_buffer as _BUF_, \
                    POINTER as _PTR_, \
                    c_double as _double_, \
@@ -66,12 +69,13 @@ from ctypes import CDLL as _CDLL, \
 
 _pchar_ = _PTR_(_char_)
 _ppchar_ = _PTR_(_pchar_)  
-_cast_cstr = lambda x: _cast(x,_str_).value.decode()
 
 DLL_BASE_NAME = "tos-databridge"
 DLL_DEPENDS1_NAME = "_tos-databridge"
 SYS_ARCH_TYPE = "x64" if (_log(_maxsize * 2, 2) > 33) else "x86"
 MIN_MARGIN_OF_SAFETY = 10
+BULK_CHUNK_SIZE = 500 # max names passed to TOSDB_AddItems/TOSDB_AddTopics
+MULTI_SNAPSHOT_THREADS = 4
 
 _REGEX_NON_ALNUM = _compile("[\W+]")
 _REGEX_LETTER = _compile("[a-zA-Z]")
@@ -88,6 +92,8 @@ _REGEX_DBG_DLL_PATH = _compile('^.+(' + DLL_BASE_NAME + '-)' \
            
 _dll = None
 _dll_depend1 = None
+_snapshot_pool_obj = None
+_type_cache = {} # encoded topic -> _type_switch() tuple
 
       
 def init(dllpath=None, root="C:\\", bypass_check=False):
@@ -271,10 +277,17 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
         self._block_size = size
         self._timeout = timeout
         self._date_time = date_time
-        self._items = []   
-        self._topics = []        
+        self._items = {} # item key -> validated, encoded item 
+        self._topics = {} # topic key -> validated, encoded topic
     
 
+    def close(self):
+        """ Closes the underlying block now (rather than when collected) """
+        if self._valid:
+            self._valid = False
+            _lib_call("TOSDB_CloseBlock", self._name)
+
+
     def __del__(self): # for convenience, no guarantee
         if _lib_call is not None and self._valid and _dll is not None:
             try:
@@ -317,20 +330,34 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
         return sio.read()
 
       
-    # assumes .upper() already called
-    def _valid_item(self, item):
+    # O(1) lookup of the validated, encoded name; caches the caller's spelling
+    def _item_key(self, item):
+        try:
+            return self._items[item]
+        except KeyError:
+            pass
         if not self._items: # in case items came out of pre-cache
-            self._items = self.items()
-        if item not in self._items:
+            self._items = _key_cache(self.items())
+        enc = self._items.get(item.upper())
+        if enc is None:
             raise TOSDB_ValueError("item " + str(item) + " not found")
+        self._items[item] = enc
+        return enc
 
 
-    # assumes .upper() already called
-    def _valid_topic(self, topic):
+    # O(1) lookup of the validated, encoded name; caches the caller's spelling
+    def _topic_key(self, topic):
+        try:
+            return self._topics[topic]
+        except KeyError:
+            pass
         if not self._topics: # in case topics came out of pre-cache
-            self._topics = self.topics()
-        if topic not in self._topics:
+            self._topics = _key_cache(self.topics())
+        enc = self._topics.get(topic.upper())
+        if enc is None:
             raise TOSDB_ValueError("topic " + str(topic) + " not found")
+        self._topics[topic] = enc
+        return enc
 
 
     def _item_count(self):       
@@ -387,16 +414,14 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
 
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock     
     def stream_occupancy(self, item, topic):              
-        item = item.upper()
-        topic = topic.upper()
-        self._valid_item(item)
-        self._valid_topic(topic)
+        item_b = self._item_key(item)
+        topic_b = self._topic_key(topic)
         occ = _uint32_()
         
         _lib_call("TOSDB_GetStreamOccupancy", 
                   self._name, 
-                  item.encode("ascii"),
-                  topic.encode("ascii"), 
+                  item_b,
+                  topic_b, 
                   _pointer(occ),
                   arg_types=(_str_, _str_, _str_, _PTR_(_uint32_)))
         
@@ -406,8 +431,7 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def items(self, str_max=MAX_STR_SZ):  
         size = self._item_count()  
-        strs = [_BUF_(str_max + 1) for _ in range(size)]      
-        strs_array = (_pchar_* size)(*[ _cast(s, _pchar_) for s in strs]) 
+        strs, strs_array = _str_block(size, str_max)
         
         _lib_call("TOSDB_GetItemNames", 
                   self._name, 
@@ -416,14 +440,13 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                   str_max + 1, 
                   arg_types=(_str_, _ppchar_, _uint32_, _uint32_))
         
-        return [_cast_cstr(s) for s in strs_array]            
+        return _decode_str_block(strs, size, str_max)
          
          
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def topics(self,  str_max=MAX_STR_SZ):
         size = self._topic_count()
-        strs = [_BUF_(str_max + 1) for _ in range(size)]     
-        strs_array = (_pchar_* size)(*[ _cast(s, _pchar_) for s in strs])   
+        strs, strs_array = _str_block(size, str_max)
             
         _lib_call("TOSDB_GetTopicNames", 
                   self._name, 
@@ -432,14 +455,13 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                   str_max + 1, 
                   arg_types=(_str_,  _ppchar_, _uint32_, _uint32_))               
         
-        return [_cast_cstr(s) for s in strs_array] 
+        return _decode_str_block(strs, size, str_max)
         
 
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def items_precached(self, str_max=MAX_STR_SZ):  
         size = self._item_precached_count()  
-        strs = [_BUF_(str_max + 1) for _ in range(size)]      
-        strs_array = (_pchar_* size)(*[ _cast(s, _pchar_) for s in strs]) 
+        strs, strs_array = _str_block(size, str_max)
         
         _lib_call("TOSDB_GetPreCachedItemNames", 
                   self._name, 
@@ -448,14 +470,13 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                   str_max + 1, 
                   arg_types=(_str_, _ppchar_, _uint32_, _uint32_))
         
-        return [_cast_cstr(s) for s in strs_array]            
+        return _decode_str_block(strs, size, str_max)
          
          
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def topics_precached(self,  str_max=MAX_STR_SZ):
         size = self._topic_precached_count()
-        strs = [_BUF_(str_max + 1) for _ in range(size)]     
-        strs_array = (_pchar_* size)(*[ _cast(s, _pchar_) for s in strs])   
+        strs, strs_array = _str_block(size, str_max)
             
         _lib_call("TOSDB_GetPreCachedTopicNames", 
                   self._name, 
@@ -464,22 +485,18 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                   str_max + 1, 
                   arg_types=(_str_,  _ppchar_, _uint32_, _uint32_))               
         
-        return [_cast_cstr(s) for s in strs_array] 
+        return _decode_str_block(strs, size, str_max)
         
 
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock   
     def add_items(self, *items):              
-        fails = {}
-        for item in items:
-            err = _lib_call("TOSDB_AddItem", self._name,
-                            item.encode("ascii").upper(),
-                            arg_types=(_str_,_str_), error_check=False)
-            if err:
-                fails[item] = _lookup_error_name(err)
+        added, fails = self._add_names("TOSDB_AddItems", "TOSDB_AddItem", items)
        
-        if not self._items and not self._topics:
-            self._topics = self.topics() # in case topics came out of pre-cache            
-        self._items = self.items()          
+        if not self._topics: # in case topics came out of pre-cache
+            self._topics = _key_cache(self.topics())
+            self._items = _key_cache(self.items())
+        else:
+            self._items.update(_key_cache(added))
 
         if fails:
             raise TOSDB_CLibError("error(s) adding items", str(fails))
@@ -487,17 +504,26 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
 
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def add_topics(self, *topics):        
-        fails = {}
-        for topic in topics:
-            err = _lib_call("TOSDB_AddTopic", self._name,
-                            topic.encode("ascii").upper(),
-                            arg_types=(_str_,_str_), error_check=False)
-            if err:
-                fails[topic] = _lookup_error_name(err)
+        valid = []
+        invalid = []
+        for topic in topics: 
+            if topic.upper() in TOPICS.val_dict and topic.upper() != 'NULL_TOPIC':
+                valid.append(topic)
+            else:
+                invalid.append(topic)
+
+        added, fails = self._add_names("TOSDB_AddTopics", "TOSDB_AddTopic", valid)
+        # the bulk call silently drops invalid topics; add them one at a time 
+        # so each gets the error a single call returns (ERROR_BAD_TOPIC) 
+        single_added, single_fails = self._add_each("TOSDB_AddTopic", invalid)
+        added.extend(single_added)
+        fails.update(single_fails)
 
-        if not self._items and not self._topics:
-            self._items = self.items() # in case items came out of pre-cache            
-        self._topics = self.topics()    
+        if not self._items: # in case items came out of pre-cache
+            self._items = _key_cache(self.items())
+            self._topics = _key_cache(self.topics())
+        else:
+            self._topics.update(_key_cache(added))
         
         if fails:
             raise TOSDB_CLibError("error(s) adding topics", str(fails))
@@ -505,19 +531,14 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
        
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def remove_items(self, *items):
-        fails = {}
-        for item in items:
-            err = _lib_call("TOSDB_RemoveItem", self._name,
-                            item.encode("ascii").upper(),
-                            arg_types=(_str_,_str_), error_check=False)
-            if err:
-                fails[item] = _lookup_error_name(err)
+        removed, fails = self._remove_names("TOSDB_RemoveItem", items)
 
-        self._items = self.items()
+        # drop the name and any cached spellings of it
+        self._items = {k:v for k,v in self._items.items() if v not in removed}
 
         #jan 30 2017: if topics are sent to pre-cache
         if not self._items:
-            self._topics = self.topics()
+            self._topics = {}
                 
         if fails:
             raise TOSDB_CLibError("error(s) removing items", str(fails))
@@ -526,36 +547,79 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
 
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def remove_topics(self, *topics):
-        fails = {}
-        for topic in topics:
-            err = _lib_call("TOSDB_RemoveTopic", self._name,
-                            topic.encode("ascii").upper(),
-                            arg_types=(_str_,_str_), error_check=False)
-            if err:
-                fails[topic] = _lookup_error_name(err)
+        removed, fails = self._remove_names("TOSDB_RemoveTopic", topics)
 
-        self._topics = self.topics()
+        # drop the name and any cached spellings of it
+        self._topics = {k:v for k,v in self._topics.items() if v not in removed}
 
         #jan 30 2017: if items are sent to pre-cache
         if not self._topics:
-            self._items = self.items()
+            self._items = {}
             
         if fails:
             raise TOSDB_CLibError("error(s) removing topics", str(fails))
-          
+
+
+    def _add_names(self, bulk_func, single_func, names):
+        # add in chunks of BULK_CHUNK_SIZE with one bulk call each; if a chunk
+        # fails fall back to single calls so we can report each bad name
+        added = []
+        fails = {}
+        names = list(names)
+        for i in range(0, len(names), BULK_CHUNK_SIZE):
+            chunk = names[i:i + BULK_CHUNK_SIZE]
+            enc = [n.upper().encode("ascii") for n in chunk]
+            err = _lib_call(bulk_func, self._name, (_str_ * len(enc))(*enc), len(enc),
+                            arg_types=(_str_, _PTR_(_str_), _uint32_), 
+                            error_check=False)
+            if not err:
+                added.extend(e.decode() for e in enc)
+                continue
+            a, f = self._add_each(single_func, chunk)
+            added.extend(a)
+            fails.update(f)
+        return added, fails
+
+
+    def _add_each(self, func, names):
+        # one call per name; returns (names added, {name: error name})
+        added = []
+        fails = {}
+        for n in names:
+            e = n.upper().encode("ascii")
+            err = _lib_call(func, self._name, e, arg_types=(_str_,_str_),
+                            error_check=False)
+            if err:
+                fails[n] = _lookup_error_name(err)
+            else:
+                added.append(e.decode())
+        return added, fails
+
+
+    def _remove_names(self, func, names):
+        # no bulk remove in the C lib, but we still only touch the cache once
+        removed = set()
+        fails = {}
+        for n in names:
+            e = n.upper().encode("ascii")
+            err = _lib_call(func, self._name, e, arg_types=(_str_,_str_),
+                            error_check=False)
+            if err:
+                fails[n] = _lookup_error_name(err)
+            else:
+                removed.add(e)
+        return removed, fails
+      
 
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def get(self, item, topic, date_time=False, indx=0, check_indx=True, 
             data_str_max=STR_DATA_SZ):
          
-        item = item.upper()
-        topic = topic.upper()
-        
         if date_time and not self._date_time:
             raise TOSDB_DateTimeError("date_time not available for this block")
 
-        self._valid_item(item)
-        self._valid_topic(topic)
+        item_b = self._item_key(item)
+        topic_b = self._topic_key(topic)
         
         if indx < 0:
             indx += self._block_size
@@ -573,8 +637,8 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
             ret_str = _BUF_(data_str_max + 1)
             _lib_call("TOSDB_GetString", 
                       self._name, 
-                      item.encode("ascii"), 
-                      topic.encode("ascii"), 
+                      item_b, 
+                      topic_b, 
                       indx, 
                       ret_str, 
                       data_str_max + 1,
@@ -591,8 +655,8 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
             val = tytup[1]()
             _lib_call("TOSDB_Get"+tytup[0], 
                       self._name,
-                      item.encode("ascii"), 
-                      topic.encode("ascii"),
+                      item_b, 
+                      topic_b,
                       indx, 
                       _pointer(val),
                       _pointer(dts) if date_time else _PTR_(_DateTimeStamp)(),
@@ -609,14 +673,11 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
     def stream_snapshot(self, item, topic, date_time=False, end=-1, beg=0, 
                         smart_size=True, data_str_max=STR_DATA_SZ):
 
-        item = item.upper()
-        topic = topic.upper()
-        
         if date_time and not self._date_time:
             raise TOSDB_DateTimeError("date_time not available for this block")
         
-        self._valid_item(item)
-        self._valid_topic(topic)
+        item_b = self._item_key(item)
+        topic_b = self._topic_key(topic)
         
         if end < 0:
             end += self._block_size
@@ -643,13 +704,12 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
         tytup = _type_switch(tbits)
         
         if tytup[0] == "String":      
-            strs = [_BUF_( data_str_max +1) for _ in range(size)]              
-            strs_array = (_pchar_ * size)(*[ _cast(s, _pchar_) for s in strs]) 
+            strs, strs_array = _str_block(size, data_str_max)
 
             _lib_call("TOSDB_GetStreamSnapshotStrings", 
                       self._name,
-                      item.encode("ascii"), 
-                      topic.encode("ascii"),
+                      item_b, 
+                      topic_b,
                       strs_array, 
                       size, 
                       data_str_max + 1,                
@@ -659,18 +719,18 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                       arg_types=(_str_, _str_, _str_, _ppchar_, _uint32_, _uint32_, 
                                  _PTR_(_DateTimeStamp), _long_, _long_))   
 
+            strs = _decode_str_block(strs, size, data_str_max)
             if date_time:
-                adj_dts = [TOSDB_DateTime(x) for x in dtss]         
-                return [sd for sd in zip(map(_cast_cstr, strs_array), adj_dts)]        
+                return TOSDB_Snapshot(strs, TOSDB_DateTimeArray(dtss))
             else:        
-                return [_cast_cstr(s) for s in strs_array]
+                return strs
 
         else: 
             num_array = (tytup[1] * size)()   
             _lib_call("TOSDB_GetStreamSnapshot"+tytup[0]+"s", 
                       self._name,
-                      item.encode("ascii"), 
-                      topic.encode("ascii"),
+                      item_b, 
+                      topic_b,
                       num_array, 
                       size,
                       dtss if date_time else _PTR_(_DateTimeStamp)(),
@@ -680,8 +740,7 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                                  _PTR_(_DateTimeStamp), _long_, _long_)) 
            
             if date_time:
-                adj_dts = [TOSDB_DateTime(x) for x in dtss]
-                return [nd for nd in zip(num_array,adj_dts)]       
+                return TOSDB_Snapshot(list(num_array), TOSDB_DateTimeArray(dtss))
             else:
                 return [n for n in num_array]
 
@@ -691,14 +750,11 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                                     margin_of_safety=100, throw_if_data_lost=True,
                                     data_str_max=STR_DATA_SZ):
       
-        item = item.upper()
-        topic = topic.upper()
-        
         if date_time and not self._date_time:
             raise TOSDB_DateTimeError("date_time not available for this block")
 
-        self._valid_item(item)    
-        self._valid_topic(topic)
+        item_b = self._item_key(item)
+        topic_b = self._topic_key(topic)
         
         if beg < 0:
             beg += self._block_size   
@@ -711,8 +767,8 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
         is_dirty = _uint_()
         _lib_call("TOSDB_IsMarkerDirty", 
                   self._name,
-                  item.encode("ascii"), 
-                  topic.encode("ascii"),
+                  item_b, 
+                  topic_b,
                   _pointer(is_dirty), 
                   arg_types=(_str_, _str_, _str_, _PTR_(_uint_))) 
 
@@ -722,8 +778,8 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
         mpos = _longlong_()
         _lib_call("TOSDB_GetMarkerPosition", 
                   self._name,
-                  item.encode("ascii"), 
-                  topic.encode("ascii"),
+                  item_b, 
+                  topic_b,
                   _pointer(mpos), 
                   arg_types=(_str_, _str_, _str_, _PTR_(_longlong_)))    
         
@@ -738,13 +794,12 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
         get_size = _long_()
         
         if tytup[0] == "String":
-            strs = [ _BUF_( data_str_max +1) for _ in range(safe_sz) ]   
-            strs_array = (_pchar_ * safe_sz)(*[_cast(s,_pchar_) for s in strs]) 
+            strs, strs_array = _str_block(safe_sz, data_str_max)
 
             _lib_call("TOSDB_GetStreamSnapshotStringsFromMarker", 
                       self._name,
-                      item.encode("ascii"), 
-                      topic.encode("ascii"),
+                      item_b, 
+                      topic_b,
                       strs_array, 
                       safe_sz, 
                       data_str_max + 1,
@@ -762,18 +817,18 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                     raise TOSDB_DataError("data lost behind the 'marker'")
                 else:
                     get_size *= -1
+            strs = _decode_str_block(strs, get_size, data_str_max)
             if date_time:
-                adj_dts = [TOSDB_DateTime(x) for x in dtss[:get_size]]      
-                return [sd for sd in zip(map(_cast_cstr, strs_array[:get_size]), adj_dts)]    
+                return TOSDB_Snapshot(strs, TOSDB_DateTimeArray(dtss, 0, get_size))
             else:
-                return [_cast_cstr(s) for s in strs_array[:get_size]]
+                return strs
 
         else:
             num_array = (tytup[1] * safe_sz)()   
             _lib_call("TOSDB_GetStreamSnapshot" + tytup[0] + "sFromMarker", 
                       self._name,
-                      item.encode("ascii"), 
-                      topic.encode("ascii"),
+                      item_b, 
+                      topic_b,
                       num_array, 
                       safe_sz,
                       dtss if date_time else _PTR_(_DateTimeStamp)(),     
@@ -791,37 +846,117 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                 else:
                     get_size *= -1            
             if date_time:
-                adj_dts = [TOSDB_DateTime(x) for x in dtss[:get_size]]
-                return [nd for nd in zip(num_array[:get_size], adj_dts)]       
+                return TOSDB_Snapshot(num_array[:get_size], 
+                                      TOSDB_DateTimeArray(dtss, 0, get_size))
             else:
                 return [n for n in num_array[:get_size]]    
       
 
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def multi_snapshot(self, pairs, depth, date_time=False, 
+                       data_str_max=STR_DATA_SZ, threaded=True):
+
+        if date_time and not self._date_time:
+            raise TOSDB_DateTimeError("date_time not available for this block")
+
+        pairs = tuple(pairs)
+        keys = [(self._item_key(i), self._topic_key(t)) for i,t in pairs]
+
+        if depth <= 0 or depth > self._block_size:
+            raise TOSDB_IndexError("invalid 'depth' value")
+
+        # allocate once: one buffer per data type, shared by all the pairs of 
+        # that type (depth slots each), and one shared date-time buffer
+        tytups = [_topic_type(t) for _,t in keys]
+        slots = [] # each pair's slot in the buffer of its type
+        counts = {}
+        for tytup in tytups:
+            slots.append(counts.get(tytup[0], 0))
+            counts[tytup[0]] = slots[-1] + 1
+        bufs = {}
+        for tytup in set(tytups):
+            if tytup[0] == "String":
+                bufs[tytup[0]] = _str_block(counts[tytup[0]] * depth, data_str_max)
+            else:
+                bufs[tytup[0]] = (tytup[1] * (counts[tytup[0]] * depth))()
+        dtss = (_DateTimeStamp * (len(pairs) * depth if date_time else 0))()
+
+        def _read(n):
+            item_b, topic_b = keys[n]
+            tytup = tytups[n]
+            occ = _uint32_()
+            _lib_call("TOSDB_GetStreamOccupancy", self._name, item_b, topic_b,
+                      _pointer(occ), arg_types=(_str_, _str_, _str_, _PTR_(_uint32_)))
+            size = min(depth, occ.value)
+            if size == 0:
+                return 0
+            if date_time:
+                dts = _cast(_addressof(dtss) + n * depth * _sizeof(_DateTimeStamp),
+                            _PTR_(_DateTimeStamp))
+            else:
+                dts = _PTR_(_DateTimeStamp)()
+            off = slots[n] * depth 
+            if tytup[0] == "String":
+                strs_array = _cast(_addressof(bufs["String"][1].contents) 
+                                   + off * _sizeof(_pchar_), _ppchar_)
+                _lib_call("TOSDB_GetStreamSnapshotStrings", self._name, item_b,
+                          topic_b, strs_array, size, data_str_max + 1, 
+                          dts, size - 1, 0,
+                          arg_types=(_str_, _str_, _str_, _ppchar_, _uint32_, 
+                                     _uint32_, _PTR_(_DateTimeStamp), _long_, _long_))
+            else:
+                num_array = _cast(_addressof(bufs[tytup[0]]) 
+                                  + off * _sizeof(tytup[1]), _PTR_(tytup[1]))
+                _lib_call("TOSDB_GetStreamSnapshot"+tytup[0]+"s", self._name, 
+                          item_b, topic_b, num_array, size,
+                          dts, size - 1, 0,
+                          arg_types=(_str_, _str_, _str_, _PTR_(tytup[1]), _uint32_, 
+                                     _PTR_(_DateTimeStamp), _long_, _long_)) 
+            return size
+        ### _read() ###
+
+        # ctypes releases the GIL for the duration of each library call
+        if threaded and len(pairs) > 1:
+            sizes = list(_snapshot_pool().map(_read, range(len(pairs))))
+        else:
+            sizes = [_read(n) for n in range(len(pairs))]
+
+        if "String" in bufs:
+            bufs["String"] = _decode_str_block(bufs["String"][0], 
+                                               counts["String"] * depth, data_str_max)
+        data = []
+        date_times = [] if date_time else None
+        for n,size in enumerate(sizes):
+            off = slots[n] * depth
+            data.append(bufs[tytups[n][0]][off:off + size])
+            if date_time:
+                beg = n * depth
+                date_times.append(TOSDB_DateTimeArray(dtss, beg, beg + size))
+
+        return MultiSnapshot(pairs, data, date_times)
+
+        
     @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
     def item_frame(self, topic, date_time=False, labels=True, 
                    data_str_max=STR_DATA_SZ, label_str_max=MAX_STR_SZ):
        
-        topic = topic.upper()
-        
         if date_time and not self._date_time:
             raise TOSDB_DateTimeError("date_time not available for this block")
         
-        self._valid_topic(topic)
+        topic_b = self._topic_key(topic)
         
         size = self._item_count()
         dtss = (_DateTimeStamp * size)()  
-        labs = [_BUF_(label_str_max+1) for _ in range(size)] 
-        labs_array = (_pchar_ * size)(*[_cast(s, _pchar_) for s in labs])  
+        labs, labs_array = _str_block(size if labels else 0, label_str_max)
         tbits = type_bits(topic)
         tytup = _type_switch(tbits)
         
-        if tytup[0] is "String":      
-            strs = [_BUF_( data_str_max + 1) for _ in range(size)]
-            strs_array = (_pchar_ * size)(*[_cast(s, _pchar_) for s in strs]) 
+        if tytup[0] == "String":      
+            strs, strs_array = _str_block(size, data_str_max)
 
             _lib_call("TOSDB_GetItemFrameStrings", 
                       self._name, 
-                      topic.encode("ascii"),
+                      topic_b,
                       strs_array, 
                       size, 
                       data_str_max + 1,
@@ -831,26 +966,27 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                       arg_types=(_str_, _str_, _ppchar_, _uint32_, _uint32_,
                                  _ppchar_, _uint32_, _PTR_(_DateTimeStamp)))       
 
+            strs = _decode_str_block(strs, size, data_str_max)
             if labels:
-                l_map = map(_cast_cstr, labs_array)
-                _nt_ = _gen_namedtuple(_str_clean(topic)[0], _str_clean(*l_map)) 
+                l_map = _decode_str_block(labs, size, label_str_max)
+                _nt_ = _gen_namedtuple(_str_clean(topic_b.decode())[0], _str_clean(*l_map)) 
                 if date_time:
-                    adj_dts = [TOSDB_DateTime(x) for x in dtss]
-                    return _nt_(*zip(map(_cast_cstr, strs_array),adj_dts))
+                    adj_dts = list(TOSDB_DateTimeArray(dtss))
+                    return _nt_(*zip(strs,adj_dts))
                 else:
-                    return _nt_(*map(_cast_cstr, strs_array))    
+                    return _nt_(*strs)    
             else:
                 if date_time:
-                    adj_dts = [TOSDB_DateTime(x) for x in dtss]
-                    return list(zip(map(_cast_cstr, strs_array),adj_dts))
+                    adj_dts = list(TOSDB_DateTimeArray(dtss))
+                    return list(zip(strs,adj_dts))
                 else:
-                    return list(map(_cast_cstr, strs_array))  
+                    return strs  
          
         else: 
             num_array = (tytup[1] * size)()   
             _lib_call("TOSDB_GetItemFrame"+tytup[0]+"s", 
                       self._name, 
-                      topic.encode("ascii"), 
+                      topic_b, 
                       num_array, 
                       size,
                       labs_array if labels else _ppchar_(), 
@@ -860,16 +996,16 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                                  _uint32_, _PTR_(_DateTimeStamp)))    
         
             if labels:   
-                l_map = map(_cast_cstr, labs_array)
-                _nt_ = _gen_namedtuple(_str_clean(topic)[0], _str_clean(*l_map)) 
+                l_map = _decode_str_block(labs, size, label_str_max)
+                _nt_ = _gen_namedtuple(_str_clean(topic_b.decode())[0], _str_clean(*l_map)) 
                 if date_time:
-                    adj_dts = [TOSDB_DateTime(x) for x in dtss]
+                    adj_dts = list(TOSDB_DateTimeArray(dtss))
                     return _nt_(*zip(num_array,adj_dts))
                 else:
                     return _nt_(*num_array)   
             else:
                 if date_time:
-                    adj_dts = [TOSDB_DateTime(x) for x in dtss]
+                    adj_dts = list(TOSDB_DateTimeArray(dtss))
                     return list(zip(num_array,adj_dts))
                 else:
                     return [n for n in num_array]    
@@ -879,23 +1015,19 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
     def topic_frame(self, item, date_time=False, labels=True, 
                     data_str_max=STR_DATA_SZ, label_str_max=MAX_STR_SZ):
        
-        item = item.upper()
-        
         if date_time and not self._date_time:
             raise TOSDB_DateTimeError("date_time not available for this block")
         
-        self._valid_item( item)
+        item_b = self._item_key(item)
         
         size = self._topic_count()
         dtss = (_DateTimeStamp * size)()          
-        labs = [_BUF_(label_str_max + 1) for _ in range(size)] 
-        strs = [_BUF_(data_str_max + 1) for _ in range(size)]    
-        labs_array = (_pchar_ * size)(*[_cast(s, _pchar_) for s in labs]) 
-        strs_array = (_pchar_ * size)(*[_cast(s, _pchar_) for s in strs])
+        labs, labs_array = _str_block(size if labels else 0, label_str_max)
+        strs, strs_array = _str_block(size, data_str_max)
             
         _lib_call("TOSDB_GetTopicFrameStrings", 
                   self._name, 
-                  item.encode("ascii"),
+                  item_b,
                   strs_array, 
                   size, 
                   data_str_max + 1,                                            
@@ -905,20 +1037,21 @@ class TOSDB_DataBlock(_TOSDB_DataBlock):
                   arg_types=(_str_, _str_, _ppchar_, _uint32_, _uint32_,
                              _ppchar_, _uint32_, _PTR_(_DateTimeStamp)))    
 
+        strs = _decode_str_block(strs, size, data_str_max)
         if labels:
-            l_map = map(_cast_cstr, labs_array)
-            _nt_ = _gen_namedtuple(_str_clean(item)[0], _str_clean(*l_map))        
+            l_map = _decode_str_block(labs, size, label_str_max)
+            _nt_ = _gen_namedtuple(_str_clean(item_b.decode())[0], _str_clean(*l_map))        
             if date_time:
-                adj_dts = [TOSDB_DateTime(x) for x in dtss]
-                return _nt_(*zip(map(_cast_cstr, strs_array), adj_dts))                
+                adj_dts = list(TOSDB_DateTimeArray(dtss))
+                return _nt_(*zip(strs, adj_dts))                
             else:
-                return _nt_(*map(_cast_cstr, strs_array))            
+                return _nt_(*strs)            
         else:
             if date_time:
-                adj_dts = [TOSDB_DateTime(x) for x in dtss]
-                return list(zip(map(_cast_cstr, strs_array), adj_dts))         
+                adj_dts = list(TOSDB_DateTimeArray(dtss))
+                return list(zip(strs, adj_dts))         
             else:
-                return list(map(_cast_cstr, strs_array))
+                return strs
 
 
     def total_frame(self, date_time=False, labels=True, data_str_max=STR_DATA_SZ, 
@@ -982,6 +1115,47 @@ def _lookup_error_name(e):
         return '***unrecognized error code***'    
 
 
+# topic types don't change; avoid a library call per lookup 
+def _topic_type(topic_b):
+    try:
+        return _type_cache[topic_b]
+    except KeyError:
+        tytup = _type_switch(type_bits(topic_b.decode()))
+        _type_cache[topic_b] = tytup
+        return tytup
+
+
+# shared (lazily created) worker threads for multi_snapshot 
+def _snapshot_pool():
+    global _snapshot_pool_obj
+    if _snapshot_pool_obj is None:
+        _snapshot_pool_obj = _ThreadPoolExecutor(MULTI_SNAPSHOT_THREADS)
+    return _snapshot_pool_obj
+
+
+# one contiguous count x (str_max + 1) buffer and a char* array into it, 
+# instead of 'count' separate string buffers 
+def _str_block(count, str_max):
+    stride = str_max + 1
+    buf = _BUF_(count * stride)
+    base = _addressof(buf)
+    ptrs = (_pvoid_ * count)(*range(base, base + count * stride, stride))
+    return buf, _cast(ptrs, _ppchar_)
+
+
+# decode the first 'count' (null-terminated) strings of a _str_block buffer
+def _decode_str_block(buf, count, str_max):
+    stride = str_max + 1
+    raw = buf.raw
+    return [raw[i:i + stride].split(b'\0', 1)[0].decode() 
+            for i in range(0, count * stride, stride)]
+
+
+# map each name to its encoded form for the item/topic key caches
+def _key_cache(names):
+    return {n : n.encode("ascii") for n in names}
+
+
 # create a custom namedtuple with an i.d tag for special pickling
 def _gen_namedtuple(name, attrs):
     nt = _namedtuple(name, attrs)
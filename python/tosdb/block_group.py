@@ -0,0 +1,499 @@
+# Copyright (C) 2014 Jonathon Ogden     < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""block_group.py:  one DataBlock interface over many underlying blocks.
+
+BlockGroup:      spreads its items across as many blocks (TOSDB_DataBlock or
+                 VTOSDB_DataBlock) as needed to keep each under max_items;
+                 item reads go to the block that owns the item, frames are
+                 read from every block in parallel and merged, and blocks
+                 are created/dropped/merged as items are added/removed
+"""
+
+import tosdb
+
+from ._common import _TOSDB_DataBlock, MultiSnapshot, NTUP_TAG_ATTR, \
+                     TOSDB_ValueError, TOSDB_Error
+from ._tosdb import DEF_TIMEOUT, STR_DATA_SZ, MAX_STR_SZ
+from .doxtend import doxtend as _doxtend
+
+from collections import namedtuple as _namedtuple
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from threading import RLock as _RLock
+from sys import stderr as _stderr
+
+DEF_MAX_ITEMS = 250
+DEF_WORKERS = 4
+
+
+class BlockGroup(_TOSDB_DataBlock):
+    """ A DataBlock made of many blocks
+
+    Every block has all the group's topics; each item lives in one block.
+    Items are added to the least loaded block with room (a new block is
+    created when all are full, if block_limits allows it). When items are 
+    removed, empty blocks are closed, and a block that falls below a quarter
+    of max_items has its items moved into the others, if they have room,
+    and is closed (unless merge_small=False): a moved item starts over in 
+    its new block - its history is lost and anything holding the old block
+    (e.g a BarAggregator subscribed to block_of(item), rather than to the 
+    group) stops getting its data - so on_move(items, old_block, new_block)
+    is called for each move to let consumers re-subscribe.
+
+    Frame calls (item_frame, total_frame) and multi_snapshot read the blocks
+    in parallel and merge the results in item order; the other calls go to
+    the block owning the item.
+
+    size: how much historical data to save
+    date_time: should block include date-time stamp with each data-point?
+    timeout: how long to wait for responses from TOS-DDE server (milliseconds)
+    max_items: maximum number of items in each block
+    block_factory: callable(size, date_time, timeout) that creates a block;
+                   defaults to TOSDB_DataBlock (e.g use
+                   functools.partial(VTOSDB_DataBlock, address, password)
+                   for virtual blocks)
+    workers: number of blocks read at once
+    merge_small: move the items of blocks under a quarter full into others
+    on_move: callable(items, old_block, new_block) called (under the group's
+             lock) after items are moved by merge_small
+    block_limits: (get_count, get_limit) callables for the blocks the factory
+                  creates, checked before creating any: add_items raises 
+                  TOSDB_Error (adding nothing) if the blocks it needs would 
+                  pass the limit; defaults to (get_block_count, 
+                  get_block_limit) with the default factory, e.g pass 
+                  (vget_block_count, vget_block_limit) for virtual blocks
+    """
+    def __init__(self, size=1000, date_time=False, timeout=DEF_TIMEOUT,
+                 max_items=DEF_MAX_ITEMS, block_factory=None, workers=DEF_WORKERS,
+                 merge_small=True, on_move=None, block_limits=None):
+        self._pool = None # (before anything can raise: __del__ checks it)
+        if max_items < 1:
+            raise TOSDB_ValueError("max_items must be >= 1")
+        if on_move is not None and not callable(on_move):
+            raise TypeError("on_move must be callable")
+        self._size = size
+        self._date_time = date_time
+        self._timeout = timeout
+        self._max_items = int(max_items)
+        self._factory = block_factory if block_factory is not None \
+                        else lambda *args: tosdb.TOSDB_DataBlock(*args)
+        if block_limits is None and block_factory is None:
+            block_limits = (lambda: tosdb.get_block_count(), 
+                            lambda: tosdb.get_block_limit())
+        self._limits = block_limits
+        self._workers = max(int(workers), 1)
+        self._merge = merge_small
+        self._on_move = on_move
+        self._lock = _RLock()
+        self._blocks = [] # [block, [item,..]] in creation order
+        self._owner = {} # item -> its [block, [item,..]]
+        self._topics = [] # topics every block gets
+
+
+    def __str__(self):
+        return ''.join(str(b) for b,_ in self._snapshot_blocks())
+
+
+    def __del__(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+    def close(self):
+        """ Closes every block (now, rather than when they're collected) """
+        with self._lock:
+            blocks, self._blocks = self._blocks, []
+            self._owner.clear()
+            for b,_ in blocks:
+                self._close_block(b)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def info(self):
+        return {"Name": [b.info()["Name"] for b,_ in self._snapshot_blocks()],
+                "Items": self.items(),
+                "Topics": self.topics(),
+                "Size": self._size,
+                "DateTime": "Enabled" if self._date_time else "Disabled",
+                "Timeout": self._timeout,
+                "Blocks": len(self._blocks)}
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def get_block_size(self):
+        blocks = self._snapshot_blocks()
+        return blocks[0][0].get_block_size() if blocks else self._size
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def set_block_size(self, sz):
+        with self._lock:
+            for b,_ in self._blocks:
+                b.set_block_size(sz)
+            self._size = sz
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def stream_occupancy(self, item, topic):
+        return self._block(item).stream_occupancy(item, topic)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def items(self, str_max=MAX_STR_SZ):
+        return self._merge_lists(self._fan_out(lambda b: b.items(str_max)))
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def topics(self, str_max=MAX_STR_SZ):
+        blocks = self._snapshot_blocks()
+        return blocks[0][0].topics(str_max) if blocks else []
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def items_precached(self, str_max=MAX_STR_SZ):
+        return self._merge_lists(self._fan_out(lambda b: b.items_precached(str_max)))
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def topics_precached(self, str_max=MAX_STR_SZ):
+        blocks = self._snapshot_blocks()
+        # with no blocks yet, topics wait here for the first one
+        return blocks[0][0].topics_precached(str_max) if blocks \
+               else list(self._topics)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def add_items(self, *items):
+        errs = []
+        with self._lock:
+            new = []
+            for i in items:
+                i = i.upper()
+                if i not in self._owner and i not in new:
+                    new.append(i)
+            # fill the least loaded blocks first, creating blocks as needed
+            room = sum(self._max_items - len(e[1]) for e in self._blocks)
+            self._check_block_limit(-(-(len(new) - room) // self._max_items))
+            while new:
+                ent = min((e for e in self._blocks if len(e[1]) < self._max_items),
+                          key=lambda e: len(e[1]), default=None)
+                if ent is None:
+                    ent = self._new_block()
+                n = self._max_items - len(ent[1])
+                chunk, new = new[:n], new[n:]
+                failed, err = self._add_to(ent, chunk)
+                if failed:
+                    errs.append(err)
+            self._drop_empty()
+        if errs:
+            raise TOSDB_Error("error(s) adding items", *errs)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def add_topics(self, *topics):
+        with self._lock:
+            topics = [t.upper() for t in topics if t.upper() not in self._topics]
+            if not topics:
+                return
+            errs = []
+            for b,_ in self._blocks:
+                try:
+                    b.add_topics(*topics)
+                except TOSDB_Error as e:
+                    errs.append(e)
+            # bad topics are rejected by every block; keep the rest
+            good = set(self._blocks[0][0].topics() +
+                       self._blocks[0][0].topics_precached()) if self._blocks \
+                   else set(t for t in topics if t in tosdb.TOPICS.val_dict
+                                                  and t != 'NULL_TOPIC')
+            self._topics.extend(t for t in topics if t in good)
+        if errs:
+            raise errs[0]
+        if len(good) < len(topics):
+            raise TOSDB_Error("error(s) adding topics",
+                              str([t for t in topics if t not in good]))
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def remove_items(self, *items):
+        missing = {}
+        errs = []
+        with self._lock:
+            by_block = {}
+            for i in items:
+                ent = self._owner.get(i.upper())
+                if ent is None:
+                    missing[i] = "not in group"
+                else:
+                    by_block.setdefault(id(ent), (ent, []))[1].append(i.upper())
+            for ent, names in by_block.values():
+                try:
+                    ent[0].remove_items(*names)
+                except TOSDB_Error as e:
+                    errs.append(_error_text(e))
+                # (re-read in case some failed)
+                left = set(ent[0].items() + ent[0].items_precached())
+                for n in names:
+                    if n not in left and n in ent[1]:
+                        ent[1].remove(n)
+                        del self._owner[n]
+            self._drop_empty()
+            if self._merge:
+                self._merge_small()
+        if missing:
+            errs.insert(0, str(missing))
+        if errs:
+            raise TOSDB_Error("error(s) removing items", *errs)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def remove_topics(self, *topics):
+        with self._lock:
+            topics = [t.upper() for t in topics]
+            for b,_ in self._blocks:
+                b.remove_topics(*topics)
+            self._topics = [t for t in self._topics if t not in topics]
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def get(self, item, *args, **kwargs):
+        return self._block(item).get(item, *args, **kwargs)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def stream_snapshot(self, item, *args, **kwargs):
+        return self._block(item).stream_snapshot(item, *args, **kwargs)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def stream_snapshot_from_marker(self, item, *args, **kwargs):
+        return self._block(item).stream_snapshot_from_marker(item, *args, **kwargs)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def multi_snapshot(self, pairs, depth, date_time=False,
+                       data_str_max=STR_DATA_SZ, threaded=True):
+        pairs = tuple(pairs)
+        # one multi_snapshot per block, with that block's pairs
+        parts = {}
+        for n,(item,topic) in enumerate(pairs):
+            b = self._block(item)
+            parts.setdefault(id(b), (b, []))[1].append(n)
+        def _snap(part):
+            b, idxs = part
+            return b.multi_snapshot([pairs[n] for n in idxs], depth, date_time,
+                                    data_str_max, threaded)
+        parts = list(parts.values())
+        snaps = self._map(_snap, parts) if threaded else [_snap(p) for p in parts]
+        data = [None] * len(pairs)
+        date_times = [None] * len(pairs) if date_time else None
+        for (_,idxs), snap in zip(parts, snaps):
+            for k,n in enumerate(idxs):
+                data[n] = snap.data[k]
+                if date_time:
+                    date_times[n] = snap.date_times[k]
+        return MultiSnapshot(pairs, data, date_times)
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def item_frame(self, topic, date_time=False, labels=True,
+                   data_str_max=STR_DATA_SZ, label_str_max=MAX_STR_SZ):
+        frames = self._fan_out(lambda b: b.item_frame(topic, date_time, labels,
+                                                      data_str_max, label_str_max))
+        if not labels:
+            return self._merge_lists(frames)
+        if not frames:
+            return _gen_namedtuple(topic.upper(), [])()
+        nt = type(frames[0])
+        fields = [f for fr in frames for f in type(fr)._fields]
+        return _gen_namedtuple(nt.__name__, fields)(*[v for fr in frames for v in fr])
+
+
+    @_doxtend(_TOSDB_DataBlock) # __doc__ from ABC _TOSDB_DataBlock
+    def topic_frame(self, item, *args, **kwargs):
+        return self._block(item).topic_frame(item, *args, **kwargs)
+
+
+    def total_frame(self, date_time=False, labels=True, data_str_max=STR_DATA_SZ,
+                    label_str_max=MAX_STR_SZ):
+        """ Return a matrix of the most recent values (of every block):
+
+        date_time: (True/False) attempt to retrieve a TOSDB_DateTime object
+        labels: (True/False) pull the item and topic labels with the values
+        data_str_max: the maximum length of string data returned
+        label_str_max: the maximum length of label strings returned
+
+        if labels and date_time are True: returns-> dict of namedtuple of 2tuple
+        if labels is True: returns -> dict of namedtuple
+        if date_time is True: returns -> list of 2tuple
+        else returns-> list
+        """
+        frames = self._fan_out(lambda b: b.total_frame(date_time, labels,
+                                                       data_str_max, label_str_max))
+        if not labels:
+            return self._merge_lists(frames)
+        merged = {}
+        for fr in frames:
+            merged.update(fr)
+        return merged
+
+
+    @property
+    def blocks(self):
+        """ the underlying blocks """
+        return [b for b,_ in self._snapshot_blocks()]
+
+
+    def block_of(self, item):
+        """ the block that owns item """
+        return self._block(item)
+
+
+    def _block(self, item):
+        try:
+            return self._owner[item.upper()][0]
+        except KeyError:
+            raise TOSDB_ValueError("item not in group: " + str(item))
+
+
+    def _snapshot_blocks(self):
+        with self._lock:
+            return list(self._blocks)
+
+
+    def _fan_out(self, func):
+        # func(block) for every block, in parallel, in block order
+        return self._map(func, [b for b,_ in self._snapshot_blocks()])
+
+
+    def _map(self, func, args):
+        if len(args) < 2 or self._workers < 2:
+            return [func(a) for a in args]
+        with self._lock:
+            if self._pool is None:
+                self._pool = _ThreadPoolExecutor(self._workers)
+        return list(self._pool.map(func, args))
+
+
+    @staticmethod
+    def _merge_lists(lists):
+        return [x for l in lists for x in l]
+
+
+    def _check_block_limit(self, n):
+        # raise if creating n more blocks would pass the limit
+        if n <= 0 or self._limits is None:
+            return
+        count, limit = self._limits[0](), self._limits[1]()
+        if count + n > limit:
+            raise TOSDB_Error("block limit reached", str(n) + " more block(s) "
+                              "needed, " + str(count) + " of " + str(limit) + 
+                              " in use")
+
+
+    def _new_block(self):
+        self._check_block_limit(1)
+        b = self._factory(self._size, self._date_time, self._timeout)
+        if self._topics:
+            b.add_topics(*self._topics)
+        ent = [b, []]
+        self._blocks.append(ent)
+        return ent
+
+
+    def _add_to(self, ent, names):
+        # add names to a block; returns (names that failed, the block's error)
+        err = None
+        try:
+            ent[0].add_items(*names)
+        except TOSDB_Error as e:
+            err = _error_text(e)
+        have = set(ent[0].items() + ent[0].items_precached())
+        failed = []
+        for n in names:
+            if n in have:
+                ent[1].append(n)
+                self._owner[n] = ent
+            else:
+                failed.append(n)
+        return failed, err
+
+
+    def _drop_empty(self):
+        for b,names in self._blocks:
+            if not names:
+                self._close_block(b)
+        self._blocks = [e for e in self._blocks if e[1]]
+
+
+    @staticmethod
+    def _close_block(block):
+        # (blocks from a custom factory may not have close())
+        close = getattr(block, 'close', None)
+        if close is None:
+            return
+        try:
+            close()
+        except Exception as e:
+            print("- tosdb.block_group.BlockGroup._close_block ::", str(e), 
+                  file=_stderr)
+
+
+    def _merge_small(self):
+        # move the items of a block that's under a quarter full into the
+        # others (least loaded first) if they have room for all of them
+        while len(self._blocks) > 1:
+            ent = min(self._blocks, key=lambda e: len(e[1]))
+            room = sum(self._max_items - len(e[1]) for e in self._blocks
+                       if e is not ent)
+            if len(ent[1]) * 4 >= self._max_items or len(ent[1]) > room:
+                return
+            self._blocks.remove(ent)
+            names, failed, moves = list(ent[1]), [], []
+            while names:
+                dest = min(self._blocks, key=lambda e: len(e[1]))
+                n = self._max_items - len(dest[1])
+                chunk, names = names[:n], names[n:]
+                f = self._add_to(dest, chunk)[0]
+                failed.extend(f)
+                moves.append(([i for i in chunk if i not in f], dest[0]))
+            for moved, dest in moves:
+                if moved and self._on_move is not None:
+                    try:
+                        self._on_move(moved, ent[0], dest)
+                    except Exception as e:
+                        print("- tosdb.block_group.BlockGroup._merge_small ::", 
+                              str(e), file=_stderr)
+            if failed: # these stay where they were
+                moved = [n for n in ent[1] if n not in failed]
+                if moved:
+                    ent[0].remove_items(*moved)
+                ent[1] = failed
+                self._blocks.append(ent)
+                return
+            self._close_block(ent[0])
+
+
+def _error_text(e):
+    # the details of a block's TOSDB_Error (its last arg)
+    return e.args[-1] if len(e.args) > 1 else str(e)
+
+
+def _gen_namedtuple(name, attrs):
+    # with the i.d tag for special pickling (see _win._gen_namedtuple)
+    nt = _namedtuple(name, attrs)
+    setattr(nt, NTUP_TAG_ATTR, True)
+    return nt
@@ -15,12 +15,19 @@
 #   <http://www.gnu.org/licenses/>.
 
 import tosdb
-from tosdb.intervalize import TimeInterval as _TI
+from tosdb.intervalize import TimeInterval as _TI, BarAggregator as _BarAggregator, \
+                              AsyncFileSink as _AsyncFileSink, \
+                              ADVANCE_CLOCK as _ADVANCE_CLOCK, \
+                              ADVANCE_TICKS as _ADVANCE_TICKS, \
+                              GRACE_SECONDS as _GRACE_SECONDS
 from .daemon import Daemon as _Daemon
+from .symbol_watch import SymbolWatcher as _SymbolWatcher, \
+                          WATCH_SECONDS as _WATCH_SECONDS
 
 from argparse import ArgumentParser as _ArgumentParser
-from time import localtime as _localtime, strftime as _strftime, sleep as _sleep
-from os.path import realpath as _path
+from time import localtime as _localtime, strftime as _strftime
+from signal import signal as _signal, SIGTERM as _SIGTERM, SIGHUP as _SIGHUP
+from os.path import realpath as _path, exists as _exists
 from sys import stderr as _stderr
 
 _val_type = ''
@@ -28,18 +35,32 @@ _val_type = ''
 CLS_BASE = 'GetOnTimeInterval_'
 AINIT_TIMEOUT = 5000
 BLOCK_SIZE = 1000
+ITEMS_PER_BLOCK = 250 # when the number of blocks isn't given
+DEF_WORKERS = 4
+MAX_OPEN_FILES = 256
 
     
 class MyDaemon(_Daemon):
     def __init__(self, addr, dll_root, out_dir, pid_file, error_file, 
-                 intrvl, symbols):
+                 intrvl, symbols, nblocks=0, workers=DEF_WORKERS, 
+                 max_files=MAX_OPEN_FILES, symbols_file=None, 
+                 watch_seconds=_WATCH_SECONDS, advance_by=_ADVANCE_CLOCK,
+                 grace_seconds=_GRACE_SECONDS):
         _Daemon.__init__(self, pid_file, stderr = error_file)
         self._addr = addr
         self._dll_root = dll_root
         self._out_dir = _path(out_dir)
         self._intrvl = intrvl
         self._symbols = symbols
-        self._iobjs = list()
+        self._nblocks = nblocks
+        self._workers = workers
+        self._max_files = max_files
+        self._symbols_file = symbols_file
+        self._watch_seconds = watch_seconds
+        self._advance_by = advance_by
+        self._grace = grace_seconds
+        self._iobjs = dict() # symbol -> GetOnTimeInterval object
+        self._blocks = list() # (block, [symbol,..])
 
 
     def run(self):  
@@ -47,35 +68,120 @@ class MyDaemon(_Daemon):
         tosdb.admin_init(self._addr, AINIT_TIMEOUT)   
         tosdb.vinit(root=self._dll_root)
 
-        # create block
-        blk = tosdb.VTOSDB_DataBlock(self._addr, BLOCK_SIZE, date_time=True)
-        blk.add_items(*(self._symbols))
+        watcher = None
+        if self._symbols_file:
+            # reload the symbols when the file changes or on SIGHUP
+            watcher = _SymbolWatcher(self._symbols_file, self._reload, 
+                                     self._watch_seconds, self._symbols)
+            self._symbols = watcher.symbols
+
+        # shard the symbols across blocks (each its own connection) so no block 
+        # gets too big and the shards can be drained in parallel
+        shards = _shard(self._symbols, self._nblocks or 
+                        -(-len(self._symbols) // ITEMS_PER_BLOCK))
+        # (the most symbols a block gets when some are added later)
+        self._block_max = max([ITEMS_PER_BLOCK] + [len(s) for s in shards])
+        for shard in shards:
+            self._new_block(shard)
+     
+        # generate filename             
+        self._dprfx = _strftime("%Y%m%d", _localtime())
+        self._isec = int(self._intrvl * 60)  
+        # one thread (and a pool of workers) drains every symbol's stream, 
+        # waking when bars end (+ grace) to write them
+        self._agg = _BarAggregator(self._isec/10, self._workers, self._grace,
+                                   self._advance_by)
+        # and one thread does all the writing (with a bounded number of open files)
+        self._sink = _AsyncFileSink(max_open_files=self._max_files)
+        for blk, shard in self._blocks:
+            for s in shard:
+                self._start_symbol(blk, s)
+
+        # SIGTERM (Daemon.stop) ends the aggregator so the files get closed
+        _signal(_SIGTERM, lambda signum, frame: self._agg.stop())
+        if watcher:
+            _signal(_SIGHUP, lambda signum, frame: watcher.reload())
+            watcher.start()
+        self._agg.start()
+        self._agg.join()
+        if watcher:
+            watcher.stop()
+        for iobj in self._iobjs.values():
+            iobj.stop()
+        self._sink.close()
+
+
+    def _reload(self, added, removed):
+        # stop/remove only the symbols that went away, add/start only the new
+        print("reload symbols: +" + str(added) + " -" + str(removed), file=_stderr)
+        for s in removed:
+            iobj = self._iobjs.pop(s, None)
+            if iobj:
+                iobj.stop()
+        for blk, shard in self._blocks:
+            gone = [s for s in shard if s in removed]
+            if gone:
+                shard[:] = [s for s in shard if s not in gone]
+                try:
+                    blk.remove_items(*gone)
+                except tosdb.TOSDB_Error as e:
+                    print(repr(e), file=_stderr)
+        while added:
+            # least loaded block with room, or a new one
+            blk, shard = min(self._blocks, key=lambda b: len(b[1]), 
+                             default=(None, None))
+            room = self._block_max - len(shard) if shard is not None else 0
+            if room <= 0:
+                blk, shard = self._new_block([])
+                room = self._block_max
+            chunk, added = added[:room], added[room:]
+            try:
+                blk.add_items(*chunk)
+            except tosdb.TOSDB_Error as e: # (bad symbols) start the rest
+                print(repr(e), file=_stderr)
+                have = blk.items() + blk.items_precached()
+                chunk = [s for s in chunk if s.upper() in have]
+            shard.extend(chunk)
+            for s in chunk:
+                self._start_symbol(blk, s)
+
+
+    def _new_block(self, shard):
+        limit = tosdb.vget_block_limit()
+        if len(self._blocks) >= limit:
+            raise ValueError("more blocks needed, block limit is " + str(limit))
+        blk = tosdb.VTOSDB_DataBlock(self._addr, size=BLOCK_SIZE, date_time=True)
+        if shard:
+            blk.add_items(*shard)
         blk.add_topics('last')
         if args.vol:
             blk.add_topics('volume')
-     
-        # generate filename             
-        dprfx = _strftime("%Y%m%d", _localtime())
-        isec = int(self._intrvl * 60)  
-        for s in self._symbols:
-            #
-            # create GetOnTimeInterval object for each symbol
-            # 
-            p = self._out_dir + '/' + dprfx + '_' \
-                + s.replace('/','-S-').replace('$','-D-').replace('.','-P-') \
-                +'_' + _val_type + '_' + str(self._intrvl) + 'min.tosdb'           
-            iobj = _Goti.send_to_file(blk, s, p, _TI.vals[isec], isec/10)
-            print(repr(iobj), file=_stderr)
-            self._iobjs.append(iobj)
-
-        for i in self._iobjs:
-            if i:
-                i.join()
-
-        while(True): # why??
-            _sleep(10)
+        self._blocks.append((blk, shard))
+        return (blk, shard)
+
+
+    def _start_symbol(self, blk, s):
+        #
+        # create GetOnTimeInterval object for each symbol
+        # 
+        p = self._out_dir + '/' + self._dprfx + '_' \
+            + s.replace('/','-S-').replace('$','-D-').replace('.','-P-') \
+            +'_' + _val_type + '_' + str(self._intrvl) + 'min'
+        if _exists(p + '.tosdb'): # (re-added today) don't overwrite it
+            p += _strftime("_%H%M%S", _localtime())
+        iobj = _Goti.send_to_file(blk, s, p + '.tosdb', self._isec, self._isec/10, 
+                                  aggregator=self._agg, sink=self._sink)
+        print(repr(iobj), file=_stderr)
+        if iobj:
+            self._iobjs[s] = iobj
       
 
+def _shard(symbols, n):
+    # n (or fewer) round-robin shards of symbols
+    n = max(min(int(n), len(symbols)), 1)
+    return [s for s in (symbols[i::n] for i in range(n)) if s]
+
+
 if __name__ == '__main__':
     parser = _ArgumentParser() 
     parser.add_argument('addr', type=str, 
@@ -86,12 +192,31 @@ if __name__ == '__main__':
     parser.add_argument('pidfile', type=str, help = 'path of pid file')
     parser.add_argument('errorfile', type=str, help = 'path of error file')
     parser.add_argument('intrvl', type=int, 
-                        choices=tuple(map( lambda x: int(x/60),
-                                           sorted(_TI.val_dict.keys()) )),
+                        choices=tuple(int(x/60) for x in sorted(_TI.val_dict.keys())
+                                      if x % 60 == 0),
                         help="interval size(minutes)" )
     parser.add_argument('--ohlc', action="store_true", 
                         help="use open/high/low/close instead of close")
     parser.add_argument('--vol', action="store_true", help="use volume")
+    parser.add_argument('--blocks', type=int, default=0,
+                        help="number of blocks to shard the symbols across "
+                             "(default: one per " + str(ITEMS_PER_BLOCK) + " symbols)")
+    parser.add_argument('--workers', type=int, default=DEF_WORKERS,
+                        help="number of blocks drained at once")
+    parser.add_argument('--max-files', type=int, default=MAX_OPEN_FILES,
+                        help="maximum number of output files kept open")
+    parser.add_argument('--symbols-file', type=str, default=None,
+                        help="file of more symbols to pull; reloaded (only the "
+                             "changes applied) when modified or on SIGHUP")
+    parser.add_argument('--watch-seconds', type=float, default=_WATCH_SECONDS,
+                        help="how often to check the symbols file (0 for SIGHUP only)")
+    parser.add_argument('--advance-by', choices=(_ADVANCE_CLOCK, _ADVANCE_TICKS),
+                        default=_ADVANCE_CLOCK,
+                        help="write a bar when its interval ends by the clock "
+                             "(default) or when the next tick arrives")
+    parser.add_argument('--grace-seconds', type=float, default=_GRACE_SECONDS,
+                        help="how long after its interval ends a bar is written "
+                             "(for its last ticks to arrive)")
     parser.add_argument('vars', nargs='*', help="symbols to pull")
     args = parser.parse_args()
 
@@ -107,7 +232,9 @@ if __name__ == '__main__':
     exec(exc_cmd)  
 
     MyDaemon(addr, args.dllroot, args.outdir, args.pidfile, args.errorfile,
-             args.intrvl, args.vars).start()
+             args.intrvl, args.vars, args.blocks, args.workers, 
+             args.max_files, args.symbols_file, args.watch_seconds, 
+             args.advance_by, args.grace_seconds).start()
 
 
 
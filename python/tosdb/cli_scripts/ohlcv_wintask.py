@@ -15,18 +15,35 @@
 #   <http://www.gnu.org/licenses/>.
 
 import tosdb
-from tosdb.intervalize import TimeInterval as _TI
+from tosdb.intervalize import TimeInterval as _TI, BarAggregator as _BarAggregator, \
+                              AsyncFileSink as _AsyncFileSink, \
+                              ADVANCE_CLOCK as _ADVANCE_CLOCK, \
+                              ADVANCE_TICKS as _ADVANCE_TICKS, \
+                              GRACE_SECONDS as _GRACE_SECONDS
+from tosdb.cli_scripts.symbol_watch import SymbolWatcher as _SymbolWatcher, \
+                                           WATCH_SECONDS as _WATCH_SECONDS
 
 from argparse import ArgumentParser as _ArgumentParser
-from time import localtime as _localtime, strftime as _strftime, sleep as _sleep
-from os.path import realpath as _path
+from time import localtime as _localtime, strftime as _strftime
+from threading import Event as _Event
+from signal import signal as _signal, SIGINT as _SIGINT, SIGTERM as _SIGTERM
+from os.path import realpath as _path, exists as _exists
 from sys import stderr as _stderr
 
 CLS_BASE = 'GetOnTimeInterval_'
 BLOCK_SIZE = 1000
 
 
-def spawn(dllroot,outdir,intrvl,val_type,*symbols):   
+def spawn(dllroot,outdir,intrvl,val_type,*symbols,symbols_file=None,
+          watch_seconds=_WATCH_SECONDS,advance_by=_ADVANCE_CLOCK,
+          grace_seconds=_GRACE_SECONDS,stop_event=None):   
+    """ Starts writing bars for symbols (and those of symbols_file)
+
+    With stop_event, runs until it's set, then stops every object, writes 
+    what's left and closes the files; without, returns right away (the 
+    threads keep running). Returns the GetOnTimeInterval objects (kept up to
+    date as symbols are reloaded).
+    """
     if val_type not in ['OHLCV','OHLC','CV','C']:
         raise ValueError("invalid val_type (OHLCV,OHLC,CV or C)")
 
@@ -34,10 +51,18 @@ def spawn(dllroot,outdir,intrvl,val_type,*symbols):
     exec(exc_cmd, globals())
     
     tosdb.init(root=dllroot)
+
+    watcher = None
+    if symbols_file:
+        # reload the symbols (only applying the changes) when the file changes
+        watcher = _SymbolWatcher(symbols_file, lambda a,r: _reload(a,r), 
+                                 watch_seconds, symbols)
+        symbols = watcher.symbols
     
     # create block
     blk = tosdb.TOSDB_DataBlock(BLOCK_SIZE, date_time=True)
-    blk.add_items(*(symbols))
+    if symbols:
+        blk.add_items(*(symbols))
     blk.add_topics('last')
     if 'V' in val_type:
         blk.add_topics('volume')
@@ -46,18 +71,63 @@ def spawn(dllroot,outdir,intrvl,val_type,*symbols):
     dprfx = _strftime("%Y%m%d", _localtime())
     isec = int(intrvl * 60)  
     iobjs = list()
+    # one thread drains every symbol's stream (waking when bars end)
+    agg = _BarAggregator(isec/10, grace_seconds=grace_seconds, advance_by=advance_by)
+    sink = _AsyncFileSink() # and one thread does all the writing
 
-    for s in symbols:
+    def _start(s):
         #
         # create GetOnTimeInterval object for each symbol
         # 
         p = _path(outdir) + '/' + dprfx + '_' \
             + s.replace('/','-S-').replace('$','-D-').replace('.','-P-') \
-            + '_' + val_type + '_' + str(intrvl) + 'min.tosdb'       
-        iobj = _Goti.send_to_file(blk, s, p, getattr(_TI,_TI.val_dict[isec]), isec/10)
+            + '_' + val_type + '_' + str(intrvl) + 'min'
+        if _exists(p + '.tosdb'): # (re-added today) don't overwrite it
+            p += _strftime("_%H%M%S", _localtime())
+        iobj = _Goti.send_to_file(blk, s, p + '.tosdb', isec, isec/10, 
+                                  aggregator=agg, sink=sink)
         print( repr(iobj) )
         iobjs.append( iobj )
-    
+
+    def _reload(added, removed):
+        # stop/remove only the symbols that went away, add/start only the new 
+        print("reload symbols: +" + str(added) + " -" + str(removed))
+        for iobj in [i for i in iobjs if i and i._item.upper() in removed]:
+            iobj.stop()
+            iobjs.remove(iobj)
+        try:
+            if removed:
+                blk.remove_items(*removed)
+        except tosdb.TOSDB_Error as e:
+            print(repr(e))
+        try:
+            if added:
+                blk.add_items(*added)
+        except tosdb.TOSDB_Error as e: # (bad symbols) start the rest
+            print(repr(e))
+        have = blk.items() + blk.items_precached()
+        for s in added:
+            if s in have:
+                _start(s)
+
+    for s in symbols:
+        _start(s)
+
+    if watcher:
+        watcher.start()
+    agg.start()
+    if stop_event is not None:
+        # (a timeout so signal handlers get to run on Windows)
+        while not stop_event.wait(1):
+            pass
+        if watcher:
+            watcher.stop()
+        agg.stop()
+        agg.join()
+        for iobj in iobjs:
+            if iobj:
+                iobj.stop()
+        sink.close()
     return iobjs
 
 
@@ -67,12 +137,24 @@ if __name__ == '__main__':
                         help = 'root path of Windows implementation C Library')
     parser.add_argument('outdir', type=str, help='directory to output data to')
     parser.add_argument('intrvl', type=int, 
-                        choices=tuple(map( lambda x: int(x/60),
-                                           sorted(_TI.val_dict.keys()) )),
+                        choices=tuple(int(x/60) for x in sorted(_TI.val_dict.keys())
+                                      if x % 60 == 0),
                         help="interval size(minutes)")
     parser.add_argument('--ohlc', action="store_true", 
                         help="use open/high/low/close instead of close")
     parser.add_argument('--vol', action="store_true", help="use volume")
+    parser.add_argument('--symbols-file', type=str, default=None,
+                        help="file of more symbols to pull; reloaded (only the "
+                             "changes applied) when modified")
+    parser.add_argument('--watch-seconds', type=float, default=_WATCH_SECONDS,
+                        help="how often to check the symbols file")
+    parser.add_argument('--advance-by', choices=(_ADVANCE_CLOCK, _ADVANCE_TICKS),
+                        default=_ADVANCE_CLOCK,
+                        help="write a bar when its interval ends by the clock "
+                             "(default) or when the next tick arrives")
+    parser.add_argument('--grace-seconds', type=float, default=_GRACE_SECONDS,
+                        help="how long after its interval ends a bar is written "
+                             "(for its last ticks to arrive)")
     parser.add_argument('symbols', nargs='*', help="symbols to pull")
     args = parser.parse_args()
 
@@ -81,7 +163,14 @@ if __name__ == '__main__':
     else:
         val_type = 'CV' if args.vol else 'C'
 
-    spawn(args.dllroot, args.outdir, args.intrvl, val_type, *arg.vars)
+    # SIGTERM or Ctrl+C stops the task, writing what's left first
+    stop = _Event()
+    for sig in (_SIGINT, _SIGTERM):
+        _signal(sig, lambda signum, frame: stop.set())
+    spawn(args.dllroot, args.outdir, args.intrvl, val_type, *args.symbols,
+          symbols_file=args.symbols_file, watch_seconds=args.watch_seconds,
+          advance_by=args.advance_by, grace_seconds=args.grace_seconds,
+          stop_event=stop)
 
 
 
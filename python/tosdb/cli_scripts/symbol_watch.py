@@ -0,0 +1,131 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+from threading import Thread as _Thread, Event as _Event
+from os.path import getmtime as _getmtime
+from sys import stderr as _stderr
+from re import split as _split
+
+WATCH_SECONDS = 10
+
+
+def read_symbols(path):
+    """ Symbols of a file (separated by white-space or commas, '#' comments) """
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            for s in _split(r'[\s,]+', line.split('#', 1)[0]):
+                s = s.upper()
+                if s and s not in symbols:
+                    symbols.append(s)
+    return symbols
+
+
+
+class SymbolWatcher:
+    """ Watches a symbols file and reports what was added/removed
+
+    A thread re-reads the file when its modification time changes (checked
+    every poll_seconds, 0 to only reload on request) or when reload() is
+    called (e.g from a SIGHUP handler; it only wakes the thread), and calls
+    on_change(added, removed) with the difference from the last read. A file
+    that can't be read (e.g not written yet) is logged and, at start, taken
+    as empty: its symbols are picked up when it shows up.
+
+    path: the symbols file (see read_symbols)
+    on_change: callable that takes (added, removed) lists of symbols
+    poll_seconds: how often to check the file's modification time
+    fixed: symbols that are always in the list (e.g from the command line)
+    """
+    def __init__(self, path, on_change, poll_seconds=WATCH_SECONDS, fixed=()):
+        if not callable(on_change):
+            raise TypeError("on_change must be callable")
+        self._path = path
+        self._on_change = on_change
+        self._poll = poll_seconds
+        self._fixed = [s.upper() for s in fixed]
+        self._mtime = self._stat()
+        try:
+            self._symbols = self.read()
+        except OSError as e:
+            print("- tosdb.cli_scripts.symbol_watch.SymbolWatcher ::", str(e), 
+                  file=_stderr)
+            self._symbols = list(self._fixed)
+        self._wake = _Event()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    def read(self):
+        """ the fixed symbols plus those in the file """
+        symbols = list(self._fixed)
+        symbols.extend(s for s in read_symbols(self._path) if s not in symbols)
+        return symbols
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = _Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def reload(self):
+        """ Re-read the file now (safe to call from a signal handler) """
+        self._wake.set()
+
+    def check(self):
+        """ Re-reads the file and calls on_change if the symbols changed """
+        try:
+            new = self.read()
+        except OSError as e:
+            print("- tosdb.cli_scripts.symbol_watch.SymbolWatcher.check ::",
+                  str(e), file=_stderr)
+            return
+        old = set(self._symbols)
+        added = [s for s in new if s not in old]
+        removed = [s for s in self._symbols if s not in set(new)]
+        self._symbols = new
+        if added or removed:
+            try:
+                self._on_change(added, removed)
+            except Exception as e:
+                print("- tosdb.cli_scripts.symbol_watch.SymbolWatcher.check ::",
+                      str(e), file=_stderr)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._poll or None)
+            if self._stopped:
+                return
+            forced = self._wake.is_set()
+            self._wake.clear()
+            mtime = self._stat()
+            if forced or mtime != self._mtime:
+                self._mtime = mtime
+                self.check()
+
+    def _stat(self):
+        try:
+            return _getmtime(self._path)
+        except OSError:
+            return None
@@ -0,0 +1,362 @@
+# Copyright (C) 2014 Jonathon Ogden     < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""indicators.py:  incremental (O(1) per tick) indicators over tosdb streams.
+
+EMA:             exponential moving average
+VWAP:            volume-weighted average price (from LAST and cumulative VOLUME)
+RollingStdev:    standard deviation of the last N values
+RSI:             relative strength index (Wilder smoothing)
+
+Each indicator keeps only its running state: update() it with new values (or
+push_many() a batch, oldest-first) and read value (None until there's enough
+data).
+
+IndicatorSet:    feeds indicators from (block, item, topic) streams; the new
+                 ticks come from one BarAggregator drain pass (shared with any
+                 bar engines on the same aggregator) and the values can be read
+                 at any time, from any thread, without touching the block
+"""
+
+from .intervalize import BarAggregator as _BarAggregator
+
+from collections import deque as _deque
+from threading import Lock as _Lock
+from math import sqrt as _sqrt
+
+
+class EMA:
+    """ Exponential moving average
+
+    The first value seeds the average; after that each update is
+    value = alpha * x + (1 - alpha) * value.
+
+    span: number of periods, alpha = 2 / (span + 1)
+    alpha: smoothing factor (0 < alpha <= 1), instead of span
+    """
+    def __init__(self, span=None, alpha=None):
+        if (span is None) == (alpha is None):
+            raise ValueError("pass one of span or alpha")
+        if alpha is None:
+            if span < 1:
+                raise ValueError("span must be >= 1")
+            alpha = 2.0 / (span + 1)
+        elif not (0 < alpha <= 1):
+            raise ValueError("alpha must be > 0 and <= 1")
+        self._alpha = alpha
+        self._value = None
+
+    @property
+    def alpha(self):
+        return self._alpha
+
+    @property
+    def value(self):
+        return self._value
+
+    def update(self, x):
+        v = self._value
+        self._value = x if v is None else v + self._alpha * (x - v)
+        return self._value
+
+    def push_many(self, epoch_micros, values):
+        for x in values:
+            self.update(x)
+
+    def reset(self):
+        self._value = None
+
+
+
+class VWAP:
+    """ Volume-weighted average price
+
+    update() takes a (price, size) trade. push_many() takes LAST updates and
+    cumulative VOLUME updates, merged by time: each increase of VOLUME is a
+    trade of that size at the last LAST; a drop means the cumulative count
+    was reset (new session) and restarts the average.
+    """
+    def __init__(self):
+        self.reset()
+
+    @property
+    def value(self):
+        return self._pv / self._vol if self._vol else None
+
+    @property
+    def volume(self):
+        return self._vol
+
+    def update(self, price, size):
+        self._pv += price * size
+        self._vol += size
+        return self.value
+
+    def push_many(self, epoch_micros, prices, vol_epoch_micros=(), volumes=()):
+        # price updates go before volume updates with the same time
+        i, j, ni, nj = 0, 0, len(epoch_micros), len(vol_epoch_micros)
+        while i < ni or j < nj:
+            if j >= nj or (i < ni and epoch_micros[i] <= vol_epoch_micros[j]):
+                self._price = prices[i]
+                i += 1
+            else:
+                self._push_volume(volumes[j])
+                j += 1
+
+    def reset(self):
+        self._pv = 0.0
+        self._vol = 0
+        self._price = None
+        self._last_cum_vol = None
+
+    def _push_volume(self, volume):
+        last, self._last_cum_vol = self._last_cum_vol, volume
+        if last is None:
+            return
+        if volume < last:
+            self._pv, self._vol = 0.0, 0
+            delta = volume
+        else:
+            delta = volume - last
+        if delta and self._price is not None:
+            self.update(self._price, delta)
+
+
+
+class RollingStdev:
+    """ Standard deviation of the last window values
+
+    Keeps the window, a running mean and sum of squared deviations (updated
+    as values enter and leave the window); value is None until there are
+    more than ddof values.
+
+    window: number of values
+    ddof: delta degrees of freedom (1 = sample, 0 = population)
+    """
+    def __init__(self, window, ddof=1):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        if not (0 <= ddof < window):
+            raise ValueError("ddof must be >= 0 and < window")
+        self._window = int(window)
+        self._ddof = ddof
+        self.reset()
+
+    @property
+    def window(self):
+        return self._window
+
+    @property
+    def mean(self):
+        return self._mean if self._vals else None
+
+    @property
+    def value(self):
+        n = len(self._vals)
+        if n <= self._ddof:
+            return None
+        return _sqrt(max(self._m2, 0.0) / (n - self._ddof))
+
+    def update(self, x):
+        vals = self._vals
+        if len(vals) == self._window: # replace the oldest
+            old = vals.popleft()
+            vals.append(x)
+            d = x - old
+            mean = self._mean + d / self._window
+            self._m2 += d * (x - mean + old - self._mean)
+            self._mean = mean
+        else:
+            vals.append(x)
+            d = x - self._mean
+            self._mean += d / len(vals)
+            self._m2 += d * (x - self._mean)
+        return self.value
+
+    def push_many(self, epoch_micros, values):
+        for x in values:
+            self.update(x)
+
+    def reset(self):
+        self._vals = _deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+
+
+class RSI:
+    """ Relative strength index, 0 to 100
+
+    The average gain/loss of the first period changes is seeded with a
+    simple average, then Wilder-smoothed: avg = (avg * (period - 1) + x) /
+    period. value is None until period changes have been seen.
+
+    period: number of changes (14 is typical)
+    """
+    def __init__(self, period=14):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        self._period = int(period)
+        self.reset()
+
+    @property
+    def period(self):
+        return self._period
+
+    @property
+    def value(self):
+        if self._n < self._period:
+            return None
+        if not self._avg_loss:
+            return 100.0 if self._avg_gain else 50.0
+        return 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+
+    def update(self, x):
+        last, self._last = self._last, x
+        if last is not None:
+            d = x - last
+            gain, loss = (d, 0.0) if d > 0 else (0.0, -d)
+            p = self._period
+            if self._n < p:
+                self._n += 1
+                self._avg_gain += (gain - self._avg_gain) / self._n
+                self._avg_loss += (loss - self._avg_loss) / self._n
+            else:
+                self._avg_gain = (self._avg_gain * (p - 1) + gain) / p
+                self._avg_loss = (self._avg_loss * (p - 1) + loss) / p
+        return self.value
+
+    def push_many(self, epoch_micros, values):
+        for x in values:
+            self.update(x)
+
+    def reset(self):
+        self._last = None
+        self._n = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+
+
+class IndicatorSet:
+    """ Named indicators fed from tosdb streams
+
+    Indicators subscribe to their streams through a BarAggregator, so each
+    stream's marker is drained once per pass no matter how many indicators
+    (and bar engines) use it. Updates and reads are done under one lock:
+    value()/values() can be called at any time, from any thread.
+
+    aggregator: a BarAggregator to share (e.g with bar engines); if None one
+                is created and start()/stop() run it
+    update_seconds: seconds between passes of the created aggregator
+    """
+    def __init__(self, aggregator=None, update_seconds=1):
+        self._own_aggregator = aggregator is None
+        self._aggregator = aggregator if aggregator is not None \
+                           else _BarAggregator(update_seconds)
+        self._lock = _Lock()
+        self._indicators = {} # name -> (indicator, token)
+
+    @property
+    def aggregator(self):
+        return self._aggregator
+
+    def add(self, block, item, topic, indicator, name=None, volume_topic=None):
+        """ Feeds a stream (and, for VWAP, volume_topic) into indicator
+
+        name: key for value()/remove(); defaults to 'ITEM:TOPIC:Class'
+        volume_topic: cumulative volume topic (e.g 'VOLUME') for indicators
+                      whose push_many takes volume updates (VWAP)
+
+        returns name
+        """
+        if name is None:
+            name = ':'.join([item.upper(), topic.upper(), type(indicator).__name__])
+        placeholder = (indicator, None) # (until subscribed)
+        with self._lock:
+            if name in self._indicators:
+                raise ValueError("indicator already added: " + name)
+            self._indicators[name] = placeholder
+        try:
+            if volume_topic is None:
+                def _cb(ems, vals):
+                    with self._lock:
+                        indicator.push_many(ems, vals)
+                token = self._aggregator.subscribe(block, item, topic, _cb)
+            else:
+                def _cb(batches):
+                    (ems, vals), (vems, vols) = batches
+                    with self._lock:
+                        indicator.push_many(ems, vals, vems, vols)
+                token = self._aggregator.subscribe_many(block, item,
+                                                        (topic, volume_topic), _cb)
+        except:
+            with self._lock:
+                if self._indicators.get(name) is placeholder:
+                    del self._indicators[name]
+            raise
+        with self._lock:
+            added = self._indicators.get(name) is placeholder
+            if added:
+                self._indicators[name] = (indicator, token)
+        if not added: # remove()'d while we subscribed
+            self._aggregator.unsubscribe(token)
+        return name
+
+    def remove(self, name):
+        with self._lock:
+            indicator, token = self._indicators.pop(name)
+        if token is not None: # (else add() is still subscribing; it unsubscribes)
+            self._aggregator.unsubscribe(token)
+        return indicator
+
+    def names(self):
+        with self._lock:
+            return list(self._indicators)
+
+    def value(self, name):
+        """ current value of an indicator (None if not ready) """
+        with self._lock:
+            return self._indicators[name][0].value
+
+    def values(self):
+        """ dict of name -> current value, as of one point in time """
+        with self._lock:
+            return {n : i.value for n,(i,_) in self._indicators.items()}
+
+    def __getitem__(self, name):
+        return self.value(name)
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._indicators
+
+    def __len__(self):
+        with self._lock:
+            return len(self._indicators)
+
+    def poll(self):
+        """ Drains the aggregator's streams once (instead of start()) """
+        self._aggregator.poll()
+
+    def start(self):
+        if self._own_aggregator:
+            self._aggregator.start()
+
+    def stop(self):
+        if self._own_aggregator:
+            self._aggregator.stop()
+            self._aggregator.join()
@@ -24,14 +24,53 @@ GetOnTimeInterval_CV:      (includes a 'volume' value for each interval)
 GetOnTimeInterval_OHLC:  'open', 'high', 'low', and 'closing' prices of each interval
 GetOnTimeInterval_OHLCV:   (includes a 'volume' value for each interval)
 
-TimeInterval enum value of the desired interval should be passed to constructor.
+TimeInterval enum value (or any int number of seconds from 1 to 86400) of the 
+desired interval should be passed to start/send_to_file.
 
 Currently the send_to_file class method is the primary way of dealing with the data.
+
+BarEngine:               incremental bar builder the above are built on; consumes 
+                         (epoch micro-second, price) ticks in time order and 
+                         emits completed Bar objects to a callback
+
+ActivityBarEngine:       tick-count, volume and dollar-volume bars (close every N 
+                         trades, shares or dollars) with BarEngine's interface
+
+MultiBarEngine:          BarEngine for several intervals at once; the coarser bars
+                         are rolled up from completed finer bars
+
+GapFill:                 stage between a BarEngine and its sink(s) that fills in 
+                         bars for intervals with no ticks (forward-fill, NaN, 
+                         or skip)
+
+resample:                bulk (vectorized) version of BarEngine for recorded ticks
+
+BarFileWriter:           appends bars to a binary bar file (fixed-size records)
+BarFileReader:           memory-maps a binary bar file for reading 
+
+AsyncFileSink:           one background thread that does the (batched) writing for 
+                         any number of text/bar files; pass one to send_to_file 
+                         to share it between objects
+
+BarAggregator:           one polling thread that drains the markers of many 
+                         (block, item, topic) streams per pass and feeds the new 
+                         ticks to subscribers (e.g BarEngine.push_many), and 
+                         ends bars when their interval ends (by the block's 
+                         clock); pass one to start/send_to_file to share it 
+                         between objects
 """
 
 import tosdb
 
-from threading import Thread as _Thread
+from array import array as _array
+from collections import namedtuple as _namedtuple
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from threading import Thread as _Thread, Event as _Event, Lock as _Lock
+from mmap import mmap as _mmap, ACCESS_READ as _ACCESS_READ
+from queue import Queue as _Queue, Empty as _Empty
+from collections import OrderedDict as _OrderedDict, deque as _deque
+import struct as _struct
+import os as _os
 from sys import stderr as _stderr
 from .meta_enum import MetaEnum
 import time as _time
@@ -39,16 +78,1550 @@ import time as _time
 
 class TimeInterval(metaclass=MetaEnum):      
     fields = { 
+        'second' : 1,
+        'five_sec' : 5,
+        'ten_sec' : 10,
+        'fifteen_sec' : 15,
+        'thirty_sec' : 30,
         'min' : 60,
         'three_min' : 180,
         'five_min' : 300,
         'ten_min' : 600,
         'fifteen_min' : 900,
         'thirty_min' : 1800,
-        'hour' : 3600 
+        'hour' : 3600,
+        'two_hour' : 7200,
+        'four_hour' : 14400,
+        'day' : 86400
     }   
+
+
+def _to_interval_seconds(time_interval):
+    # TimeInterval or int seconds (1 - 86400) -> int seconds
+    if time_interval in TimeInterval:
+        return int(time_interval.val)
+    if not isinstance(time_interval, int):
+        raise TypeError("time_interval must be of type TimeInterval or int")
+    if not 1 <= time_interval <= 86400:
+        raise ValueError("time_interval must be from 1 to 86400 seconds")
+    return time_interval
+
+
+def local_utc_offset():
+    """ seconds the local time zone is currently ahead of UTC """
+    return _time.localtime().tm_gmtoff
+
+
+LOCAL_TIME = 'local' # utc_offset that follows the local time zone, DST included
+
+def _bounds_fn(interval, utc_offset):
+    # function of epoch micro-seconds -> (start, end) of its interval; the
+    # boundaries are multiples of the interval since the epoch shifted by 
+    # utc_offset or, for LOCAL_TIME, local wall-clock multiples (the offset is
+    # looked up on each call, so only call it when a bar rolls)
+    if utc_offset == LOCAL_TIME:
+        return lambda em: _local_bounds(em, interval)
+    off = int(utc_offset) * 1000000
+    def _bounds(em):
+        start = (em + off) // interval * interval - off
+        return (start, start + interval)
+    return _bounds
+
+
+def _local_bounds(epoch_micros, interval):
+    iv = interval // 1000000
+    sec = epoch_micros // 1000000
+    local = sec + _time.localtime(sec).tm_gmtoff
+    beg = local - local % iv
+    # the end of a bar spanning a DST change is in the other offset; a 
+    # repeated (fall-back) local time resolves to the side holding the tick
+    start = min(_local_epoch(beg), sec - local % iv)
+    end = max(_local_epoch(beg + iv), sec - local % iv + iv)
+    return (start * 1000000, end * 1000000)
+
+
+def _local_epoch(local_seconds):
+    # epoch seconds of a local wall-clock time (in seconds since the local epoch)
+    return int(_time.mktime(_time.gmtime(local_seconds)[:8] + (-1,)))
  
             
+class Bar(_namedtuple("Bar",["epoch_micros","open","high","low","close","volume"])):
+    """ A completed bar/candle 
+
+    epoch_micros: start of the bar's interval, in micro-seconds since the epoch
+    volume: None if the bar doesn't track volume
+    """
+    __slots__ = ()
+
+    @property
+    def date_time(self):
+        """ start of the bar's interval as a TOSDB_DateTime """
+        return tosdb.TOSDB_DateTime.from_epoch_micros(self.epoch_micros)
+
+
+
+class BarEngine:
+    """ Incremental bar/candle builder
+
+    Consumes ticks in time order, keeping only the state of the current bar, 
+    and calls on_bar(Bar) when a tick rolls into a new interval, or when 
+    advance() is called with a time past the end of its interval. Interval 
+    boundaries are multiples of the interval since the epoch (shifted by 
+    utc_offset); they're computed when a bar rolls, so each tick costs one 
+    comparison with the end of the current bar. Intervals with no ticks 
+    produce no bar. A tick older than the current bar (out of order) 
+    is folded into the current bar; one for a bar already emitted by 
+    advance() is dropped and counted in late_ticks.
+
+    With track_volume=True, readings of the (cumulative) VOLUME topic passed 
+    to push_volume/push_many are turned into per-bar volume by timestamp. A 
+    volume change with no price tick (trades at the last price) counts at the
+    last price and can roll a new bar. A bar's volume is None if it started 
+    before the first volume reading. 
+
+    interval_seconds: size of each bar in seconds
+    on_bar: callable that takes a completed Bar
+    utc_offset: seconds ahead of UTC to align boundaries to, or LOCAL_TIME 
+                for bars that start on local hours/days; LOCAL_TIME looks up 
+                the offset as each bar rolls, so bars stay on the local clock
+                across DST changes (the bar spanning one is an hour longer or
+                shorter)
+    track_volume: build bar volume from push_volume readings
+    """
+    def __init__(self, interval_seconds, on_bar, utc_offset=0, track_volume=False):
+        if int(interval_seconds) < 1:
+            raise ValueError("interval_seconds must be >= 1")
+        if not callable(on_bar):
+            raise TypeError("on_bar must be callable")
+        self._interval = int(interval_seconds) * 1000000
+        self._bounds = _bounds_fn(self._interval, utc_offset)
+        self._on_bar = on_bar
+        self._track_volume = track_volume
+        self._start = self._end = None # of the bar in progress
+        self._done = False # bar in progress already emitted (by advance)
+        self._o = self._h = self._l = self._c = self._v = None
+        self._last_cum_vol = None
+        self.late_ticks = 0
+
+    @property
+    def interval_seconds(self):
+        return self._interval // 1000000
+
+    @property
+    def current(self):
+        """ the bar in progress (or None) """
+        if self._end is None or self._done:
+            return None
+        return Bar(self._start, self._o, self._h, self._l, self._c, self._v)
+
+    def next_boundary(self):
+        """ end of the bar in progress in epoch micro-seconds (or None) """
+        if self._end is None or self._done:
+            return None
+        return self._end
+
+    def advance(self, epoch_micros):
+        """ Emits the bar in progress if its interval ended by epoch_micros """
+        end = self.next_boundary()
+        if end is not None and epoch_micros >= end:
+            self._done = True
+            self._on_bar(Bar(self._start, self._o, self._h, self._l, self._c, 
+                             self._v))
+
+    def push(self, epoch_micros, price):
+        """ Adds one tick """
+        if self._end is None or epoch_micros >= self._end:
+            self._roll(epoch_micros, price)
+        elif self._done:
+            self.late_ticks += 1
+        else:
+            if price > self._h:
+                self._h = price
+            elif price < self._l:
+                self._l = price
+            self._c = price
+
+    def push_volume(self, epoch_micros, cumulative_volume):
+        """ Adds one reading of the cumulative VOLUME topic """
+        last, self._last_cum_vol = self._last_cum_vol, cumulative_volume
+        if last is None:
+            return
+        # a drop means the cumulative count was reset (new session)
+        delta = cumulative_volume - last if cumulative_volume >= last \
+                else cumulative_volume
+        if self._end is None: # no price yet to put it at
+            return
+        if epoch_micros >= self._end:
+            if not delta: 
+                return
+            self._roll(epoch_micros, self._c)
+        elif self._done:
+            if delta:
+                self.late_ticks += 1
+            return
+        if self._v is not None:
+            self._v += delta
+
+    def push_many(self, epoch_micros, prices, vol_epoch_micros=(), volumes=()):
+        """ Adds ticks from two (oldest-first) sequences of equal length, and 
+            optionally, VOLUME readings - merged with the ticks by time - from 
+            two more 
+        """
+        if vol_epoch_micros or self._done:
+            self._push_merged(epoch_micros, prices, vol_epoch_micros, volumes)
+            return
+        end, h, l, c = self._end, self._h, self._l, self._c
+        for em, p in zip(epoch_micros, prices):
+            if end is None or em >= end:
+                self._h, self._l, self._c = h, l, c
+                self._roll(em, p)
+                end, h, l, c = self._end, p, p, p
+            else:
+                if p > h:
+                    h = p
+                elif p < l:
+                    l = p
+                c = p
+        self._h, self._l, self._c = h, l, c
+
+    def flush(self):
+        """ Emits the bar in progress (if any) and resets """
+        bar = self.current
+        self._start = self._end = None
+        self._done = False
+        self._o = self._h = self._l = self._c = self._v = None
+        if bar is not None:
+            self._on_bar(bar)
+
+    def _push_merged(self, ems, prices, vems, vols):
+        # price ticks go before volume readings with the same time
+        i, j, ni, nj = 0, 0, len(ems), len(vems)
+        while i < ni or j < nj:
+            if j >= nj or (i < ni and ems[i] <= vems[j]):
+                self.push(ems[i], prices[i])
+                i += 1
+            else:
+                self.push_volume(vems[j], vols[j])
+                j += 1
+
+    def _roll(self, epoch_micros, price):
+        bar = self.current
+        self._start, self._end = self._bounds(epoch_micros)
+        self._done = False
+        self._o = self._h = self._l = self._c = price
+        # only a known starting point makes the new bar's volume known 
+        self._v = 0 if (self._track_volume and self._last_cum_vol is not None) \
+                  else None
+        if bar is not None:
+            self._on_bar(bar)
+
+
+
+ACTIVITY_TICK = 'tick'
+ACTIVITY_VOLUME = 'volume'
+ACTIVITY_DOLLAR = 'dollar'
+
+SIZE_FROM_VOLUME = 'volume' # trades are changes in the (cumulative) VOLUME topic
+SIZE_FROM_LAST_SIZE = 'last_size' # trades are LAST/LAST_SIZE updates
+
+# a LAST and LAST_SIZE update this close together are one trade
+PAIR_MICROS = 100000
+
+
+class ActivityBarEngine:
+    """ Incremental tick-count, volume and dollar-volume bar builder
+
+    Closes a bar once its trade count, share volume or dollar volume 
+    (size * price) reaches threshold; the trade that reaches it is the bar's
+    close (no splitting, so volume/dollar bars can overshoot). Each bar's 
+    epoch_micros is the time of its first trade and volume its share volume 
+    (None if trade sizes aren't known). Only a running total is kept, nothing
+    is re-scanned.
+
+    What counts as a trade depends on size_from:
+      SIZE_FROM_VOLUME:    each increase of the cumulative VOLUME topic 
+                           (push_volume), at the last LAST price (push)
+      SIZE_FROM_LAST_SIZE: each LAST (push) or LAST_SIZE (push_volume) update;
+                           a LAST and a LAST_SIZE update within pair_micros 
+                           of each other are one trade, at that price and 
+                           size. A lone LAST is a trade of the last size (the 
+                           size didn't change), a lone LAST_SIZE one at the 
+                           last price. An update is held until its pair 
+                           arrives or the window passes (on the next update,
+                           advance() or flush()), so a trade is counted - and
+                           can close a bar - only once, with its own size
+      None:                each LAST update (push), size unknown (ticks only)
+
+    Has the same push/push_volume/push_many/advance/flush interface as 
+    BarEngine, so it can be fed by BarAggregator.subscribe_engine (pass the 
+    VOLUME or LAST_SIZE topic as volume_topic) and write to the same sinks.
+
+    kind: ACTIVITY_TICK, ACTIVITY_VOLUME or ACTIVITY_DOLLAR
+    threshold: trades, shares or dollars per bar
+    on_bar: callable that takes a completed Bar
+    size_from: SIZE_FROM_VOLUME, SIZE_FROM_LAST_SIZE or None
+    pair_micros: window for pairing LAST and LAST_SIZE (SIZE_FROM_LAST_SIZE)
+    """
+    def __init__(self, kind, threshold, on_bar, size_from=SIZE_FROM_VOLUME,
+                 pair_micros=PAIR_MICROS):
+        if kind not in (ACTIVITY_TICK, ACTIVITY_VOLUME, ACTIVITY_DOLLAR):
+            raise ValueError("invalid kind: " + str(kind))
+        if size_from not in (SIZE_FROM_VOLUME, SIZE_FROM_LAST_SIZE, None):
+            raise ValueError("invalid size_from: " + str(size_from))
+        if size_from is None and kind != ACTIVITY_TICK:
+            raise ValueError(str(kind) + " bars need trade sizes (size_from)")
+        if threshold <= 0:
+            raise ValueError("threshold must be > 0")
+        if pair_micros < 0:
+            raise ValueError("pair_micros must be >= 0")
+        if not callable(on_bar):
+            raise TypeError("on_bar must be callable")
+        self._kind = kind
+        self._threshold = threshold
+        self._on_bar = on_bar
+        self._size_from = size_from
+        self._price = None # last LAST 
+        self._size = None # last LAST_SIZE
+        self._last_cum_vol = None
+        self._pair = int(pair_micros)
+        # [epoch_micros, price, size] of a SIZE_FROM_LAST_SIZE update waiting 
+        # for the other half of its trade (price or size None)
+        self._pending = None
+        self._bar = None # [epoch_micros, o, h, l, c, volume, total, trades]
+
+    @property
+    def kind(self):
+        return self._kind
+
+    @property
+    def threshold(self):
+        return self._threshold
+
+    @property
+    def current(self):
+        """ the bar in progress (or None) """
+        return None if self._bar is None else Bar(*self._bar[:6])
+
+    def next_boundary(self): 
+        """ end of the pairing window of a held update (no time boundaries) """
+        p = self._pending
+        return None if p is None else p[0] + self._pair + 1
+
+    def advance(self, epoch_micros):
+        """ Counts a held LAST/LAST_SIZE update whose window ended by then """
+        p = self._pending
+        if p is not None and epoch_micros > p[0] + self._pair:
+            self._settle()
+
+    def push(self, epoch_micros, price):
+        """ Adds a LAST update """
+        if self._size_from is None:
+            self._price = price
+            self._trade(epoch_micros, price, None)
+        elif self._size_from == SIZE_FROM_LAST_SIZE:
+            p = self._pending
+            if p is not None and p[1] is None \
+               and epoch_micros - p[0] <= self._pair: # its size came first
+                self._pending = None
+                self._price = price
+                self._trade(p[0], price, p[2])
+                return
+            self._settle()
+            self._price = price
+            self._pending = [epoch_micros, price, None]
+        else:
+            self._price = price
+
+    def push_volume(self, epoch_micros, volume):
+        """ Adds a VOLUME (cumulative) or LAST_SIZE update, per size_from """
+        if self._size_from == SIZE_FROM_VOLUME:
+            last, self._last_cum_vol = self._last_cum_vol, volume
+            if last is None:
+                return
+            # a drop means the cumulative count was reset (new session)
+            delta = volume - last if volume >= last else volume
+            if delta and self._price is not None:
+                self._trade(epoch_micros, self._price, delta)
+        elif self._size_from == SIZE_FROM_LAST_SIZE:
+            p = self._pending
+            if p is not None and p[2] is None \
+               and epoch_micros - p[0] <= self._pair: # its price came first
+                self._pending = None
+                self._size = volume
+                self._trade(p[0], p[1], volume)
+                return
+            self._settle()
+            self._size = volume
+            self._pending = [epoch_micros, None, volume]
+
+    def push_many(self, epoch_micros, prices, vol_epoch_micros=(), volumes=()):
+        """ Adds LAST updates and, optionally, VOLUME/LAST_SIZE updates, 
+            merged by time (all oldest-first) 
+        """
+        # price updates go before volume/size updates with the same time
+        i, j, ni, nj = 0, 0, len(epoch_micros), len(vol_epoch_micros)
+        while i < ni or j < nj:
+            if j >= nj or (i < ni and epoch_micros[i] <= vol_epoch_micros[j]):
+                self.push(epoch_micros[i], prices[i])
+                i += 1
+            else:
+                self.push_volume(vol_epoch_micros[j], volumes[j])
+                j += 1
+
+    def flush(self):
+        """ Counts a held update, then emits the bar in progress (if any) """
+        self._settle()
+        bar, self._bar = self.current, None
+        if bar is not None:
+            self._on_bar(bar)
+
+    def _settle(self):
+        # count a held update whose pair never came: the size (or price) 
+        # didn't change, so the trade is at the last one (if known)
+        p, self._pending = self._pending, None
+        if p is None:
+            return
+        em, price, size = p
+        if price is None:
+            price = self._price
+        if size is None:
+            size = self._size
+        if price is not None and size is not None:
+            self._trade(em, price, size)
+
+    def _trade(self, epoch_micros, price, size):
+        b = self._bar
+        if b is None:
+            b = self._bar = [epoch_micros, price, price, price, price, size, 0, 0]
+        else:
+            if price > b[2]:
+                b[2] = price
+            elif price < b[3]:
+                b[3] = price
+            b[4] = price
+            if size is not None and b[5] is not None:
+                b[5] += size
+        b[6] += self._amount(price, size)
+        b[7] += 1
+        self._check(b)
+
+    def _amount(self, price, size):
+        if self._kind == ACTIVITY_TICK:
+            return 1
+        if self._kind == ACTIVITY_VOLUME:
+            return size
+        return size * price
+
+    def _check(self, b):
+        if b[6] >= self._threshold:
+            self._bar = None
+            self._on_bar(Bar(*b[:6]))
+
+
+class _BarRollup:
+    # builds bars of an interval from completed bars of a finer interval that 
+    # divides it (so each finer bar falls in exactly one coarser one)
+    def __init__(self, interval_seconds, on_bar, utc_offset):
+        self._bounds = _bounds_fn(int(interval_seconds) * 1000000, utc_offset)
+        self._on_bar = on_bar
+        self._end = None
+        self._bar = None
+
+    def push_bar(self, bar):
+        em = bar.epoch_micros
+        cur = self._bar
+        if cur is None and self._end is not None and em < self._end:
+            return # (late) bar for one emitted by advance()
+        if cur is None or em >= self._end:
+            start, self._end = self._bounds(em)
+            self._bar = Bar(start, *bar[1:])
+            if cur is not None:
+                self._on_bar(cur)
+        else:
+            vol = None if cur.volume is None or bar.volume is None \
+                  else cur.volume + bar.volume
+            self._bar = Bar(cur.epoch_micros, cur.open, max(cur.high, bar.high), 
+                            min(cur.low, bar.low), bar.close, vol)
+
+    def next_boundary(self):
+        if self._bar is None:
+            return None
+        return self._end
+
+    def advance(self, epoch_micros):
+        end = self.next_boundary()
+        if end is not None and epoch_micros >= end:
+            cur, self._bar = self._bar, None
+            self._on_bar(cur)
+
+    def flush(self):
+        cur, self._bar, self._end = self._bar, None, None
+        if cur is not None:
+            self._on_bar(cur)
+ 
+
+
+class MultiBarEngine:
+    """ Bars of several intervals from one tick stream
+
+    Ticks (and volume) only go into a BarEngine for the finest interval; each
+    coarser interval is rolled up from completed bars of the largest finer 
+    interval that divides it, so per-tick work (and stream reads, when fed by 
+    a BarAggregator) doesn't grow with the number of intervals. A coarser 
+    bar is emitted when the finer bar that starts its next interval completes.
+    Has the same push/push_volume/push_many/flush interface as BarEngine.
+
+    intervals: TimeIntervals or int seconds (1 - 86400); each must be a 
+               multiple of the smallest
+    on_bar: callable that takes (interval_seconds, Bar)
+    utc_offset: seconds ahead of UTC to align boundaries to (see BarEngine)
+    track_volume: build bar volume from VOLUME readings (see BarEngine)
+    """
+    def __init__(self, intervals, on_bar, utc_offset=0, track_volume=False):
+        if not callable(on_bar):
+            raise TypeError("on_bar must be callable")
+        isecs = sorted(set(_to_interval_seconds(i) for i in intervals))
+        if not isecs:
+            raise ValueError("no intervals")
+        for isec in isecs[1:]:
+            if isec % isecs[0]:
+                raise ValueError("interval " + str(isec) + " not a multiple of " 
+                                 + str(isecs[0]))
+        self._on_bar = on_bar
+        self._intervals = isecs
+        # children of each interval, finest to coarsest
+        self._children = {isec: [] for isec in isecs}
+        self._rollups = {}
+        for n, isec in enumerate(isecs[1:], 1):
+            parent = max(p for p in isecs[:n] if isec % p == 0)
+            self._rollups[isec] = _BarRollup(isec, self._emitter(isec), utc_offset)
+            self._children[parent].append(self._rollups[isec])
+        self._engine = BarEngine(isecs[0], self._emitter(isecs[0]), utc_offset, 
+                                 track_volume)
+        self.push = self._engine.push
+        self.push_volume = self._engine.push_volume
+        self.push_many = self._engine.push_many
+
+    @property
+    def intervals(self):
+        return list(self._intervals)
+
+    @property
+    def late_ticks(self):
+        return self._engine.late_ticks
+
+    def next_boundary(self):
+        """ earliest end of a bar in progress in epoch micro-seconds (or None) """
+        ends = [e for e in [self._engine.next_boundary()] + 
+                [self._rollups[isec].next_boundary() for isec in self._intervals[1:]]
+                if e is not None]
+        return min(ends) if ends else None
+
+    def advance(self, epoch_micros):
+        """ Emits the bars in progress whose intervals ended by epoch_micros """
+        self._engine.advance(epoch_micros)
+        for isec in self._intervals[1:]:
+            self._rollups[isec].advance(epoch_micros)
+
+    def flush(self):
+        """ Emits the bars in progress (if any), finest first, and resets """
+        self._engine.flush()
+        for isec in self._intervals[1:]:
+            self._rollups[isec].flush()
+
+    def _emitter(self, isec):
+        children = self._children[isec]
+        on_bar = self._on_bar
+        def _emit(bar):
+            for c in children:
+                c.push_bar(bar)
+            on_bar(isec, bar)
+        return _emit
+
+
+
+GAP_FFILL = 'ffill' # repeat the last close, volume 0
+GAP_NAN = 'nan' # NaN prices, unknown (None) volume
+GAP_SKIP = 'skip' # leave the gap
+
+
+class GapFill:
+    """ Fills in bars for intervals with no ticks
+
+    A stage between a BarEngine (as its on_bar) and the sink(s): passes each
+    bar through to on_bar, preceded by a synthetic bar for each interval 
+    skipped since the last one, per policy (GAP_FFILL, GAP_NAN or GAP_SKIP). 
+    Only the start and close of the last bar are kept. 
+
+    advance(epoch_micros) - called after the engine's with the same time, as 
+    BarAggregator does for stages passed to subscribe_engine - emits the 
+    synthetic bar for each interval ending by epoch_micros right away, 
+    rather than when the next real bar arrives. A bar for an interval 
+    already emitted (real or synthetic) is dropped and counted in late_bars.
+    Nothing is filled before the first real bar.
+
+    interval_seconds: size of each bar in seconds (the engine's)
+    on_bar: callable that takes a Bar
+    policy: GAP_FFILL, GAP_NAN or GAP_SKIP
+    utc_offset: the engine's utc_offset
+    """
+    def __init__(self, interval_seconds, on_bar, policy=GAP_FFILL, utc_offset=0):
+        if int(interval_seconds) < 1:
+            raise ValueError("interval_seconds must be >= 1")
+        if not callable(on_bar):
+            raise TypeError("on_bar must be callable")
+        if policy not in (GAP_FFILL, GAP_NAN, GAP_SKIP):
+            raise ValueError("invalid policy: " + str(policy))
+        self._bounds = _bounds_fn(int(interval_seconds) * 1000000, utc_offset)
+        self._on_bar = on_bar
+        self._policy = policy
+        self._next = None # start of the next interval to emit
+        self._close = None
+        self._volume = None
+        self.late_bars = 0
+
+    @property
+    def policy(self):
+        return self._policy
+
+    def __call__(self, bar):
+        if self._next is not None:
+            if bar.epoch_micros < self._next:
+                self.late_bars += 1
+                return
+            self._fill(bar.epoch_micros)
+        # (align to our boundaries in case the engine's offset differs)
+        self._next = self._bounds(bar.epoch_micros)[1]
+        self._close = bar.close
+        self._volume = bar.volume
+        self._on_bar(bar)
+
+    def next_boundary(self):
+        """ end of the next interval that would be filled (or None) """
+        if self._next is None or self._policy == GAP_SKIP:
+            return None
+        return self._bounds(self._next)[1]
+
+    def advance(self, epoch_micros):
+        """ Emits synthetic bars for the intervals ending by epoch_micros """
+        if self._next is not None:
+            self._fill(epoch_micros, True)
+
+    def _fill(self, until, ended=False):
+        # synthetic bars for the intervals starting before until (or, if 
+        # ended, ending by until)
+        if self._policy == GAP_SKIP:
+            return
+        if self._policy == GAP_FFILL:
+            c = self._close
+            v = None if self._volume is None else 0
+        else:
+            c = float('nan')
+            v = None
+        while True:
+            em, end = self._bounds(self._next)
+            if (end if ended else em + 1) > until:
+                break
+            self._next = end
+            self._on_bar(Bar(em, c, c, c, c, v))
+
+
+
+_np = None
+# hold off on importing numpy until it's needed; it's optional
+def _try_import_numpy():
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np
+
+
+def resample(timestamps, prices, volumes, interval, utc_offset=0, 
+             cumulative=False):
+    """ Returns a list of Bar objects built from recorded ticks in bulk
+
+    Produces the same bars as a BarEngine fed the same ticks, using grouped
+    (vectorized) operations per bar - with numpy if it can be imported, 
+    otherwise builtins over array/list slices - instead of per-tick logic.
+
+    timestamps: epoch micro-seconds of each tick, oldest-first 
+    prices: price of each tick
+    volumes: volume of each tick (or None for bars without volume) 
+    interval: TimeInterval or int seconds (1 - 86400)
+    utc_offset: seconds ahead of UTC to align boundaries to, or LOCAL_TIME 
+                (per-tick, as BarEngine; see BarEngine)
+    cumulative: volumes are readings of the cumulative VOLUME topic (as 
+                BarEngine.push_volume) instead of per-tick volume
+    """
+    n = len(timestamps)
+    if len(prices) != n or (volumes is not None and len(volumes) != n):
+        raise ValueError("timestamps, prices and volumes must be the same length")
+    iv = _to_interval_seconds(interval) * 1000000
+    if not n:
+        return []
+    if utc_offset == LOCAL_TIME: # (boundaries move with DST)
+        return _resample_engine(timestamps, prices, volumes, iv, utc_offset, 
+                                cumulative)
+    off = int(utc_offset) * 1000000
+    np = _try_import_numpy()
+    if np:
+        return _resample_numpy(np, timestamps, prices, volumes, iv, off, cumulative)
+    return _resample_builtin(timestamps, prices, volumes, iv, off, cumulative)
+
+
+def _resample_engine(timestamps, prices, volumes, iv, utc_offset, cumulative):
+    # out-of-order ticks: per-tick, for the BarEngine semantics 
+    bars = []
+    e = BarEngine(iv // 1000000, bars.append, utc_offset, volumes is not None)
+    if volumes is None:
+        e.push_many(timestamps, prices)
+    else:
+        if not cumulative: # running sum, from a known 0 
+            e.push_volume(timestamps[0], 0)
+            cum, tot = [], 0
+            for v in volumes:
+                tot += v
+                cum.append(tot)
+            volumes = cum
+        e.push_many(timestamps, prices, timestamps, volumes)
+    e.flush()
+    return bars
+
+
+def _volume_deltas(volumes, cumulative):
+    # per-tick volume (None for the first cumulative reading)
+    if not cumulative:
+        return volumes
+    d = [None]
+    for last, v in zip(volumes, volumes[1:]):
+        d.append(v - last if v >= last else v)
+    return d
+
+
+def _resample_builtin(timestamps, prices, volumes, iv, off, cumulative):
+    buckets = _array('q', [(t + off) // iv for t in timestamps])
+    if any(a > b for a,b in zip(buckets, buckets[1:])):
+        return _resample_engine(timestamps, prices, volumes, iv, off // 1000000, 
+                                cumulative)
+    starts = [0] + [i for i in range(1, len(buckets)) if buckets[i] != buckets[i - 1]]
+    ends = starts[1:] + [len(buckets)]
+    prices = list(prices)
+    vols = None if volumes is None else _volume_deltas(list(volumes), cumulative)
+    bars = []
+    for s, e in zip(starts, ends):
+        p = prices[s:e]
+        if vols is None:
+            v = None
+        elif cumulative and s == 0: # started before the first reading
+            v = None
+        else:
+            v = sum(vols[s:e])
+        bars.append(Bar(buckets[s] * iv - off, p[0], max(p), min(p), p[-1], v))
+    return bars
+
+
+def _resample_numpy(np, timestamps, prices, volumes, iv, off, cumulative):
+    ts = np.asarray(timestamps, dtype=np.int64)
+    buckets = (ts + off) // iv
+    if (np.diff(buckets) < 0).any():
+        return _resample_engine(timestamps, prices, volumes, iv, off // 1000000, 
+                                cumulative)
+    p = np.asarray(prices)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(ts))
+    o = p[starts].tolist()
+    h = np.maximum.reduceat(p, starts).tolist()
+    l = np.minimum.reduceat(p, starts).tolist()
+    c = p[ends - 1].tolist()
+    t = (buckets[starts] * iv - off).tolist()
+    if volumes is None:
+        v = [None] * len(t)
+    else:
+        v = np.asarray(volumes)
+        if cumulative:
+            d = np.diff(v)
+            d = np.where(d < 0, v[1:], d)
+            v = np.concatenate((v[:1] * 0, d))
+        v = np.add.reduceat(v, starts).tolist()
+        if cumulative: # started before the first reading
+            v[0] = None
+    return [Bar(*b) for b in zip(t, o, h, l, c, v)]
+
+
+
+#
+# binary bar file: a 128 byte header - magic, version, record size, interval 
+# seconds, utc offset, item, topic(s) - followed by fixed-size little-endian 
+# records: epoch micro-seconds (int64), open/high/low/close (float64), 
+# volume (int64, -1 if unknown). Records are only ever appended whole; a
+# partial record at the end (a crash mid-write) is ignored by the reader and 
+# truncated by the next writer. 
+#
+BAR_FILE_MAGIC = b'TOSDBBAR'
+BAR_FILE_VERSION = 1
+_BAR_HEADER = _struct.Struct('<8sHHii32s32s44x')
+_BAR_RECORD = _struct.Struct('<qddddq')
+BAR_RECORD_DTYPE = [('epoch_micros','<i8'), ('open','<f8'), ('high','<f8'), 
+                    ('low','<f8'), ('close','<f8'), ('volume','<i8')]
+
+BarFileHeader = _namedtuple("BarFileHeader", ["version", "interval_seconds", 
+                                              "utc_offset", "item", "topic"])
+
+
+def _read_bar_header(raw, path):
+    if len(raw) < _BAR_HEADER.size:
+        raise ValueError("not a bar file (too small): " + str(path))
+    magic, ver, rsz, isec, off, item, topic = _BAR_HEADER.unpack_from(raw)
+    if magic != BAR_FILE_MAGIC:
+        raise ValueError("not a bar file (bad magic): " + str(path))
+    if ver != BAR_FILE_VERSION or rsz != _BAR_RECORD.size:
+        raise ValueError("unsupported bar file version/record size: " + str(path))
+    return BarFileHeader(ver, isec, off, item.rstrip(b'\0').decode(), 
+                         topic.rstrip(b'\0').decode())
+
+
+def _bar_header_str(name, s):
+    # item/topic as the (NUL-padded) 32 byte header field
+    try:
+        b = s.encode()
+    except (AttributeError, UnicodeError):
+        raise ValueError(name + " must be a (utf-8 encodable) str")
+    if len(b) > 32 or b'\0' in b:
+        raise ValueError(name + " must be at most 32 bytes (utf-8), without NULs")
+    return b
+
+
+
+class BarFileWriter:
+    """ Appends Bar objects to a binary bar file 
+
+    Creates the file (and header) if it doesn't exist; otherwise checks the 
+    header matches and truncates any partial record left at the end. Can be 
+    used directly as the on_bar callback of a BarEngine.
+
+    path: path of the file
+    interval_seconds: interval of the bars (stored in the header; 0 for 
+                      ActivityBarEngine bars)
+    item: item the bars are for (stored in the header)
+    topic: topic(s) the bars are for (stored in the header)
+    utc_offset: utc offset the bars are aligned to (stored in the header; 
+                LOCAL_TIME stores the current local offset)
+
+    item and topic must each encode to at most 32 bytes of utf-8, and 
+    utc_offset be within a day (+/- 86400 seconds), or ValueError is raised
+    before the file is touched.
+    """
+    def __init__(self, path, interval_seconds, item='', topic='', utc_offset=0):
+        if utc_offset == LOCAL_TIME:
+            utc_offset = local_utc_offset()
+        if not 0 <= int(interval_seconds) <= 86400:
+            raise ValueError("interval_seconds must be from 0 to 86400")
+        if not -86400 <= int(utc_offset) <= 86400:
+            raise ValueError("utc_offset must be from -86400 to 86400 seconds")
+        item_b = _bar_header_str("item", item)
+        topic_b = _bar_header_str("topic", topic)
+        self._path = path
+        try:
+            self._file = open(path, 'r+b')
+        except FileNotFoundError:
+            self._file = open(path, 'w+b')
+        try:
+            raw = self._file.read(_BAR_HEADER.size)
+            if not raw:
+                self._file.write(_BAR_HEADER.pack(BAR_FILE_MAGIC, BAR_FILE_VERSION, 
+                                                  _BAR_RECORD.size, 
+                                                  int(interval_seconds), 
+                                                  int(utc_offset), 
+                                                  item_b, topic_b))
+            else:
+                hdr = _read_bar_header(raw, path)
+                if hdr.interval_seconds != int(interval_seconds):
+                    raise ValueError("bar file interval (" + str(hdr.interval_seconds)
+                                     + ") != " + str(interval_seconds))
+                end = self._file.seek(0, _os.SEEK_END)
+                extra = (end - _BAR_HEADER.size) % _BAR_RECORD.size
+                if extra:
+                    self._file.truncate(end - extra)
+            self._file.seek(0, _os.SEEK_END)
+        except:
+            self._file.close()
+            raise
+
+    def __call__(self, bar):
+        self.write(bar)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def path(self):
+        return self._path
+
+    def write(self, bar):
+        self._file.write(self._pack(bar))
+
+    def write_many(self, bars):
+        self._file.write(b''.join(self._pack(b) for b in bars))
+
+    def flush(self, fsync=False):
+        self._file.flush()
+        if fsync:
+            _os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    @staticmethod
+    def _pack(bar):
+        return _BAR_RECORD.pack(bar[0], bar[1], bar[2], bar[3], bar[4], 
+                                -1 if bar[5] is None else int(bar[5]))
+
+
+
+class BarFileReader:
+    """ Reads a binary bar file through a (read-only) memory map 
+
+    Records are only unpacked when accessed: indexing/iterating returns Bar 
+    objects (volume None if unknown) and column() a list; with numpy, 
+    records() returns a structured array over the map itself (no copy) and 
+    column() a view of it. Records written after the reader is opened aren't 
+    seen until refresh().
+
+    path: path of the file
+    """
+    def __init__(self, path):
+        self._path = path
+        self._file = open(path, 'rb')
+        self._mm = None
+        try:
+            self.refresh()
+        except:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, indx):
+        if isinstance(indx, slice):
+            return [self[i] for i in range(*indx.indices(self._count))]
+        if indx < 0:
+            indx += self._count
+        if indx < 0 or indx >= self._count:
+            raise IndexError("bar index out of range")
+        return self._unpack(_BAR_RECORD.unpack_from(
+            self._mm, _BAR_HEADER.size + indx * _BAR_RECORD.size))
+
+    def __iter__(self):
+        end = _BAR_HEADER.size + self._count * _BAR_RECORD.size
+        for r in _BAR_RECORD.iter_unpack(self._mm[_BAR_HEADER.size:end]):
+            yield self._unpack(r)
+
+    @property
+    def header(self):
+        return self._header
+
+    def refresh(self):
+        """ Re-maps the file to pick up appended records """
+        self._release_map()
+        # (mmap raises its own ValueError for an empty file)
+        if _os.fstat(self._file.fileno()).st_size < _BAR_HEADER.size:
+            raise ValueError("not a bar file (too small): " + str(self._path))
+        self._mm = _mmap(self._file.fileno(), 0, access=_ACCESS_READ)
+        self._header = _read_bar_header(self._mm, self._path)
+        # ignore a partial record at the end
+        self._count = (len(self._mm) - _BAR_HEADER.size) // _BAR_RECORD.size
+
+    def records(self):
+        """ Returns a numpy structured array (BAR_RECORD_DTYPE) viewing the map """
+        np = _try_import_numpy()
+        if not np:
+            raise ImportError("records() requires numpy")
+        return np.frombuffer(self._mm, dtype=np.dtype(BAR_RECORD_DTYPE), 
+                             count=self._count, offset=_BAR_HEADER.size)
+
+    def column(self, name):
+        """ Returns one field (see BAR_RECORD_DTYPE) of every record; a numpy 
+            view if numpy is available, otherwise a list (volume of -1 means 
+            unknown) 
+        """
+        i = [f for f,_ in BAR_RECORD_DTYPE].index(name)
+        if _try_import_numpy():
+            return self.records()[name]
+        end = _BAR_HEADER.size + self._count * _BAR_RECORD.size
+        return [r[i] for r in _BAR_RECORD.iter_unpack(self._mm[_BAR_HEADER.size:end])]
+
+    def close(self):
+        self._release_map()
+        self._file.close()
+
+    def _release_map(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError: # records()/column() views still alive, let 
+                pass            # the map go when they do
+            self._mm = None
+
+    @staticmethod
+    def _unpack(r):
+        return Bar(r[0], r[1], r[2], r[3], r[4], None if r[5] < 0 else r[5])
+
+
+
+FSYNC_NEVER = 'never' # leave it to the OS
+FSYNC_BATCH = 'batch' # after every batch written
+FSYNC_CLOSE = 'close' # when a file is closed (and when the sink is)
+
+_SINK_CLOSE = object()
+_SINK_STOP = object()
+
+
+class AsyncFileSink:
+    """ Writes for many producers from one background thread
+
+    open_text() and open_bars() return handles whose write() only queues the 
+    data (blocking if the queue is full), so producers - e.g bar callbacks 
+    running on a BarAggregator thread - never wait on the disk. The thread 
+    writes queued data in batches, once flush_bytes are pending or the 
+    oldest pending write is flush_seconds old, and keeps at most 
+    max_open_files files open (least recently used are closed and reopened 
+    for append when needed). 
+
+    If writing a file fails its data is kept (and retried with every batch)
+    and the error is raised by the file's next write() or close() - which 
+    don't queue anything while it lasts - and by the sink's close() if the 
+    data still couldn't be written. write() to a closed sink raises 
+    ValueError; nothing written before close() is dropped.
+
+    max_queue: maximum number of queued writes
+    flush_bytes: pending bytes that trigger a batch
+    flush_seconds: maximum time data stays pending
+    fsync: FSYNC_NEVER, FSYNC_BATCH or FSYNC_CLOSE
+    max_open_files: maximum number of files kept open
+    """
+    def __init__(self, max_queue=10000, flush_bytes=65536, flush_seconds=1.0,
+                 fsync=FSYNC_NEVER, max_open_files=64):
+        if fsync not in (FSYNC_NEVER, FSYNC_BATCH, FSYNC_CLOSE):
+            raise ValueError("invalid fsync policy: " + str(fsync))
+        self._queue = _Queue(max_queue)
+        self._flush_bytes = flush_bytes
+        self._flush_seconds = flush_seconds
+        self._fsync = fsync
+        self._max_open = max(int(max_open_files), 1)
+        self._files = _OrderedDict() # path -> open file (LRU order)
+        self._lock = _Lock()
+        self._thread = None
+        self._closed = False
+        self._errors = {} # path -> error of its last write (until one works)
+        self._error_lock = _Lock() # (the thread never takes self._lock)
+
+    def open_text(self, path):
+        """ Truncates/creates a text file; returns a handle with write(str) and
+            close() 
+        """
+        open(path, 'w').close()
+        self._start()
+        return _SinkFile(self, path, lambda s: s.encode())
+
+    def open_bars(self, path, interval_seconds, item='', topic='', utc_offset=0):
+        """ Opens/creates a binary bar file (see BarFileWriter); returns a handle 
+            with write(Bar) (also callable, as an on_bar callback) and close() 
+        """
+        BarFileWriter(path, interval_seconds, item, topic, utc_offset).close()
+        self._start()
+        return _SinkFile(self, path, BarFileWriter._pack)
+
+    def close(self):
+        """ Writes everything queued, closes all files and stops the thread;
+            raises the error of a file whose data couldn't be written
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._closed = True
+            if thread: # (under the lock: nothing can be queued after it)
+                self._queue.put((_SINK_STOP, None))
+        if thread:
+            thread.join()
+        with self._error_lock:
+            errors, self._errors = self._errors, {}
+        if errors:
+            raise next(iter(errors.values()))
+
+    @property
+    def pending(self):
+        """ number of queued writes """
+        return self._queue.qsize()
+
+    def _put(self, path, data):
+        # (checked and queued under the lock so close() can't slip in between)
+        with self._lock:
+            if self._closed:
+                if data is _SINK_CLOSE: # (the sink closed everything itself)
+                    return
+                raise ValueError("AsyncFileSink is closed")
+            with self._error_lock:
+                err = self._errors.get(path)
+            if err is not None:
+                raise err
+            self._queue.put((path, data))
+
+    def _start(self):
+        with self._lock:
+            if self._closed:
+                raise ValueError("AsyncFileSink is closed")
+            if self._thread is None:
+                self._thread = _Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending = _OrderedDict() # path -> [bytes]
+        nbytes = 0
+        last = _time.monotonic()
+        while True:
+            wait = max(last + self._flush_seconds - _time.monotonic(), 0) \
+                   if pending else None
+            try:
+                path, data = self._queue.get(timeout=wait)
+            except _Empty:
+                path = data = None
+            if path is _SINK_STOP:
+                self._write(pending)
+                for p in list(self._files):
+                    self._close(p)
+                return
+            if data is _SINK_CLOSE:
+                chunks = pending.pop(path, [])
+                nbytes -= sum(len(c) for c in chunks)
+                if self._write({path: chunks}):
+                    self._close(path)
+                else: # (kept for the next batch)
+                    pending[path] = chunks
+                    nbytes += sum(len(c) for c in chunks)
+            elif path is not None:
+                if not pending: # (idle until now: the batch's time starts here)
+                    last = _time.monotonic()
+                pending.setdefault(path, []).append(data)
+                nbytes += len(data)
+            if nbytes >= self._flush_bytes or \
+                (pending and _time.monotonic() - last >= self._flush_seconds):
+                self._write(pending) # (leaves what failed)
+                nbytes = sum(len(c) for cs in pending.values() for c in cs)
+                last = _time.monotonic()
+
+    def _write(self, pending):
+        # writes, and removes from pending, the chunks of each path; the 
+        # chunks of a path that fails are left, with its error set
+        ok = True
+        for path in list(pending):
+            chunks = pending[path]
+            if chunks:
+                f = pos = None
+                try:
+                    f = self._file(path)
+                    pos = f.tell()
+                    f.write(b''.join(chunks))
+                    f.flush()
+                except Exception as e:
+                    # cut off anything partly written, for a clean retry
+                    self._files.pop(path, None)
+                    try:
+                        if f is not None:
+                            if pos is not None:
+                                f.truncate(pos)
+                            f.close()
+                    except Exception:
+                        pass
+                    self._set_error(path, e, "_write")
+                    ok = False
+                    continue
+                if self._fsync == FSYNC_BATCH:
+                    try:
+                        _os.fsync(f.fileno())
+                    except Exception as e: # (written; not known to be on disk)
+                        self._set_error(path, e, "_write")
+                        del pending[path]
+                        continue
+            del pending[path]
+            with self._error_lock:
+                self._errors.pop(path, None)
+        return ok
+
+    def _set_error(self, path, e, where):
+        print("- tosdb.intervalize.AsyncFileSink." + where + " ::", path, str(e), 
+              file=_stderr)
+        with self._error_lock:
+            self._errors[path] = e
+
+    def _file(self, path):
+        f = self._files.get(path)
+        if f is None:
+            while len(self._files) >= self._max_open:
+                self._close(next(iter(self._files)))
+            f = self._files[path] = open(path, 'ab')
+        else:
+            self._files.move_to_end(path)
+        return f
+
+    def _close(self, path):
+        f = self._files.pop(path, None)
+        if f is None:
+            return
+        try:
+            f.flush()
+            if self._fsync != FSYNC_NEVER:
+                _os.fsync(f.fileno())
+            f.close()
+        except Exception as e:
+            self._set_error(path, e, "_close")
+
+
+
+class _SinkFile:
+    # producer's handle to one file of an AsyncFileSink
+    def __init__(self, sink, path, encode):
+        self._sink = sink
+        self._path = path
+        self._encode = encode
+        self._closed = False
+
+    def __call__(self, obj):
+        self.write(obj)
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def write(self, obj):
+        if self._closed:
+            raise ValueError("write to closed sink file: " + self._path)
+        self._sink._put(self._path, self._encode(obj))
+
+    def close(self):
+        if not self._closed:
+            self._sink._put(self._path, _SINK_CLOSE) # (may raise a write error)
+            self._closed = True
+
+
+
+ADVANCE_TICKS = 'ticks' # advance engines to the newest tick of their streams
+ADVANCE_CLOCK = 'clock' # advance engines by the block's clock (minus grace)
+GRACE_SECONDS = 0.5
+SKEW_PASSES = 120 # passes with ticks a block's clock skew is estimated over
+
+
+class BarAggregator:
+    """ Shared poller for many (block, item, topic) streams
+
+    One thread (every update_seconds) drains the marker of each subscribed 
+    stream once - via stream_snapshot_from_marker - and passes the new ticks, 
+    oldest-first, to every subscriber of that stream as callback(epoch_micros, 
+    values), or to subscribe_many() subscribers as callback(batches) with one
+    (epoch_micros, values) batch per topic, from the same pass. With 
+    workers > 1 the blocks are drained in parallel.
+
+    Engines fed through subscribe_engine() (anything with BarEngine's 
+    push_many/advance/next_boundary), and their stages, are advance()'d 
+    after each pass. With advance_by=ADVANCE_CLOCK (the default) they're 
+    advanced to their block's clock minus grace_seconds, so a bar is emitted
+    when its interval ends, even if the stream goes quiet, and the thread 
+    wakes at the earliest engine boundary plus grace_seconds (or after 
+    update_seconds, whichever is first). A block's clock is the local clock
+    plus its skew, estimated from the ticks drained (a tick can't be stamped
+    later than the block's time when it was drained) over the last 
+    SKEW_PASSES passes that had any, so a block whose clock runs behind the
+    machine's doesn't lose ticks; until a block has had ticks its engines 
+    aren't advanced. A tick that still shows up after its bar was emitted
+    (held up longer than grace_seconds) is dropped, counted in the engine's
+    late_ticks and logged. With ADVANCE_TICKS each engine is advanced to 
+    the newest tick time seen on its own streams instead: no tick is late,
+    but a bar is only emitted once a tick past its end arrives.
+
+    A stream, or subscriber, that raises is logged and skipped for that pass;
+    it doesn't stop the others or the thread.
+
+    update_seconds: maximum seconds between passes
+    workers: number of blocks drained at once (by a pool kept until stop())
+    grace_seconds: with ADVANCE_CLOCK, how long after a boundary a bar is 
+                   emitted (time for its last ticks to show up in the block)
+    advance_by: ADVANCE_TICKS or ADVANCE_CLOCK
+    """
+    def __init__(self, update_seconds=1, workers=1, grace_seconds=GRACE_SECONDS,
+                 advance_by=ADVANCE_CLOCK):
+        if update_seconds <= 0:
+            raise ValueError("update_seconds must be > 0")
+        if grace_seconds < 0:
+            raise ValueError("grace_seconds must be >= 0")
+        if advance_by not in (ADVANCE_TICKS, ADVANCE_CLOCK):
+            raise ValueError("invalid advance_by: " + str(advance_by))
+        self._update_seconds = update_seconds
+        self._workers = max(int(workers), 1)
+        self._grace = grace_seconds
+        self._advance_by = advance_by
+        self._subs = {} # block -> [(((item, topic),..), callback, many),..]
+        # sub -> (block, (engine, stages..), [newest tick, late ticks]) 
+        self._engines = {} # (subscribe_engine)
+        self._skews = {} # block -> deque of (newest tick - drain time) per pass
+        self._lock = _Lock()
+        self._stop_event = _Event()
+        self._thread = None
+        self._pool = None
+
+    def subscribe(self, block, item, topic, callback):
+        """ Adds a callback(epoch_micros, values) for a stream; returns a token 
+            for unsubscribe() 
+        """
+        return self._subscribe(block, item, (topic,), callback, False)
+
+    def subscribe_many(self, block, item, topics, callback):
+        """ Adds a callback(batches) for the streams of an item's topics; 
+            batches is a list of one (epoch_micros, values) per topic, passed 
+            together if any of them has new data, covering the same span of
+            time; returns a token for unsubscribe() 
+        """
+        return self._subscribe(block, item, topics, callback, True)
+
+    def subscribe_engine(self, block, item, topic, engine, volume_topic=None, 
+                         stages=()):
+        """ Feeds a stream - and optionally, merged by time, a cumulative 
+            volume (or, for an ActivityBarEngine, LAST_SIZE) stream - into a 
+            BarEngine, MultiBarEngine or ActivityBarEngine; stages (e.g a 
+            GapFill between the engine and its sink) are advance()'d after 
+            the engine, in order; returns a token for unsubscribe() 
+        """
+        seen = [None, getattr(engine, 'late_ticks', 0)]
+        def _seen(newest):
+            if seen[0] is None or newest > seen[0]:
+                seen[0] = newest
+            late = getattr(engine, 'late_ticks', 0)
+            if late > seen[1]:
+                print("- tosdb.intervalize.BarAggregator ::", item, topic, 
+                      late - seen[1], "late tick(s) dropped", file=_stderr)
+                seen[1] = late
+        if volume_topic is None:
+            def _cb(ems, vals):
+                engine.push_many(ems, vals)
+                _seen(ems[-1])
+            token = self.subscribe(block, item, topic, _cb)
+        else:
+            def _cb(batches):
+                (ems, vals), (vems, vols) = batches
+                engine.push_many(ems, vals, vems, vols)
+                _seen(max(b[-1] for b in (ems, vems) if b))
+            token = self.subscribe_many(block, item, (topic, volume_topic), _cb)
+        with self._lock:
+            self._engines[token[1]] = (block, (engine,) + tuple(stages), seen)
+        return token
+
+    def unsubscribe(self, token):
+        block, sub = token
+        with self._lock:
+            subs = self._subs.get(block, [])
+            if sub in subs:
+                subs.remove(sub)
+            if not subs:
+                self._subs.pop(block, None)
+                self._skews.pop(block, None)
+            self._engines.pop(sub, None)
+
+    def _subscribe(self, block, item, topics, callback, many):
+        if not callable(callback):
+            raise TypeError("callback must be callable")
+        sub = (tuple((item.upper(), t.upper()) for t in topics), callback, many)
+        with self._lock:
+            self._subs.setdefault(block, []).append(sub)
+        return (block, sub)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = _Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._shutdown_pool()
+
+    def join(self):
+        if self._thread:
+            self._thread.join()
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def poll(self):
+        """ Drains every subscribed stream once """
+        with self._lock:
+            work = [(blk, list(subs)) for blk,subs in self._subs.items()]
+        if self._workers > 1 and len(work) > 1:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = _ThreadPoolExecutor(self._workers)
+                pool = self._pool
+            skews = list(pool.map(lambda w: self._drain(*w), work))
+        else:
+            skews = [self._drain(*w) for w in work]
+        with self._lock:
+            for (blk,_), skew in zip(work, skews):
+                if skew is not None and blk in self._subs:
+                    d = self._skews.get(blk)
+                    if d is None:
+                        d = self._skews[blk] = _deque(maxlen=SKEW_PASSES)
+                    d.append(skew)
+
+    def skew_micros(self, block):
+        """ estimated skew of block's clock (ahead of the local clock), or 
+            None if it hasn't had any ticks 
+        """
+        with self._lock:
+            d = self._skews.get(block)
+            return max(d) if d else None
+
+    def advance(self, epoch_micros=None):
+        """ advance()'s every engine (and stage) of subscribe_engine() to 
+            epoch_micros, or if None by advance_by: each to its block's clock
+            minus grace_seconds, or to the newest tick of its streams
+        """
+        now = int(_time.time() * 1000000) - int(self._grace * 1000000)
+        with self._lock:
+            engines = list(self._engines.values())
+            skews = {b : max(d) for b,d in self._skews.items() if d}
+        for blk, es, seen in engines:
+            if epoch_micros is not None:
+                em = epoch_micros
+            elif self._advance_by == ADVANCE_CLOCK:
+                em = skews.get(blk)
+                em = None if em is None else now + em
+            else:
+                em = seen[0]
+            if em is None:
+                continue
+            for e in es:
+                try:
+                    e.advance(em)
+                except Exception as e:
+                    print("- tosdb.intervalize.BarAggregator.advance ::", str(e), 
+                          file=_stderr)
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                wait = self._update_seconds
+                try:
+                    self.poll()
+                    self.advance()
+                    if self._advance_by == ADVANCE_CLOCK:
+                        wait = self._next_wait(_time.time())
+                except Exception as e:
+                    print("- tosdb.intervalize.BarAggregator._run ::", str(e), 
+                          file=_stderr)
+                self._stop_event.wait(wait)
+        finally:
+            self._shutdown_pool()
+
+    def _shutdown_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _next_wait(self, now):
+        # until the earliest boundary (in local time) + grace, but no more 
+        # than update_seconds
+        with self._lock:
+            skews = {b : max(d) for b,d in self._skews.items() if d}
+            ends = [(e.next_boundary(), skews.get(blk)) 
+                    for blk,es,_ in self._engines.values() for e in es]
+        ends = [(end - skew) for end,skew in ends 
+                if end is not None and skew is not None]
+        if not ends:
+            return self._update_seconds
+        wait = min(ends) / 1000000 + self._grace - now
+        return min(max(wait, 0), self._update_seconds)
+
+    @staticmethod
+    def _drain(block, subs):
+        # every stream is drained before any callback; the topics of the
+        # subscribe_many() callbacks (merged by time, e.g LAST and VOLUME) 
+        # are drained again - all but the last one - so a tick stamped before
+        # another topic's newest reading isn't left for the next pass (where
+        # it would be late for the bar that reading rolled)
+        order = []
+        for keys, _, _ in subs:
+            order.extend(k for k in keys if k not in order)
+        batches = {key : BarAggregator._drain_stream(block, *key) for key in order}
+        merged = set(k for keys,_,many in subs if many and len(keys) > 1 for k in keys)
+        for key in [k for k in order if k in merged][:-1]:
+            ems, vals = BarAggregator._drain_stream(block, *key)
+            if ems:
+                b = batches[key]
+                batches[key] = (list(b[0]) + list(ems), list(b[1]) + list(vals))
+        # the block's clock was at least the newest tick when drained
+        newest = [ems[-1] for ems,_ in batches.values() if ems]
+        skew = max(newest) - int(_time.time() * 1000000) if newest else None
+        for keys, cb, many in subs:
+            try:
+                if many:
+                    b = [batches[k] for k in keys]
+                    if any(ems for ems,_ in b):
+                        cb(b)
+                else:
+                    ems, vals = batches[keys[0]]
+                    if ems:
+                        cb(ems, vals)
+            except Exception as e:
+                print("- tosdb.intervalize.BarAggregator._drain ::", keys, str(e), 
+                      file=_stderr)
+        return skew
+
+    @staticmethod
+    def _drain_stream(block, item, topic):
+        #
+        # Using a 'lazy' approach here:
+        #
+        # We are only looking for the roll(s) accross the interval of
+        # actual (received) data-points; we don't deal with a 'data gap'
+        # (by assuming a certain price or using the last price recieved).
+        # This means there may be gaps in the output.
+        #
+        # Checking should be done at the next layer where different, though
+        # less robust, strategies can be employed to fill in missing data
+        # (see GapFill).
+        #
+        try:
+            dat = block.stream_snapshot_from_marker(item, topic, date_time=True,
+                                                    throw_if_data_lost=False)
+            if not dat:
+                return ([], [])
+            # snapshots are most-recent-first, subscribers want oldest-first
+            return (dat.epoch_micros()[::-1], dat.data[::-1])
+        except Exception as e:
+            print("- tosdb.intervalize.BarAggregator._drain_stream ::", item, topic, 
+                  str(e), file=_stderr)
+            return ([], [])
+
+
+
 class _GetOnInterval:       
     def __init__(self,block,item,topic):    
         if not isinstance(block, tosdb._TOSDB_DataBlock):
@@ -71,130 +1644,144 @@ class GetOnTimeInterval(_GetOnInterval):
             raise ValueError("block does not have datetime enabled")
         self._run_callback = None
         self._stop_callback = None
+        self._engine = None
+        self._aggregator = None
+
+    _volume_topic = None # cumulative volume topic merged into the bars (if any)
 
     def __del__(self):
-        self.stop()
+        if getattr(self, '_rflag', False): # (not if __init__ raised)
+            self.stop()
 
     @classmethod
     def send_to_file(cls, block, item, topic, file_path, 
                      time_interval=TimeInterval.five_min, update_seconds=15, 
-                     use_pre_roll_val=False ):                     
-        try:    
-            i = GetOnTimeInterval( block, item, topic )
-            i._file = open(file_path,'w',1)
-            cls._write_header(block, item, topic, i._file, time_interval, 
-                              update_seconds)          
-            def run_cb(self,x):
-                x = x[0] if use_pre_roll_val else x[1]          
-                i._file.write(str(x[1]).ljust(50) + str(x[0]) + '\n' ) 
-                            
-            stop_cb = lambda: i._file.close()
-            if cls._check_start_args(run_cb, stop_cb, time_interval, update_seconds):
-                i.start( run_cb, stop_cb, time_interval, update_seconds)                
-            return i
-        except Exception as e:
-            print("- tosdb.intervalize.GetOnTimeInterval.send_to_file ::", str(e), file=_stderr)
-            i._file.close()     
+                     use_pre_roll_val=False, aggregator=None, sink=None, gap_fill=None,
+                     advance_by=ADVANCE_CLOCK, grace_seconds=GRACE_SECONDS):
+        """ Writes a line per bar to file_path (or a file of sink)
+
+        The value written is the first value after the bar (the one that 
+        rolled it; the close if the bar was ended by time), or with 
+        use_pre_roll_val - or gap_fill - the bar's close.
+
+        The other args are start()'s. Returns the started object, or None if
+        it couldn't be created or started (the error is printed to stderr, 
+        the file closed).
+        """
+        def fmt(self, bar):
+            return str(self._roll_val(bar, use_pre_roll_val))
+        return cls._start_file("GetOnTimeInterval", 
+                               lambda: GetOnTimeInterval(block, item, topic),
+                               block, item, topic, file_path, fmt, time_interval, 
+                               update_seconds, sink, 
+                               (aggregator, gap_fill, advance_by, grace_seconds))
             
 
     def start(self, run_callback, stop_callback,
-              time_interval=TimeInterval.five_min, update_seconds=15):        
+              time_interval=TimeInterval.five_min, update_seconds=15, 
+              aggregator=None, gap_fill=None, advance_by=ADVANCE_CLOCK, 
+              grace_seconds=GRACE_SECONDS):
+        """ Calls run_callback(self, bar) for each bar of the stream
+
+        aggregator: a BarAggregator to share; if None one is created (with
+                    update_seconds, advance_by and grace_seconds) for this 
+                    object and run until stop()
+        gap_fill: GAP_FFILL, GAP_NAN or GAP_SKIP to fill intervals with no 
+                  ticks (None to leave them out)
+        """
         self._check_start_args(run_callback, stop_callback,
                                time_interval, update_seconds)
         self._run_callback = run_callback
         self._stop_callback = stop_callback
-        self._interval_seconds = int(time_interval.val)        
-        self._update_seconds = int(update_seconds)
+        self._interval_seconds = _to_interval_seconds(time_interval)        
+        self._update_seconds = update_seconds
+        # bars start on local hours/days, like the clock (DST changes included)
+        offset = LOCAL_TIME
+        on_bar = lambda bar: self._run_callback(self, bar)
+        # optionally fill in intervals with no ticks (GAP_FFILL etc.)
+        stages = () if gap_fill is None else \
+                 (GapFill(self._interval_seconds, on_bar, gap_fill, offset),)
+        self._gap_fill = gap_fill
+        self._engine = BarEngine(self._interval_seconds, 
+                                 stages[0] if stages else on_bar,
+                                 offset, self._volume_topic is not None)
+        # without a shared aggregator use our own (one thread per object)
+        self._own_aggregator = aggregator is None
+        self._aggregator = BarAggregator(self._update_seconds, 
+                                         grace_seconds=grace_seconds,
+                                         advance_by=advance_by) \
+                           if aggregator is None else aggregator
+        self._token = self._aggregator.subscribe_engine(self._block, self._item, 
+                                                        self._topic, self._engine,
+                                                        self._volume_topic, stages)
         self._rflag = True
-        try:
-            self._thread = _Thread( target=self._update, daemon=True )
-        except:
-            self._thread = _Thread( target=self._update )
-        self._thread.start()        
+        if self._own_aggregator or not self._aggregator.running:
+            self._aggregator.start()
        
      
     def stop(self):
-        self._rflag = False
+        if self._rflag:
+            self._rflag = False
+            self._aggregator.unsubscribe(self._token)
+            if self._own_aggregator:
+                self._aggregator.stop()
         if self._stop_callback:
             self._stop_callback()
 
 
     def join(self):
-        if self._thread:
-            self._thread.join()
+        if self._aggregator:
+            self._aggregator.join()
 
 
-    def _update(self):
-        carry = []
-        get_next_seg = getattr(self._block,'stream_snapshot_from_marker')       
-        while self._rflag:
-            #
-            # Using a 'lazy' approach here:
-            #
-            # We are only looking for the roll(s) accross the interval of
-            # actual (received) data-points; we don't deal with a 'data gap'
-            # (by assuming a certain price or using the last price recieved).
-            # This means there may be gaps in the output.
-            #
-            # Checking should be done at the next layer where different, though
-            # less robust, strategies can be employed to fill in missing data.
-            #
-            try:                
-                dat = get_next_seg(self._item, self._topic, date_time=True,
-                                   throw_if_data_lost = False)                                     
-                if dat and len(dat) >= 1:
-                    dat += carry
-                    carry = self._find_roll_points( dat )                                  
-                for i in range(self._update_seconds):
-                    _time.sleep( 1 )
-                    if not self._rflag:
-                        break
-            except Exception as e:          
-                print("- tosdb.intervalize.GetOnTimeInterval._update ::", str(e), file=_stderr)
-                self.stop()
-                raise 
-            
-        
-    def _find_roll_points(self, snapshot):
-        last_item = snapshot[-1]        
-        do_mod = self._get_do_mod()
-        gapd = lambda t,l: (t[1].mktime - l[1].mktime) > self._interval_seconds
-        riter = reversed(snapshot[:-1])
-        rmndr = [last_item]   
-        
-        for this_item in riter:
-            last_mod = do_mod(last_item)
-            this_mod = do_mod(this_item)            
-            if last_mod > this_mod or gapd(this_item,last_item):
-                # if we break into coniguous interval or 'gap' it           
-                self._run_callback(self,(last_item,this_item)) # (older,newer)                
-                rmndr = [this_item]          
-            else:                
-                rmndr.insert(0,this_item)
-            last_item = this_item
-
-        # dont need all the rmndr, but will be useful for more advanced ops
-        return rmndr
-
-
-    def _get_do_mod(self):
-        if self._interval_seconds <= 60:
-            return lambda i: i[1].sec % self._interval_seconds       
-        elif self._interval_seconds <= 3600:              
-            return lambda i: i[1].min % (self._interval_seconds / 60)          
-        elif self._interval_seconds <= 86400:
-            return lambda i: i[1].hour % (self._interval_seconds / 3600)            
-        else:
-            raise ValueError("invalid TimeInterval") 
+    def _roll_val(self, bar, use_pre_roll_val):
+        # the last value of 'bar' or the first value after it (the value that 
+        # rolled it) if the next bar has started; with gap fill always the 
+        # bar's own close, as a filled bar has no value that rolled it
+        nxt = self._engine.current
+        if use_pre_roll_val or self._gap_fill is not None or nxt is None \
+           or nxt.epoch_micros <= bar.epoch_micros:
+            return bar.close
+        return nxt.open
          
        
+    @classmethod
+    def _start_file(cls, name, create, block, item, topics, file_path, fmt,
+                    time_interval, update_seconds, sink, start_args):
+        # the body of the send_to_file methods: create() the object, open the
+        # file and start writing fmt(self, bar) lines; None on failure
+        i = f = None
+        try:
+            i = create()
+            f = cls._open_file(file_path, sink)
+            cls._write_header(block, item, topics, f, time_interval, update_seconds)
+            def run_cb(self, bar):
+                f.write(str(bar.date_time).ljust(50) + fmt(self, bar) + '\n')
+            i._file = f
+            i.start(run_cb, f.close, time_interval, update_seconds, *start_args)
+            return i
+        except Exception as e:
+            print("- tosdb.intervalize." + name + ".send_to_file ::", str(e), 
+                  file=_stderr)
+            if i is not None:
+                i._stop_callback = None # (the file is closed below)
+                i.stop()
+            if f is not None:
+                f.close()
+
+
+    @staticmethod
+    def _open_file(file_path, sink=None):
+        # line-buffered file of our own, or a handle to a shared AsyncFileSink
+        return open(file_path,'w',1) if sink is None else sink.open_text(file_path)
+
+
     @staticmethod
     def _write_header(block, item, topic, file, time_interval, update_seconds):
-        file.seek(0)
         file.write(str(block.info()) + '\n')
         file.write('item: ' + item + '\n')
         file.write('topic(s): ' + topic + '\n')
-        file.write('time_interval(sec): ' + str(time_interval.val) + '\n')
+        file.write('time_interval(sec): ' + str(_to_interval_seconds(time_interval)) + '\n')
         file.write('update_seconds: ' + str(update_seconds) + '\n\n')       
           
 
@@ -202,14 +1789,11 @@ class GetOnTimeInterval(_GetOnInterval):
     def _check_start_args(run_callback, stop_callback, time_interval, update_seconds):
         if not callable(run_callback) or not callable(stop_callback):                    
             raise TypeError( "callback must be callable")
-        if time_interval not in TimeInterval:
-            raise TypeError( "time_interval must be of type TimeInterval")
-        if divmod(time_interval.val,60)[1] != 0:
-            raise ValueError( "time_interval not divisible by 60")
-        if update_seconds > (time_interval.val / 2):
+        isec = _to_interval_seconds(time_interval)
+        if update_seconds <= 0:
+            raise ValueError( "update_seconds must be greater than 0")
+        if update_seconds > (isec / 2):
             raise ValueError( "update_seconds greater than half time_interval")
-        if divmod(time_interval.val,update_seconds)[1] != 0:
-            raise ValueError( "time_interval not divisible by update_seconds")
         return True
 
 
@@ -221,68 +1805,34 @@ class GetOnTimeInterval_C(GetOnTimeInterval):
     @classmethod
     def send_to_file(cls, block, item, file_path,
                      time_interval=TimeInterval.five_min, update_seconds=15, 
-                     use_pre_roll_val=False):   
+                     use_pre_roll_val=False, aggregator=None, sink=None, gap_fill=None,
+                     advance_by=ADVANCE_CLOCK, grace_seconds=GRACE_SECONDS):
 
         return super().send_to_file(block, item, 'last', file_path, time_interval, 
-                                    update_seconds, use_pre_roll_val)                         
+                                    update_seconds, use_pre_roll_val, aggregator, 
+                                    sink, gap_fill, advance_by, grace_seconds)                         
 
 
 
 class GetOnTimeInterval_OHLC(GetOnTimeInterval):
     def __init__(self,block,item):
         GetOnTimeInterval.__init__(self,block,item,'last')
-        self._o = self._h = self._l = self._c = None
 
     @classmethod
     def send_to_file(cls, block, item, file_path, 
-                     time_interval=TimeInterval.five_min, update_seconds=15 ):     
-        try:
-            i = cls(block,item)
-            i._file = open(file_path,'w',1)
-            GetOnTimeInterval._write_header(block, item, 'last', i._file,
-                                            time_interval, update_seconds)             
-            def run_cb(self, x):                          
-                i._file.write( str(x[1]).ljust(50) + str(x[0]) + '\n' )
-                
-            stop_cb = lambda : i._file.close()
-            if cls._check_start_args(run_cb, stop_cb, time_interval, update_seconds):
-                i.start(run_cb, stop_cb, time_interval, update_seconds)
-            return i
-        except Exception  as e:
-            print("- tosdb.intervalize.GetOnTimeInterval_OHLC.send_to_file ::", 
-                  str(e), file=_stderr)
-            i._file.close()    
-
-
-    def _find_roll_points(self, snapshot):
-        last_item = snapshot[-1]
-        if self._o is None:
-            self._o = self._h = self._l = last_item[0]                   
-        do_mod = self._get_do_mod()
-        gapd = lambda t,l: (t[1].mktime - l[1].mktime) > self._interval_seconds
-        riter = reversed(snapshot[:-1])
-        rmndr = [last_item]     
-      
-        for this_item in riter:
-            p = this_item[0]
-            if p > self._h:
-                self._h = p
-            elif p < self._l:
-                self._l = p           
-            last_mod = do_mod(last_item)
-            this_mod = do_mod(this_item)   
-            if last_mod > this_mod or gapd(this_item,last_item):    
-                # if we break into coniguous interval or 'gap' it
-                ohlc = (self._o,self._h,self._l,this_item[0])
-                self._o = self._h = self._l = this_item[0]
-                self._run_callback(self,(ohlc,this_item[1]))                 
-                rmndr = [this_item]          
-            else:                
-                rmndr.insert(0,this_item)
-            last_item = this_item
-            
-        # dont need all the rmndr, but will be useful for more advanced ops
-        return rmndr
+                     time_interval=TimeInterval.five_min, update_seconds=15,
+                     aggregator=None, sink=None, gap_fill=None,
+                     advance_by=ADVANCE_CLOCK, grace_seconds=GRACE_SECONDS):
+        return cls._start_file("GetOnTimeInterval_OHLC", lambda: cls(block, item),
+                               block, item, 'last', file_path, 
+                               lambda self, bar: str(bar[1:5]), time_interval, 
+                               update_seconds, sink, 
+                               (aggregator, gap_fill, advance_by, grace_seconds))
+
+
+
+def _volume_str(bar):
+    return 'N/A ' if bar.volume is None else str(int(bar.volume))
 
 
 
@@ -291,34 +1841,20 @@ class GetOnTimeInterval_OHLCV(GetOnTimeInterval_OHLC):
         if 'VOLUME' not in block.topics():
             raise ValueError("block does not have topic: volume")
         GetOnTimeInterval_OHLC.__init__(self,block,item)
-        self._o = self._h = self._l = self._c = None
-        self._last_vol = None
+
+    _volume_topic = 'VOLUME'
 
     @classmethod
     def send_to_file(cls, block, item, file_path,
-                     time_interval=TimeInterval.five_min, update_seconds=15):
-        try:
-            i = cls(block,item)
-            i._file = open(file_path,'w',1)
-            GetOnTimeInterval_OHLC._write_header(block, item, "last, volume", i._file, 
-                                                 time_interval, update_seconds)             
-            def run_cb(self,x):                          
-                i._file.write(str(x[1]).ljust(50) + str(x[0]) + ' ') 
-                v = block.get(item,'volume')
-                if self._last_vol:                    
-                    i._file.write(str(int(v - self._last_vol)) + '\n')
-                else:
-                    i._file.write('N/A \n')
-                self._last_vol = v
-              
-            stop_cb = lambda : i._file.close()
-            if cls._check_start_args(run_cb, stop_cb, time_interval, update_seconds):
-                i.start( run_cb, stop_cb, time_interval, update_seconds)
-            return i
-        except Exception  as e:
-            print("- tosdb.intervalize.GetOnTimeInterval_OHLCV.send_to_file ::", 
-                  str(e), file=_stderr)
-            i._file.close()    
+                     time_interval=TimeInterval.five_min, update_seconds=15,
+                     aggregator=None, sink=None, gap_fill=None,
+                     advance_by=ADVANCE_CLOCK, grace_seconds=GRACE_SECONDS):
+        def fmt(self, bar):
+            return str(bar[1:5]) + ' ' + _volume_str(bar)
+        return cls._start_file("GetOnTimeInterval_OHLCV", lambda: cls(block, item),
+                               block, item, "last, volume", file_path, fmt, 
+                               time_interval, update_seconds, sink, 
+                               (aggregator, gap_fill, advance_by, grace_seconds))
 
 
 
@@ -327,35 +1863,20 @@ class GetOnTimeInterval_CV(GetOnTimeInterval_C):
         if 'VOLUME' not in block.topics():
             raise ValueError("block does not have topic: volume" )
         GetOnTimeInterval_C.__init__(self,block,item)     
-        self._last_vol = None
+
+    _volume_topic = 'VOLUME'
 
     @classmethod
     def send_to_file(cls, block, item, file_path,
                      time_interval=TimeInterval.five_min, update_seconds=15, 
-                     use_pre_roll_val=False):     
-        try:
-            i = cls(block,item)
-            i._file = open(file_path,'w',1)
-            GetOnTimeInterval_C._write_header(block, item, "last, volume", i._file, 
-                                              time_interval, update_seconds)             
-            def run_cb(self,x):                          
-                x = x[0] if use_pre_roll_val else x[1]          
-                i._file.write(str(x[1]).ljust(50) + str(x[0]) + ' ')
-                v = block.get(item,'volume')
-                if self._last_vol:                    
-                    i._file.write(str(int(v - self._last_vol)) + '\n')
-                else:
-                    i._file.write('N/A \n')
-                self._last_vol = v
-              
-            stop_cb = lambda : i._file.close()
-            if cls._check_start_args(run_cb, stop_cb, time_interval, update_seconds):                
-                i.start( run_cb, stop_cb, time_interval, update_seconds)
-            return i
-        except Exception as e:
-            print("- tosdb.intervalize.GetOnTimeInterval_CV.send_to_file ::", 
-                  str(e), file=_stderr)
-            i._file.close()    
+                     use_pre_roll_val=False, aggregator=None, sink=None, gap_fill=None,
+                     advance_by=ADVANCE_CLOCK, grace_seconds=GRACE_SECONDS):
+        def fmt(self, bar):
+            return str(self._roll_val(bar, use_pre_roll_val)) + ' ' + _volume_str(bar)
+        return cls._start_file("GetOnTimeInterval_CV", lambda: cls(block, item),
+                               block, item, "last, volume", file_path, fmt, 
+                               time_interval, update_seconds, sink, 
+                               (aggregator, gap_fill, advance_by, grace_seconds))    
 
 
   
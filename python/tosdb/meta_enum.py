@@ -45,7 +45,7 @@ class MetaEnum(type):
 
 
     def __new__(cls,name,bases,d):
-        from collections import Mapping       
+        from collections.abc import Mapping       
             
         # restrict subclassing
         for b in bases:          
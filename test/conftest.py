@@ -0,0 +1,28 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see 
+#   <http://www.gnu.org/licenses/>.
+
+""" pytest setup: the test_*.py files run against the package in ../python 
+    without the engine/DLL; tosdb_test.py and engine_test.py are scripts that 
+    need a running engine and are run by hand (see their --help)
+"""
+
+import os as _os
+import sys as _sys
+
+_sys.path.insert(0, _os.path.join(_os.path.dirname(_os.path.abspath(__file__)), 
+                                  '..', 'python'))
+
+collect_ignore = ['tosdb_test.py', 'engine_test.py']
@@ -0,0 +1,206 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see 
+#   <http://www.gnu.org/licenses/>.
+
+
+""" BlockGroup over in-memory blocks """
+
+from collections import namedtuple
+
+import pytest
+
+from tosdb._common import TOSDB_Error, TOSDB_ValueError, MultiSnapshot
+from tosdb.block_group import BlockGroup
+
+
+class MemBlock:
+    """ the parts of the DataBlock interface BlockGroup uses; items named 
+        'BAD*' are rejected like the engine rejects bad symbols 
+    """
+    count = 0
+    live = 0
+
+    def __init__(self, size, date_time, timeout):
+        MemBlock.count += 1
+        MemBlock.live += 1
+        self.name = "mem" + str(MemBlock.count)
+        self.size = size
+        self.closed = False
+        self._items = []
+        self._topics = []
+
+    def close(self):
+        assert not self.closed
+        self.closed = True
+        MemBlock.live -= 1
+
+    def info(self):
+        return {"Name": self.name}
+
+    def get_block_size(self):
+        return self.size
+
+    def set_block_size(self, sz):
+        self.size = sz
+
+    def items(self, str_max=0):
+        return list(self._items)
+
+    def items_precached(self, str_max=0):
+        return []
+
+    def topics(self, str_max=0):
+        return list(self._topics)
+
+    def topics_precached(self, str_max=0):
+        return []
+
+    def add_items(self, *items):
+        bad = [i for i in items if i.startswith('BAD')]
+        self._items.extend(i for i in items if i not in bad and i not in self._items)
+        if bad:
+            raise TOSDB_Error("add_items failed", "bad items: " + str(bad))
+
+    def add_topics(self, *topics):
+        self._topics.extend(t for t in topics if t not in self._topics)
+
+    def remove_items(self, *items):
+        self._items = [i for i in self._items if i not in items]
+
+    def remove_topics(self, *topics):
+        self._topics = [t for t in self._topics if t not in topics]
+
+    def get(self, item, topic, **kwargs):
+        return (self.name, item, topic)
+
+    def multi_snapshot(self, pairs, depth, date_time, data_str_max, threaded):
+        return MultiSnapshot(pairs, [(self.name,) + p for p in pairs], None)
+
+    def item_frame(self, topic, date_time, labels, data_str_max, label_str_max):
+        if not labels:
+            return [self.name + ':' + i for i in self._items]
+        nt = namedtuple(topic, self._items)
+        return nt(*[self.name] * len(self._items))
+
+    def total_frame(self, date_time, labels, data_str_max, label_str_max):
+        return {i : self.name for i in self._items} if labels else list(self._items)
+
+
+def _group(max_items=4, **kwargs):
+    g = BlockGroup(10, False, max_items=max_items, block_factory=MemBlock, **kwargs)
+    g.add_topics('last', 'volume')
+    return g
+
+
+SYMS = ['S%02d' % i for i in range(10)]
+
+
+def test_items_spread_across_blocks():
+    g = _group()
+    g.add_items(*SYMS)
+    blocks = g.blocks
+    assert [b.items() for b in blocks] == [SYMS[:4], SYMS[4:8], SYMS[8:]]
+    assert g.items() == SYMS and g.topics() == ['LAST', 'VOLUME']
+    assert all(b.topics() == ['LAST', 'VOLUME'] for b in blocks)
+    assert g.info()["Blocks"] == 3
+    # new items go to the least loaded block with room
+    g.add_items('s10', 'S10')
+    assert blocks[2].items() == SYMS[8:] + ['S10']
+    assert g.block_of('s10') is blocks[2]
+
+
+def test_reads_go_to_the_owner():
+    g = _group()
+    g.add_items(*SYMS)
+    assert g.get('S05', 'LAST') == (g.block_of('S05').name, 'S05', 'LAST')
+    with pytest.raises(TOSDB_ValueError):
+        g.get('XXX', 'LAST')
+    snap = g.multi_snapshot([('S09', 'LAST'), ('S00', 'LAST'), ('S05', 'VOLUME')], 1)
+    assert snap.pairs == (('S09', 'LAST'), ('S00', 'LAST'), ('S05', 'VOLUME'))
+    assert [d[0] for d in snap.data] == [g.block_of(i).name for i in ('S09', 'S00', 'S05')]
+
+
+def test_frames_are_merged_in_item_order():
+    g = _group()
+    g.add_items(*SYMS)
+    fr = g.item_frame('LAST')
+    assert type(fr)._fields == tuple(SYMS)
+    assert fr.S09 == g.block_of('S09').name
+    assert len(g.item_frame('LAST', labels=False)) == len(SYMS)
+    assert sorted(g.total_frame()) == SYMS
+
+
+def test_bad_items_are_reported():
+    g = _group()
+    with pytest.raises(TOSDB_Error) as e:
+        g.add_items('S00', 'BAD1', 'S01')
+    assert "BAD1" in str(e.value)
+    assert g.items() == ['S00', 'S01']
+
+
+def test_remove_items_drops_empty_blocks():
+    g = _group(merge_small=False)
+    g.add_items(*SYMS)
+    last = g.block_of('S09')
+    g.remove_items('S08', 'S09')
+    assert len(g.blocks) == 2 and last.closed
+    # no merging: items keep their blocks (and history)
+    g.remove_items('S00', 'S01', 'S02')
+    assert [b.items() for b in g.blocks] == [['S03'], SYMS[4:8]]
+    with pytest.raises(TOSDB_Error, match="removing items"):
+        g.remove_items('ZZZ', 'S03')
+    assert g.items() == SYMS[4:8]
+
+
+@pytest.mark.parametrize('merge', [False, True])
+def test_merge_small(merge):
+    moves = []
+    g = _group(on_move=lambda *a: moves.append(a), merge_small=merge, max_items=8)
+    g.add_items(*(SYMS + ['S%02d' % i for i in range(10, 20)]))
+    old = g.block_of('S19')
+    g.remove_items('S16', 'S17', 'S18') # under a quarter full, but no room
+    assert len(g.blocks) == 3 and g.block_of('S19') is old
+    g.remove_items('S00', 'S01', 'S02', 'S03')
+    assert sorted(g.items()) == SYMS[4:] + ['S%02d' % i for i in range(10, 16)] + ['S19']
+    if merge:
+        assert len(g.blocks) == 2 and g.block_of('S19') is g.block_of('S04')
+        assert moves == [(['S19'], old, g.block_of('S19'))]
+        assert old.closed
+    else:
+        assert len(g.blocks) == 3 and g.block_of('S19') is old
+        assert moves == [] and not old.closed
+
+
+def test_block_limit():
+    live = MemBlock.live
+    g = _group(block_limits=(lambda: MemBlock.live - live, lambda: 2))
+    with pytest.raises(TOSDB_Error, match="block limit"):
+        g.add_items(*SYMS) # (needs 3)
+    assert g.items() == [] and not g.blocks
+    g.add_items(*SYMS[:8])
+    with pytest.raises(TOSDB_Error, match="block limit"):
+        g.add_items('S08')
+    assert g.items() == SYMS[:8]
+    g.remove_items(*SYMS[4:8])
+    g.add_items('S08')
+    assert g.items() == SYMS[:4] + ['S08']
+    blocks = g.blocks
+    g.close()
+    assert not g.blocks and all(b.closed for b in blocks)
+
+
+def test_on_move_must_be_callable():
+    with pytest.raises(TypeError):
+        _group(on_move=1)
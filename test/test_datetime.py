@@ -0,0 +1,178 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see 
+#   <http://www.gnu.org/licenses/>.
+
+
+""" TOSDB_DateTime, TOSDB_DateTimeArray and TOSDB_Snapshot over raw stamps """
+
+import io
+import pickle
+import time
+
+import pytest
+
+from tosdb._common import TOSDB_DateTime, TOSDB_DateTimeArray, TOSDB_Snapshot, \
+                          TOSDB_ValueError, TOSDB_Unpickler, BASE_YR, \
+                          stamp_cache_info, stamp_cache_clear
+
+BASE = 1600000000 # a Sunday in Sep 2020
+
+
+def _fields(epoch_micros):
+    # _STAMP_FMT fields of a stamp, as the library fills them (local time)
+    lt = time.localtime(epoch_micros // 1000000)
+    return (lt.tm_sec, lt.tm_min, lt.tm_hour, lt.tm_mday, lt.tm_mon - 1, 
+            lt.tm_year - BASE_YR, (lt.tm_wday + 1) % 7, lt.tm_yday - 1, 
+            lt.tm_isdst, epoch_micros % 1000000)
+
+
+def _array(ems):
+    return TOSDB_DateTimeArray._from_fields([_fields(em) for em in ems])
+
+
+# most-recent-first, like a snapshot, with runs in the same second
+EMS = [(BASE + s) * 1000000 + u for s,u in 
+       [(90, 7), (61, 999999), (61, 5), (61, 0), (30, 123456), (0, 1)]]
+
+
+def test_epoch_micros():
+    a = _array(EMS)
+    assert len(a) == len(EMS)
+    assert a.epoch_micros() == EMS
+    assert [dt.epoch_micros for dt in a] == EMS
+    assert [a[i].epoch_micros for i in range(-len(EMS), len(EMS))] == EMS + EMS
+    with pytest.raises(IndexError):
+        a[len(EMS)]
+
+
+def test_calendar_fields():
+    dt = _array(EMS)[4]
+    lt = time.localtime(BASE + 30)
+    assert tuple(dt) == (123456, lt.tm_sec, lt.tm_min, lt.tm_hour, lt.tm_mday, 
+                         lt.tm_mon, lt.tm_year)
+    assert dt.micro == 123456 and dt.year == lt.tm_year
+    assert dt == TOSDB_DateTime(lt, 123456)
+    assert dt == TOSDB_DateTime.from_epoch_micros(EMS[4])
+
+
+@pytest.mark.parametrize("indx", [slice(None), slice(1, 4), slice(4, 1), 
+                                  slice(None, None, 2), slice(None, None, -1),
+                                  slice(5, 0, -2), slice(-2, None)])
+def test_array_slices(indx):
+    a = _array(EMS)
+    s = a[indx]
+    assert isinstance(s, TOSDB_DateTimeArray)
+    assert s.epoch_micros() == EMS[indx]
+    assert [dt.epoch_micros for dt in s] == EMS[indx]
+
+
+def test_diff_micros():
+    a = _array(EMS)
+    assert a.diff_micros() == [x - y for x,y in zip(EMS, EMS[1:])]
+    assert a.diff_micros(EMS) == [0] * len(EMS)
+    assert a.diff_micros(_array([em - 5 for em in EMS])) == [5] * len(EMS)
+    with pytest.raises(TOSDB_ValueError):
+        a.diff_micros(EMS[1:])
+
+
+def test_stamp_cache_counts_runs():
+    stamp_cache_clear()
+    _array(EMS).epoch_micros()
+    info = stamp_cache_info()
+    # 4 distinct seconds; the 2 repeats of the 61 sec run are hits
+    assert (info.hits, info.misses, info.size) == (2, 4, 4)
+    _array(EMS).epoch_micros()
+    assert stamp_cache_info().hits == 2 + 6
+
+
+def test_bad_stamp_is_epoch_zero():
+    f = list(_fields(EMS[0]))
+    f[5] = 2**31 - 1 # (year past what mktime takes)
+    a = TOSDB_DateTimeArray._from_fields([tuple(f), _fields(EMS[1])])
+    assert a.epoch_micros() == [EMS[0] % 1000000, EMS[1]]
+
+
+def test_pickle_array():
+    a = _array(EMS)[1:5]
+    b = pickle.loads(pickle.dumps(a))
+    assert isinstance(b, TOSDB_DateTimeArray)
+    assert b.epoch_micros() == EMS[1:5]
+
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle_date_time(protocol):
+    dt = _array(EMS)[0]
+    assert pickle.loads(pickle.dumps(dt, protocol)) == dt
+
+
+# the old (named tuple) TOSDB_DateTime(localtime(1700000000), 123456) pickled 
+# with protocols 0 and 1
+OLD_PICKLES = [
+    b'ccopy_reg\n_reconstructor\np0\n(ctosdb._common\nTOSDB_DateTime\np1\n'
+    b'c__builtin__\ntuple\np2\n(I123456\nI20\nI13\nI17\nI14\nI11\nI2023\n'
+    b'tp3\ntp4\nRp5\n(dp6\nV_mktime\np7\nF1700000000.0\nsb.',
+    b'ccopy_reg\n_reconstructor\nq\x00(ctosdb._common\nTOSDB_DateTime\nq\x01'
+    b'c__builtin__\ntuple\nq\x02(J@\xe2\x01\x00K\x14K\rK\x11K\x0eK\x0bM\xe7\x07'
+    b'tq\x03tq\x04Rq\x05}q\x06X\x07\x00\x00\x00_mktimeq\x07GA\xd9T\xfc@\x00\x00'
+    b'\x00sb.']
+
+
+@pytest.mark.parametrize("data", OLD_PICKLES)
+def test_unpickle_old_date_time(data):
+    with pytest.raises(TypeError): # (rebuilds a tuple)
+        pickle.loads(data)
+    dt = TOSDB_Unpickler(io.BytesIO(data)).load()
+    assert isinstance(dt, TOSDB_DateTime)
+    assert dt.epoch_micros == 1700000000123456
+    assert TOSDB_Unpickler(io.BytesIO(pickle.dumps([1, (2, 3)], 1))).load() \
+        == [1, (2, 3)]
+
+
+def test_date_time_arithmetic():
+    a, b = _array(EMS[:2])
+    assert (a - b) == TOSDB_DateTime.micro_to_dtd(EMS[0] - EMS[1])
+    assert (b + (EMS[0] - EMS[1])) == a
+    assert b < a and a > b and a != b
+    assert a._replace(micro=0).epoch_micros == EMS[0] - 7
+
+
+def test_snapshot():
+    data = [float(i) for i in range(len(EMS))]
+    snap = TOSDB_Snapshot(data, _array(EMS))
+    assert len(snap) == len(EMS)
+    assert snap[2] == (2.0, TOSDB_DateTime.from_epoch_micros(EMS[2]))
+    assert snap.data is data
+    assert snap.epoch_micros() == EMS
+    assert snap.diff_micros() == _array(EMS).diff_micros()
+    assert list(snap) == [(d, TOSDB_DateTime.from_epoch_micros(em)) 
+                          for d,em in zip(data, EMS)]
+    with pytest.raises(TOSDB_ValueError):
+        TOSDB_Snapshot(data[1:], _array(EMS))
+
+
+@pytest.mark.parametrize("indx", [slice(1, 4), slice(None, None, 2), 
+                                  slice(None, None, -1)])
+def test_snapshot_slices(indx):
+    data = list(range(len(EMS)))
+    s = TOSDB_Snapshot(data, _array(EMS))[indx]
+    assert isinstance(s, TOSDB_Snapshot)
+    assert s.data == data[indx]
+    assert s.epoch_micros() == EMS[indx]
+    assert s == TOSDB_Snapshot(data, _array(EMS))[indx]
+
+
+def test_pickle_snapshot():
+    snap = TOSDB_Snapshot([1.5, 2.5], _array(EMS[:2]))
+    assert pickle.loads(pickle.dumps(snap)) == snap
@@ -0,0 +1,115 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see 
+#   <http://www.gnu.org/licenses/>.
+
+""" _tm_to_epoch against time.mktime, in a few time zones """
+
+import os
+import time
+
+import pytest
+
+from tosdb import _common
+from tosdb._common import _tm_to_epoch, BASE_YR
+
+TIME_ZONES = ['UTC0', 'EST5EDT,M3.2.0,M11.1.0', 'CET-1CEST,M3.5.0,M10.5.0/3']
+
+
+@pytest.fixture(params=TIME_ZONES)
+def tz(request):
+    old = os.environ.get('TZ')
+    os.environ['TZ'] = request.param
+    time.tzset()
+    _common._day_bases.clear()
+    _common.stamp_cache_clear()
+    yield request.param
+    if old is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = old
+    time.tzset()
+    _common._day_bases.clear()
+    _common.stamp_cache_clear()
+
+
+def _epochs(beg_year, end_year, step):
+    # every 'step' seconds, and every quarter-hour around DST transitions
+    beg = int(time.mktime((beg_year, 1, 1, 0, 0, 0, 0, 0, -1)))
+    end = int(time.mktime((end_year, 1, 1, 0, 0, 0, 0, 0, -1)))
+    epochs = list(range(beg, end, step))
+    for day in range(beg, end, 86400):
+        if time.localtime(day).tm_isdst != time.localtime(day + 86400).tm_isdst:
+            epochs.extend(range(day - 86400, day + 2 * 86400, 900))
+    return epochs
+
+
+def _mismatches(epochs, flags):
+    bad = []
+    for e in epochs:
+        lt = time.localtime(e)
+        for isdst in flags(lt):
+            tm = (lt.tm_sec, lt.tm_min, lt.tm_hour, lt.tm_mday, lt.tm_mon - 1, 
+                  lt.tm_year - BASE_YR, isdst)
+            mk = int(time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, lt.tm_hour, 
+                                  lt.tm_min, lt.tm_sec, 0, 0, isdst)))
+            got = _tm_to_epoch(*tm)
+            if got != mk:
+                bad.append((tm, got, mk))
+    return bad
+
+
+def test_matches_mktime(tz):
+    # the stamp's own dst flag and a 'wrong' one
+    epochs = _epochs(2000, 2030, 7193)
+    assert not _mismatches(epochs, lambda lt: (lt.tm_isdst, 1 - lt.tm_isdst))
+
+
+def _wall_clock(e):
+    return tuple(time.localtime(e))[:6]
+
+
+def test_unknown_dst(tz):
+    # isdst=-1: any epoch with the stamp's wall-clock time (mktime's own pick
+    # for the repeated hour of a fall-back day depends on its previous calls)
+    for e in _epochs(2015, 2025, 7193):
+        lt = time.localtime(e)
+        got = _tm_to_epoch(lt.tm_sec, lt.tm_min, lt.tm_hour, lt.tm_mday, 
+                           lt.tm_mon - 1, lt.tm_year - BASE_YR, -1)
+        assert _wall_clock(got) == tuple(lt)[:6]
+        assert abs(got - e) in (0, 3600)
+
+
+TRANSITION_DAYS = {'EST5EDT,M3.2.0,M11.1.0' : [(2021, 3, 14), (2021, 11, 7)],
+                   'CET-1CEST,M3.5.0,M10.5.0/3' : [(2021, 3, 28), (2021, 10, 31)]}
+
+def test_dst_transition_days(tz):
+    # with isdst=-1 transition days aren't 86400 linear seconds (no day base)
+    for y, m, d in TRANSITION_DAYS.get(tz, []):
+        for hour in range(24):
+            for isdst in (0, 1):
+                mk = int(time.mktime((y, m, d, hour, 30, 0, 0, 0, isdst)))
+                assert _tm_to_epoch(0, 30, hour, d, m - 1, y - BASE_YR, isdst) == mk
+            got = _tm_to_epoch(0, 30, hour, d, m - 1, y - BASE_YR, -1)
+            if _wall_clock(got)[3] == hour: # (not in the skipped hour)
+                assert _wall_clock(got) == (y, m, d, hour, 30, 0)
+        assert _common._day_bases[(y - BASE_YR, m - 1, d, -1)] is None
+
+
+def test_local_offsets_differ(tz):
+    # the same wall-clock time is a different epoch in each zone
+    e = _tm_to_epoch(0, 30, 9, 15, 6, 2021 - BASE_YR, -1)
+    off = {'UTC0' : 0, 'EST5EDT,M3.2.0,M11.1.0' : 4 * 3600, 
+           'CET-1CEST,M3.5.0,M10.5.0/3' : -2 * 3600}[tz]
+    assert e == 1626341400 + off
@@ -0,0 +1,171 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see 
+#   <http://www.gnu.org/licenses/>.
+
+
+""" indicators against values computed from scratch """
+
+import random
+import statistics
+
+import pytest
+
+from tosdb.indicators import EMA, VWAP, RollingStdev, RSI, IndicatorSet
+from tosdb.intervalize import BarAggregator
+
+rnd = random.Random(42)
+PRICES = [round(100 + rnd.gauss(0, 3), 2) for _ in range(300)]
+
+
+def _ema_ref(xs, alpha):
+    v = xs[0]
+    for x in xs[1:]:
+        v = alpha * x + (1 - alpha) * v
+    return v
+
+
+def _rsi_ref(xs, period):
+    d = [b - a for a,b in zip(xs, xs[1:])]
+    gains = [max(x, 0) for x in d]
+    losses = [max(-x, 0) for x in d]
+    g, l = sum(gains[:period]) / period, sum(losses[:period]) / period
+    for gi, li in zip(gains[period:], losses[period:]):
+        g = (g * (period - 1) + gi) / period
+        l = (l * (period - 1) + li) / period
+    return 100.0 if not l else 100 - 100 / (1 + g / l)
+
+
+def test_ema():
+    e = EMA(span=9)
+    assert e.alpha == pytest.approx(0.2) and e.value is None
+    e.push_many(None, PRICES)
+    assert e.value == pytest.approx(_ema_ref(PRICES, 0.2))
+    e.reset()
+    assert e.update(5.0) == 5.0
+    with pytest.raises(ValueError):
+        EMA()
+    with pytest.raises(ValueError):
+        EMA(alpha=1.5)
+
+
+def test_ema_textbook():
+    # alpha 0.5: 10, 11 -> 10.5, 12 -> 11.25
+    e = EMA(alpha=0.5)
+    assert [e.update(x) for x in (10, 11, 12)] == [10, 10.5, 11.25]
+
+
+@pytest.mark.parametrize("period", [2, 14, 50])
+def test_rsi(period):
+    r = RSI(period)
+    for i, x in enumerate(PRICES):
+        v = r.update(x)
+        if i < period:
+            assert v is None
+    assert r.value == pytest.approx(_rsi_ref(PRICES, period))
+
+
+def test_rsi_textbook():
+    r = RSI(2)
+    for x in (10, 11, 10.5): # gains 1, 0; losses 0, 0.5
+        r.update(x)
+    assert r.value == pytest.approx(100 - 100 / (1 + 0.5 / 0.25))
+    r = RSI(2)
+    for x in (1, 2, 3):
+        r.update(x)
+    assert r.value == 100.0
+
+
+@pytest.mark.parametrize("window,ddof", [(2, 1), (20, 1), (20, 0), (500, 1)])
+def test_rolling_stdev(window, ddof):
+    s = RollingStdev(window, ddof)
+    ref = statistics.stdev if ddof else statistics.pstdev
+    for i, x in enumerate(PRICES):
+        s.update(x)
+        vals = PRICES[max(0, i + 1 - window):i + 1]
+        if len(vals) <= ddof:
+            assert s.value is None
+        else:
+            assert s.value == pytest.approx(ref(vals), rel=1e-9, abs=1e-9)
+            assert s.mean == pytest.approx(statistics.fmean(vals))
+    with pytest.raises(ValueError):
+        RollingStdev(3, 3)
+
+
+def test_vwap():
+    v = VWAP()
+    assert v.value is None
+    v.update(10.0, 100)
+    v.update(12.0, 300)
+    assert v.value == pytest.approx((1000 + 3600) / 400) and v.volume == 400
+
+
+def test_vwap_cumulative_volume():
+    v = VWAP()
+    # prices before volume readings at the same time; the first reading is 
+    # only a starting point; a drop restarts the average
+    v.push_many([1, 3, 5], [10.0, 11.0, 12.0], [1, 2, 4, 6], [1000, 1100, 1400, 1500])
+    assert v.value == pytest.approx((10.0 * 100 + 11.0 * 300 + 12.0 * 100) / 500)
+    v.push_many([7], [13.0], [8], [50])
+    assert v.value == 13.0 and v.volume == 50
+
+
+class _Block:
+    # one stream per (item, topic); each drain returns what was queued
+    def __init__(self):
+        self.queued = {}
+
+    def stream_snapshot_from_marker(self, item, topic, **kwargs):
+        ticks = self.queued.pop((item, topic), [])
+        return _Snap(ticks[::-1]) if ticks else None
+
+
+class _Snap(list):
+    def epoch_micros(self):
+        return [em for em,_ in self]
+
+    @property
+    def data(self):
+        return [v for _,v in self]
+
+
+def test_indicator_set():
+    blk = _Block()
+    s = IndicatorSet()
+    assert s.add(blk, 'spy', 'last', EMA(alpha=0.5)) == 'SPY:LAST:EMA'
+    s.add(blk, 'SPY', 'LAST', VWAP(), volume_topic='VOLUME')
+    s.add(blk, 'SPY', 'LAST', RSI(2), name='rsi')
+    with pytest.raises(ValueError):
+        s.add(blk, 'SPY', 'LAST', RSI(2), name='rsi')
+    blk.queued[('SPY', 'LAST')] = [(1, 10.0), (3, 11.0), (5, 12.0)]
+    blk.queued[('SPY', 'VOLUME')] = [(2, 100), (4, 150)]
+    s.poll()
+    assert s['SPY:LAST:EMA'] == 11.25
+    assert s.value('SPY:LAST:VWAP') == 11.0
+    assert s.values() == {'SPY:LAST:EMA': 11.25, 'SPY:LAST:VWAP': 11.0, 
+                          'rsi': 100.0}
+    assert isinstance(s.remove('rsi'), RSI)
+    assert 'rsi' not in s and len(s) == 2
+    assert len(s.aggregator._subs[blk]) == 2
+
+
+def test_indicator_set_remove_during_add():
+    class _Agg(BarAggregator):
+        def subscribe(self, *args):
+            s.remove('x') # (another thread, while add() subscribes)
+            return super().subscribe(*args)
+    agg = _Agg()
+    s = IndicatorSet(agg)
+    s.add(_Block(), 'SPY', 'LAST', EMA(3), 'x')
+    assert s.names() == [] and agg._subs == {}
@@ -0,0 +1,611 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see 
+#   <http://www.gnu.org/licenses/>.
+
+
+""" intervalize: bar engines, bar files, the file sink and the aggregator """
+
+import abc
+import gc
+import io
+import os
+import random
+import time
+
+import pytest
+
+import tosdb
+from tosdb import _common, intervalize
+from tosdb._common import TOSDB_DateTimeArray, TOSDB_Snapshot, BASE_YR
+from tosdb.intervalize import Bar, BarEngine, MultiBarEngine, \
+     ActivityBarEngine, GapFill, resample, _resample_builtin, BarFileWriter, \
+     BarFileReader, AsyncFileSink, BarAggregator, LOCAL_TIME, GAP_FFILL, \
+     GAP_NAN, GAP_SKIP, ACTIVITY_TICK, ACTIVITY_VOLUME, ACTIVITY_DOLLAR, \
+     SIZE_FROM_LAST_SIZE, ADVANCE_CLOCK, ADVANCE_TICKS, FSYNC_CLOSE, \
+     TimeInterval, GetOnTimeInterval, GetOnTimeInterval_OHLC
+
+M = 1000000
+T0 = 1599955200 * M # (00:00 UTC, on every boundary)
+
+
+def _ticks(n, seed, spread=7200):
+    # n ticks (oldest-first) over 'spread' seconds from T0, with runs in the 
+    # same micro-second, and a cumulative volume (with a reset) for each
+    rnd = random.Random(seed)
+    ems = sorted(T0 + rnd.randrange(spread * M) // 1000 * 1000 for _ in range(n))
+    prices = [round(100 + rnd.gauss(0, 2), 2) for _ in range(n)]
+    cum, v = [], 5000
+    for i in range(n):
+        v = rnd.randrange(50) if i == n // 2 else v + rnd.randrange(0, 300, 10)
+        cum.append(v)
+    return ems, prices, cum
+
+
+def _engine_bars(isec, off, ems, prices, vols=None, push_many=True):
+    bars = []
+    e = BarEngine(isec, bars.append, off, vols is not None)
+    if push_many:
+        e.push_many(ems, prices, *(() if vols is None else (ems, vols)))
+    else:
+        for i, (em, p) in enumerate(zip(ems, prices)):
+            e.push(em, p)
+            if vols is not None:
+                e.push_volume(em, vols[i])
+    e.flush()
+    return bars
+
+
+@pytest.mark.parametrize("isec", [1, 60, 300, 3600, 14400, 86400])
+@pytest.mark.parametrize("off", [0, -18000, 19800])
+def test_engine_matches_resample(isec, off):
+    ems, prices, cum = _ticks(2000, isec + off, spread=3 * 86400)
+    for vols in (None, cum):
+        bars = _engine_bars(isec, off, ems, prices, vols)
+        assert bars == _engine_bars(isec, off, ems, prices, vols, push_many=False)
+        assert bars == resample(ems, prices, vols, isec, off, cumulative=True)
+        assert bars == _resample_builtin(ems, prices, vols, isec * M, off * M, True)
+    for b in bars:
+        assert (b.epoch_micros + off * M) % (isec * M) == 0
+        assert b.low <= min(b.open, b.close) and b.high >= max(b.open, b.close)
+
+
+def test_resample_per_tick_volume():
+    ems, prices, _ = _ticks(500, 1)
+    vols = [random.Random(i).randrange(1, 100) for i in range(len(ems))]
+    bars = resample(ems, prices, vols, 60)
+    assert sum(b.volume for b in bars) == sum(vols)
+    assert bars == _resample_builtin(ems, prices, vols, 60 * M, 0, False)
+    assert [b[:5] for b in bars] == [b[:5] for b in _engine_bars(60, 0, ems, prices)]
+
+
+def test_resample_out_of_order():
+    ems = [T0 + 10 * M, T0 + 70 * M, T0 + 20 * M, T0 + 130 * M]
+    bars = resample(ems, [1.0, 2.0, 3.0, 4.0], None, 60)
+    # the late tick is folded into the bar in progress, as BarEngine does
+    assert bars == _engine_bars(60, 0, ems, [1.0, 2.0, 3.0, 4.0])
+    assert bars[1] == Bar(T0 + 60 * M, 2.0, 3.0, 2.0, 3.0, None)
+
+
+def test_engine_volume():
+    bars = []
+    e = BarEngine(60, bars.append, track_volume=True)
+    e.push(T0, 10.0)
+    e.push_volume(T0 + M, 1000)     # first reading: volume unknown until next bar
+    e.push_volume(T0 + 2 * M, 1100)
+    e.push_volume(T0 + 61 * M, 1150) # a trade at the last price rolls a bar
+    e.push(T0 + 62 * M, 11.0)
+    e.push_volume(T0 + 63 * M, 20)   # reset (new session): counts 20
+    e.flush()
+    assert bars == [Bar(T0, 10.0, 10.0, 10.0, 10.0, None), 
+                    Bar(T0 + 60 * M, 10.0, 11.0, 10.0, 11.0, 70)]
+
+
+def test_engine_advance_and_late_ticks():
+    bars = []
+    e = BarEngine(60, bars.append)
+    e.push(T0 + M, 1.0)
+    assert e.next_boundary() == T0 + 60 * M
+    e.advance(T0 + 59 * M)
+    assert not bars
+    e.advance(T0 + 60 * M)
+    assert bars == [Bar(T0, 1.0, 1.0, 1.0, 1.0, None)]
+    assert e.current is None and e.next_boundary() is None
+    e.push(T0 + 30 * M, 2.0)
+    assert e.late_ticks == 1
+    e.push(T0 + 61 * M, 3.0)
+    e.flush()
+    assert bars[1:] == [Bar(T0 + 60 * M, 3.0, 3.0, 3.0, 3.0, None)]
+
+
+def test_engine_local_time_dst():
+    old = os.environ.get('TZ')
+    os.environ['TZ'] = 'EST5EDT,M3.2.0,M11.1.0'
+    time.tzset()
+    _common._day_bases.clear()
+    try:
+        # 72 hours from the day before a change: the local clock covers 73 
+        # (spring forward) or 71 (fall back) of them
+        for day, nbars in (((2021, 3, 13), 19), ((2021, 11, 6), 18)):
+            beg = int(time.mktime(day + (0, 0, 0, 0, 0, -1)))
+            ems = [(beg + i * 600) * M for i in range(6 * 72)]
+            prices = list(range(len(ems)))
+            bars = _engine_bars(4 * 3600, LOCAL_TIME, ems, prices)
+            hours = [time.localtime(b.epoch_micros // M).tm_hour for b in bars]
+            assert hours == ([0, 4, 8, 12, 16, 20] * 4)[:nbars]
+            assert resample(ems, prices, None, 4 * 3600, LOCAL_TIME) == bars
+    finally:
+        if old is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = old
+        time.tzset()
+        _common._day_bases.clear()
+
+
+def test_multi_engine_matches_engines():
+    ems, prices, cum = _ticks(3000, 7, spread=86400)
+    isecs = [60, 300, 900, 3600]
+    out = []
+    m = MultiBarEngine(isecs, lambda isec, bar: out.append((isec, bar)), 
+                       -18000, True)
+    m.push_many(ems, prices, ems, cum)
+    m.flush()
+    for isec in isecs:
+        got = [b for i,b in out if i == isec]
+        want = _engine_bars(isec, -18000, ems, prices, cum)
+        assert [b[:5] for b in got] == [b[:5] for b in want]
+        # (a coarser bar's volume is only known if its first finer bar's is)
+        assert [b.volume for b in got[1:]] == [b.volume for b in want[1:]]
+    with pytest.raises(ValueError):
+        MultiBarEngine([60, 90], lambda i,b: None)
+
+
+def test_multi_engine_advance():
+    out = []
+    m = MultiBarEngine([60, 300], lambda isec, bar: out.append((isec, bar)))
+    m.push(T0 + M, 1.0)
+    m.push(T0 + 250 * M, 2.0)
+    m.advance(T0 + 300 * M)
+    assert [(i, b.epoch_micros) for i,b in out] == \
+           [(60, T0), (60, T0 + 240 * M), (300, T0)]
+    assert m.next_boundary() is None
+
+
+def _gap_bars(policy, volume=None):
+    out = []
+    g = GapFill(60, out.append, policy)
+    g(Bar(T0, 1.0, 2.0, 0.5, 1.5, volume))
+    g(Bar(T0 + 180 * M, 3.0, 3.0, 3.0, 3.0, volume))
+    return g, out
+
+
+def test_gap_fill_ffill():
+    g, out = _gap_bars(GAP_FFILL, 10)
+    assert out == [Bar(T0, 1.0, 2.0, 0.5, 1.5, 10),
+                   Bar(T0 + 60 * M, 1.5, 1.5, 1.5, 1.5, 0),
+                   Bar(T0 + 120 * M, 1.5, 1.5, 1.5, 1.5, 0),
+                   Bar(T0 + 180 * M, 3.0, 3.0, 3.0, 3.0, 10)]
+    assert _gap_bars(GAP_FFILL)[1][1].volume is None
+    # advance() fills the intervals that ended, right away
+    assert g.next_boundary() == T0 + 300 * M
+    g.advance(T0 + 299 * M)
+    assert len(out) == 4
+    g.advance(T0 + 300 * M)
+    assert out[4:] == [Bar(T0 + 240 * M, 3.0, 3.0, 3.0, 3.0, 0)]
+    g(Bar(T0 + 240 * M, 9.0, 9.0, 9.0, 9.0, 1)) # (already filled)
+    assert g.late_bars == 1 and len(out) == 5
+
+
+def test_gap_fill_nan():
+    _, out = _gap_bars(GAP_NAN, 10)
+    assert len(out) == 4
+    for b in out[1:3]:
+        assert all(p != p for p in b[1:5]) and b.volume is None
+    assert out[3] == Bar(T0 + 180 * M, 3.0, 3.0, 3.0, 3.0, 10)
+
+
+def test_gap_fill_skip():
+    g, out = _gap_bars(GAP_SKIP)
+    assert [b.epoch_micros for b in out] == [T0, T0 + 180 * M]
+    g.advance(T0 + 1000 * M)
+    assert len(out) == 2 and g.next_boundary() is None
+
+
+BARS = [Bar(T0 + i * 60 * M, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 
+            None if i == 0 else 100 * i) for i in range(5)]
+
+
+def test_bar_file_round_trip(tmp_path):
+    path = str(tmp_path / "spy.bar")
+    with BarFileWriter(path, 60, 'SPY', 'LAST', -18000) as w:
+        w.write(BARS[0])
+        w.write_many(BARS[1:])
+    with BarFileReader(path) as r:
+        assert r.header == (1, 60, -18000, 'SPY', 'LAST')
+        assert len(r) == len(BARS)
+        assert list(r) == BARS
+        assert r[1:3] == BARS[1:3] and r[-1] == BARS[-1]
+        assert list(r.column('close')) == [b.close for b in BARS]
+        with pytest.raises(IndexError):
+            r[len(BARS)]
+
+
+def test_bar_file_truncated_tail(tmp_path):
+    path = str(tmp_path / "spy.bar")
+    with BarFileWriter(path, 60) as w:
+        w.write_many(BARS[:3])
+    with open(path, 'ab') as f: # (a crash mid-write)
+        f.write(b'\x01' * 17)
+    r = BarFileReader(path)
+    assert list(r) == BARS[:3]
+    # the next writer truncates the partial record before appending
+    with BarFileWriter(path, 60) as w:
+        w.write_many(BARS[3:])
+    r.refresh()
+    assert list(r) == BARS
+    r.close()
+    with pytest.raises(ValueError):
+        BarFileWriter(path, 30)
+
+
+@pytest.mark.parametrize("data", [b'', b'TOSDBBAR', b'X' * 200])
+def test_bar_file_not_a_bar_file(tmp_path, data):
+    path = str(tmp_path / "x.bar")
+    with open(path, 'wb') as f:
+        f.write(data)
+    with pytest.raises(ValueError, match="not a bar file"):
+        BarFileReader(path)
+
+
+@pytest.mark.parametrize("kw", [dict(item='X' * 33), dict(topic='é' * 17),
+                                dict(item=b'SPY'), dict(utc_offset=86401),
+                                dict(item='A\0B')])
+def test_bar_file_header_validation(tmp_path, kw):
+    path = str(tmp_path / "x.bar")
+    with pytest.raises(ValueError):
+        BarFileWriter(path, 60, **kw)
+    assert not os.path.exists(path)
+
+
+def test_async_file_sink(tmp_path):
+    sink = AsyncFileSink(flush_bytes=64, flush_seconds=0.05, fsync=FSYNC_CLOSE,
+                         max_open_files=1)
+    paths = [str(tmp_path / (n + ".txt")) for n in "abc"]
+    files = [sink.open_text(p) for p in paths]
+    bars = sink.open_bars(str(tmp_path / "b.bar"), 60, 'SPY', 'LAST')
+    for i in range(50): # (interleaved, through a single open file)
+        for f in files:
+            f.write(str(i) + '\n')
+        bars(BARS[i % len(BARS)])
+    files[0].close()
+    with pytest.raises(ValueError):
+        files[0].write('x')
+    sink.close()
+    for p in paths:
+        with open(p) as f:
+            assert f.read() == ''.join(str(i) + '\n' for i in range(50))
+    with BarFileReader(str(tmp_path / "b.bar")) as r:
+        assert list(r) == [BARS[i % len(BARS)] for i in range(50)]
+    with pytest.raises(ValueError):
+        sink.open_text(paths[0])
+
+
+def test_async_file_sink_batches(tmp_path):
+    sink = AsyncFileSink(flush_bytes=1 << 20, flush_seconds=0.3)
+    path = str(tmp_path / "a.txt")
+    f = sink.open_text(path)
+    time.sleep(0.5) # idle longer than flush_seconds
+    f.write('x')
+    time.sleep(0.1) # the batch time starts with the write, not the last batch
+    assert os.path.getsize(path) == 0
+    time.sleep(0.5)
+    assert os.path.getsize(path) == 1
+    sink.close()
+
+
+def test_async_file_sink_errors(tmp_path):
+    sink = AsyncFileSink(flush_bytes=1 << 20, flush_seconds=0.05)
+    path = str(tmp_path / "a.txt")
+    f = sink.open_text(path)
+    failing = [True]
+    open_file = sink._file
+    def file(p):
+        if failing[0]:
+            raise OSError("disk full")
+        return open_file(p)
+    sink._file = file
+    f.write('a')
+    time.sleep(0.3)
+    with pytest.raises(OSError): # the failed batch's error, nothing queued
+        f.write('b')
+    failing[0] = False
+    time.sleep(0.3) # the kept batch is retried
+    f.write('c')
+    f.close()
+    time.sleep(0.3)
+    failing[0] = True
+    g = sink.open_text(str(tmp_path / "b.txt"))
+    g.write('x')
+    with pytest.raises(OSError): # never written
+        sink.close()
+    with open(path) as h:
+        assert h.read() == 'ac'
+    with pytest.raises(ValueError):
+        g.write('y')
+
+
+def test_activity_tick_bars():
+    out = []
+    e = ActivityBarEngine(ACTIVITY_TICK, 3, out.append, None)
+    e.push_many([1, 2, 3, 4, 5, 6, 7], [10, 11, 9, 12, 13, 8, 10])
+    e.flush()
+    assert out == [Bar(1, 10, 11, 9, 9, None), Bar(4, 12, 13, 8, 8, None), 
+                   Bar(7, 10, 10, 10, 10, None)]
+    assert e.next_boundary() is None
+
+
+def test_activity_volume_bars():
+    out = []
+    e = ActivityBarEngine(ACTIVITY_VOLUME, 100, out.append)
+    e.push_many([1, 3, 5], [10, 11, 12], [1, 2, 4, 6, 7], 
+                [1000, 1050, 1100, 1150, 1300])
+    e.flush()
+    assert out == [Bar(2, 10, 11, 10, 11, 100), Bar(6, 12, 12, 12, 12, 200)]
+
+
+def test_activity_last_size_pairing():
+    out = []
+    e = ActivityBarEngine(ACTIVITY_VOLUME, 300, out.append, SIZE_FROM_LAST_SIZE,
+                          pair_micros=1000)
+    # a LAST with its LAST_SIZE 200us later is one trade, counted once
+    e.push_many([0, 5000], [10.0, 11.0], [200, 5100], [100, 250])
+    assert out == [Bar(0, 10.0, 11.0, 10.0, 11.0, 350)]
+    # a lone LAST is a trade of the last size, a lone LAST_SIZE one at the 
+    # last price; each is held until the window passes
+    e.push(10000, 12.0)
+    assert e.current is None and e.next_boundary() == 11001
+    e.push_volume(20000, 40)
+    assert e.current == Bar(10000, 12.0, 12.0, 12.0, 12.0, 250)
+    e.advance(21001)
+    assert e.current.volume == 290
+    e.flush()
+    assert out[1:] == [Bar(10000, 12.0, 12.0, 12.0, 12.0, 290)]
+
+
+def test_activity_dollar_bars():
+    out = []
+    e = ActivityBarEngine(ACTIVITY_DOLLAR, 1000, out.append, SIZE_FROM_LAST_SIZE)
+    e.push_many([0, 10 * M], [10.0, 20.0], [0, 10 * M], [50, 60])
+    e.flush()
+    assert out == [Bar(0, 10.0, 20.0, 10.0, 20.0, 110)]
+
+
+def _fields(em):
+    lt = time.localtime(em // M)
+    return (lt.tm_sec, lt.tm_min, lt.tm_hour, lt.tm_mday, lt.tm_mon - 1, 
+            lt.tm_year - BASE_YR, 0, 0, lt.tm_isdst, em % M)
+
+
+class FakeBlock:
+    """ stream_snapshot_from_marker over queued (epoch_micros, value) ticks """
+    def __init__(self):
+        self.queued = {}
+        self.reads = []
+        self.on_read = None
+
+    def put(self, item, topic, em, val):
+        self.queued.setdefault((item, topic), []).append((em, val))
+
+    def stream_snapshot_from_marker(self, item, topic, date_time=False, 
+                                    throw_if_data_lost=True):
+        self.reads.append(topic)
+        if self.on_read:
+            self.on_read(item, topic)
+        ticks = self.queued.pop((item, topic), [])[::-1] # most recent first
+        if not ticks:
+            return None
+        return TOSDB_Snapshot([v for _,v in ticks], 
+                              TOSDB_DateTimeArray._from_fields(
+                                  [_fields(em) for em,_ in ticks]))
+
+
+def test_aggregator_subscribers():
+    blk = FakeBlock()
+    agg = BarAggregator()
+    got, many = [], []
+    t1 = agg.subscribe(blk, 'spy', 'last', lambda e, v: got.append((e, v)))
+    agg.subscribe_many(blk, 'SPY', ('LAST', 'VOLUME'), many.append)
+    agg.subscribe(blk, 'QQQ', 'LAST', lambda e, v: 1 / 0) # (logged, skipped)
+    blk.put('SPY', 'LAST', T0, 1.0)
+    blk.put('SPY', 'LAST', T0 + M, 2.0)
+    blk.put('QQQ', 'LAST', T0, 1.0)
+    agg.poll()
+    assert got == [([T0, T0 + M], [1.0, 2.0])]
+    assert many == [[([T0, T0 + M], [1.0, 2.0]), ([], [])]]
+    agg.unsubscribe(t1)
+    blk.put('SPY', 'LAST', T0 + 2 * M, 3.0)
+    agg.poll()
+    assert len(got) == 1 and len(many) == 2
+
+
+def test_aggregator_drains_merged_topics_together():
+    blk = FakeBlock()
+    bars = []
+    e = BarEngine(60, bars.append, track_volume=True)
+    agg = BarAggregator()
+    agg.subscribe_engine(blk, 'SPY', 'LAST', e, 'VOLUME')
+    blk.put('SPY', 'LAST', T0, 10.0)
+    blk.put('SPY', 'VOLUME', T0, 100)
+    agg.poll()
+    # a LAST tick shows up while VOLUME (with a newer reading) is drained
+    def _late_last(item, topic):
+        if topic == 'VOLUME':
+            blk.put('SPY', 'LAST', T0 + 59 * M, 11.0)
+    blk.on_read = _late_last
+    blk.put('SPY', 'VOLUME', T0 + 60 * M, 150)
+    agg.poll()
+    blk.on_read = None
+    e.flush()
+    assert bars[0] == Bar(T0, 10.0, 11.0, 10.0, 11.0, None)
+    assert e.late_ticks == 0
+
+
+def test_aggregator_advance_by_ticks():
+    blk = FakeBlock()
+    out = []
+    g = GapFill(60, out.append)
+    agg = BarAggregator(advance_by=ADVANCE_TICKS)
+    agg.subscribe_engine(blk, 'SPY', 'LAST', BarEngine(60, g), stages=(g,))
+    blk.put('SPY', 'LAST', T0 + M, 1.0)
+    agg.poll()
+    agg.advance()
+    assert out == []
+    blk.put('SPY', 'LAST', T0 + 250 * M, 2.0)
+    agg.poll()
+    agg.advance()
+    assert [b.epoch_micros for b in out] == [T0 + i * 60 * M for i in range(4)]
+
+
+def test_aggregator_advance_by_clock():
+    blk = FakeBlock()
+    bars = []
+    e = BarEngine(60, bars.append)
+    agg = BarAggregator(advance_by=ADVANCE_CLOCK)
+    agg.subscribe_engine(blk, 'SPY', 'LAST', e)
+    blk.put('SPY', 'LAST', T0 + M, 1.0)
+    agg.poll()
+    agg.advance(T0 + 60 * M)
+    assert bars == [Bar(T0, 1.0, 1.0, 1.0, 1.0, None)]
+    blk.put('SPY', 'LAST', T0 + 30 * M, 2.0)
+    agg.poll()
+    assert e.late_ticks == 1
+    with pytest.raises(ValueError):
+        BarAggregator(advance_by='x')
+
+
+def test_aggregator_clock_skew():
+    blk = FakeBlock()
+    e = BarEngine(60, lambda bar: None)
+    agg = BarAggregator(120)
+    agg.subscribe_engine(blk, 'SPY', 'LAST', e)
+    # the block's clock is an hour behind ours
+    em = int((time.time() - 3600) * M)
+    blk.put('SPY', 'LAST', em, 1.0)
+    agg.poll()
+    agg.advance()
+    skew = agg.skew_micros(blk)
+    assert -3600.5 * M < skew <= -3600 * M
+    # the bar isn't ended by our clock, so the next tick isn't late
+    assert e.current is not None
+    blk.put('SPY', 'LAST', em + 1000, 2.0)
+    agg.poll()
+    assert e.late_ticks == 0
+    # (and the thread would wake at its end, by the block's clock, + grace)
+    want = (e.next_boundary() - skew) / M + 0.5 - time.time()
+    assert abs(agg._next_wait(time.time()) - want) < 0.1
+    # a block with no ticks yet isn't advanced
+    e2 = BarEngine(60, lambda bar: None)
+    agg.subscribe_engine(FakeBlock(), 'SPY', 'LAST', e2)
+    e2.push(em, 1.0)
+    agg.advance()
+    assert e2.current is not None
+
+
+def test_aggregator_thread():
+    class BadBlock(FakeBlock):
+        def stream_snapshot_from_marker(self, *args, **kwargs):
+            raise RuntimeError("lost connection")
+    blk = FakeBlock()
+    got = []
+    agg = BarAggregator(0.05, workers=2)
+    agg.subscribe(blk, 'SPY', 'LAST', lambda e, v: got.extend(v))
+    agg.subscribe(BadBlock(), 'SPY', 'LAST', lambda e, v: None)
+    agg.start()
+    try:
+        blk.put('SPY', 'LAST', T0, 1.0)
+        for _ in range(100):
+            if got:
+                break
+            time.sleep(0.02)
+        assert got == [1.0] and agg.running
+    finally:
+        agg.stop()
+        agg.join()
+    assert not agg.running
+
+
+class IntervalBlock(FakeBlock, tosdb._TOSDB_DataBlock):
+    """ a FakeBlock GetOnTimeInterval takes (SPY; LAST and VOLUME) """
+    def items(self, str_max=0):
+        return ['SPY']
+
+    def topics(self, str_max=0):
+        return ['LAST', 'VOLUME']
+
+    def info(self):
+        return {'Name': 'fake', 'DateTime': 'Enabled'}
+
+    def _unused(self, *args, **kwargs):
+        raise NotImplementedError
+
+for _m in IntervalBlock.__abstractmethods__: # (the rest of the interface)
+    setattr(IntervalBlock, _m, IntervalBlock._unused)
+abc.update_abstractmethods(IntervalBlock)
+
+
+class ManualAggregator(BarAggregator):
+    """ polled by the test, not by a thread """
+    def start(self):
+        pass
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+def test_get_on_interval_bad_args(tmp_path, monkeypatch):
+    err = io.StringIO()
+    monkeypatch.setattr(intervalize, '_stderr', err)
+    path = str(tmp_path / "spy.txt")
+    with pytest.raises(ValueError):
+        GetOnTimeInterval(IntervalBlock(), 'SPY', 'BID')
+    gc.collect() # (__del__ of the half-made object)
+    # send_to_file prints the error and returns None
+    assert GetOnTimeInterval.send_to_file(IntervalBlock(), 'SPY', 'BID', path) is None
+    assert "block does not have topic" in err.getvalue()
+    assert not os.path.exists(path)
+    agg = ManualAggregator()
+    assert GetOnTimeInterval_OHLC.send_to_file(IntervalBlock(), 'SPY', path, 
+                                               TimeInterval.min, 59, agg) is None
+    assert "update_seconds" in err.getvalue()
+
+
+def _file_values(path):
+    with open(path) as f:
+        lines = f.read().split('\n\n', 1)[1].splitlines()
+    return [float(l.split()[-1]) for l in lines]
+
+
+@pytest.mark.parametrize("gap_fill,values", [(None, [2.0, 5.0]), 
+                                             (GAP_FFILL, [3.0, 3.0, 3.0, 2.0])])
+def test_get_on_interval_file(tmp_path, gap_fill, values):
+    blk = IntervalBlock()
+    path = str(tmp_path / "spy.txt")
+    agg = ManualAggregator()
+    i = GetOnTimeInterval.send_to_file(blk, 'SPY', 'LAST', path, TimeInterval.min,
+                                       1, aggregator=agg, gap_fill=gap_fill)
+    for s, v in ((1, 1.0), (30, 3.0), (200, 2.0), (250, 5.0)):
+        blk.put('SPY', 'LAST', T0 + s * M, v)
+    agg.poll()
+    i.stop()
+    # the value after the bar, or with gap fill every bar's (filled) close
+    assert _file_values(path) == values
@@ -0,0 +1,98 @@
+# Copyright (C) 2014 Jonathon Ogden   < jeog.dev@gmail.com >
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#   See the GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License,
+#   'LICENSE.txt', along with this program.  If not, see 
+#   <http://www.gnu.org/licenses/>.
+
+
+""" symbols file reading/watching (cli_scripts.symbol_watch) """
+
+import io
+import os
+import threading
+
+import pytest
+
+from tosdb.cli_scripts import symbol_watch
+from tosdb.cli_scripts.symbol_watch import read_symbols, SymbolWatcher
+
+
+@pytest.fixture
+def path(tmp_path):
+    p = tmp_path / "symbols.txt"
+    p.write_text("spy, qqq  # indexes\n\n# comment only\nIWM\tspy\n  gld,,slv\n")
+    return p
+
+
+def test_read_symbols(path):
+    assert read_symbols(path) == ['SPY', 'QQQ', 'IWM', 'GLD', 'SLV']
+
+
+def test_check_reports_changes(path):
+    changes = []
+    w = SymbolWatcher(path, lambda *a: changes.append(a), fixed=['aapl', 'spy'])
+    assert w.symbols == ['AAPL', 'SPY', 'QQQ', 'IWM', 'GLD', 'SLV']
+    w.check()
+    assert changes == []
+    path.write_text("QQQ TLT\nslv\n")
+    w.check()
+    # fixed symbols stay, even if they leave the file
+    assert changes == [(['TLT'], ['IWM', 'GLD'])]
+    assert w.symbols == ['AAPL', 'SPY', 'QQQ', 'TLT', 'SLV']
+
+
+def test_check_keeps_symbols_on_error(path, monkeypatch):
+    changes = []
+    w = SymbolWatcher(path, lambda *a: changes.append(a))
+    err = io.StringIO()
+    monkeypatch.setattr(symbol_watch, '_stderr', err)
+    os.remove(path)
+    w.check()
+    assert changes == [] and w.symbols == ['SPY', 'QQQ', 'IWM', 'GLD', 'SLV']
+    assert "SymbolWatcher.check" in err.getvalue()
+
+
+def test_missing_file(tmp_path, monkeypatch):
+    err = io.StringIO()
+    monkeypatch.setattr(symbol_watch, '_stderr', err)
+    path = tmp_path / "later.txt"
+    changes = []
+    w = SymbolWatcher(path, lambda *a: changes.append(a), fixed=['spy'])
+    assert w.symbols == ['SPY'] and "later.txt" in err.getvalue()
+    path.write_text("QQQ spy\n")
+    w.check()
+    assert changes == [(['QQQ'], [])]
+
+
+def test_on_change_must_be_callable(path):
+    with pytest.raises(TypeError):
+        SymbolWatcher(path, None)
+
+
+def test_reload_thread(path):
+    changed = threading.Event()
+    changes = []
+    def _on_change(*a):
+        changes.append(a)
+        changed.set()
+    w = SymbolWatcher(path, _on_change, poll_seconds=0)
+    w.start()
+    try:
+        path.write_text("SPY QQQ IWM GLD SLV XLE\n")
+        w.reload()
+        assert changed.wait(5)
+        assert changes == [(['XLE'], [])]
+    finally:
+        w.stop()
+        w._thread.join(5)
+    assert not w._thread.is_alive()